@@ -0,0 +1,123 @@
+"""Benchmark latency of the asyncio API (async_api.AsyncHabitTracker) under concurrent requests.
+
+A burst of concurrent requests is sent to the API: check offs of random habits (writes) mixed with
+listings, longest streaks and current streaks (reads, few distinct ones, as repeated by the clients of a
+web service). Latency percentiles, throughput and the lag of the event loop (delay of a 1 ms ticker) are
+reported with coalescing of identical reads enabled and disabled.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_async_api.py --habits 1000 --checkoffs 30 --requests 1000 --writes 0.1
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import sample_data  # noqa: E402
+import storage  # noqa: E402
+import timestamp_codec  # noqa: E402
+from async_api import AsyncHabitTracker  # noqa: E402
+from habit import MICROSECONDS_PER_DAY  # noqa: E402
+
+# Check offs of the benchmark are dated after the generated ones, each one on a day of its own
+CHECKOFF_START = sample_data.GENERATE_START + 2000 * MICROSECONDS_PER_DAY
+
+
+def requests(tracker, habit_ids, count, write_share, rng):
+    """Return given number of request coroutines, the given share of them check offs."""
+    reads = [lambda: tracker.list_habits(limit=20),
+             lambda: tracker.list_habits("WEEKLY", limit=20),
+             lambda: tracker.get_longest_streak(),
+             lambda: tracker.get_current_streaks(timestamp="2010-01-01 00:00:00.000000"),
+             lambda: tracker.get_longest_streak_for_habit(habit_ids[0])]
+    coroutines = []
+    for index in range(count):
+        if rng.random() < write_share:
+            timestamp = timestamp_codec.format(CHECKOFF_START + index * MICROSECONDS_PER_DAY)
+            coroutines.append(tracker.checkoff(rng.choice(habit_ids), timestamp))
+        else:
+            coroutines.append(rng.choice(reads)())
+    return coroutines
+
+
+async def timed(coroutine, latencies):
+    """Await given coroutine and record its latency."""
+    started = time.perf_counter()
+    await coroutine
+    latencies.append(time.perf_counter() - started)
+
+
+async def measure_lag(lags, interval=0.001):
+    """Record the delay of a ticker sleeping given interval, until cancelled."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+def percentile(values, share):
+    """Return the given percentile (0 to 1) of given values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+async def run(path, backend, habit_ids, args, coalesce):
+    """Send the burst of requests and return latencies, duration, event loop lags and coalesced reads."""
+    latencies = []
+    lags = []
+    async with AsyncHabitTracker(path, backend, workers=args.workers, max_concurrency=args.max_concurrency,
+                                 coalesce=coalesce) as tracker:
+        # Warm up: open the storage pool
+        await asyncio.gather(*(tracker.list_habits(limit=1) for _ in range(args.workers)))
+        coalesced = tracker.coalesced
+        lag_task = asyncio.ensure_future(measure_lag(lags))
+        coroutines = requests(tracker, habit_ids, args.requests, args.writes, random.Random(args.seed))
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(coroutine, latencies) for coroutine in coroutines))
+        duration = time.perf_counter() - started
+        lag_task.cancel()
+        coalesced = tracker.coalesced - coalesced
+    return latencies, duration, lags, coalesced
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=1000, help="Number of habits.")
+    parser.add_argument("--checkoffs", type=int, default=30, help="Number of check offs per habit.")
+    parser.add_argument("--requests", type=int, default=1000, help="Number of concurrent requests.")
+    parser.add_argument("--writes", type=float, default=0.1, help="Share of check offs among the requests.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of executor threads.")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Maximum number of running requests.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the request mix.")
+    args = parser.parse_args()
+
+    print(f"habits={args.habits} checkoffs/habit={args.checkoffs} requests={args.requests} writes={args.writes} "
+          f"workers={args.workers} max_concurrency={args.max_concurrency}")
+    print(f"{'backend':8} {'coalesce':8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'req/s':>8} "
+          f"{'coalesced':>10} {'loop lag p99 (ms)':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ("sqlite", "shelve"):
+            for coalesce in (True, False):
+                # Fresh database per run, as the check offs of a run cannot be repeated
+                path = os.path.join(directory, f"{backend}-{coalesce}")
+                habits_db = storage.BACKENDS[backend](path)
+                generated = sample_data.generate(args.habits, args.checkoffs)
+                sample_data.seed(habits_db, generated)
+                habit_ids = [habit.id for _, habit in habits_db.items()]
+                habits_db.close()
+                latencies, duration, lags, coalesced = asyncio.run(run(path, backend, habit_ids, args, coalesce))
+                print(f"{backend:8} {str(coalesce):8} {percentile(latencies, 0.5) * 1000:9.1f} "
+                      f"{percentile(latencies, 0.99) * 1000:9.1f} {max(latencies) * 1000:9.1f} "
+                      f"{len(latencies) / duration:8.0f} {coalesced:10} "
+                      f"{percentile(lags, 0.99) * 1000 if lags else 0.0:18.1f}")
+
+
+if __name__ == "__main__":
+    main()
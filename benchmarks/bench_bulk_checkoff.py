@@ -0,0 +1,101 @@
+"""Benchmark importing check offs with bulk-checkoff against one check off at a time.
+
+Generates a CSV file with the requested number of check offs (daily check offs of several habits, in
+random order) and imports it with the bulk-checkoff command implementation. Single check offs
+(Storage.check_off, as done by the checkoff command) are measured on a sample and extrapolated, the
+process start of each checkoff command is not even included there.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_bulk_checkoff.py --checkoffs 1000000 --habits 1000
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import storage  # noqa: E402
+from habit import Habit  # noqa: E402
+
+
+def load_command(name):
+    """Load command module of given name from the commands folder."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HABITTRACKER_DIR, "commands", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_habits(habits_db, habit_count):
+    """Store given number of daily habits without check offs and return their ids."""
+    habit_ids = []
+    with habits_db.transaction():
+        for index in range(habit_count):
+            habit = Habit(f"habit {index}", "benchmark habit", "DAILY")
+            habits_db[habit.id] = habit
+            habit_ids.append(habit.id)
+    return habit_ids
+
+
+def checkoff_rows(habit_ids, checkoff_count, seed=42):
+    """Return (habit id, timestamp) pairs of daily check offs, in random order."""
+    start = datetime(2000, 1, 1, 8)
+    days = -(-checkoff_count // len(habit_ids))
+    dates = [(start + timedelta(days=day)).strftime("%Y-%m-%d %H:%M:%S.%f") for day in range(days)]
+    rows = [(habit_id, date) for habit_id in habit_ids for date in dates][:checkoff_count]
+    random.Random(seed).shuffle(rows)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkoffs", type=int, default=1000000, help="Number of check offs to import.")
+    parser.add_argument("--habits", type=int, default=1000, help="Number of habits.")
+    parser.add_argument("--sample", type=int, default=10000, help="Number of single check offs measured.")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), default="sqlite", help="Storage backend.")
+    args = parser.parse_args()
+
+    bulk_checkoff = load_command("bulk-checkoff")
+    with tempfile.TemporaryDirectory() as directory:
+        habits_db = storage.BACKENDS[args.backend](os.path.join(directory, "habitdb"))
+        habit_ids = create_habits(habits_db, args.habits)
+        rows = checkoff_rows(habit_ids, args.checkoffs)
+        csv_path = os.path.join(directory, "checkoffs.csv")
+        with open(csv_path, "w", encoding="utf-8") as csv_file:
+            csv_file.write("habit_id,timestamp\n")
+            csv_file.writelines(f"{habit_id},{date}\n" for habit_id, date in rows)
+
+        start = time.perf_counter()
+        with open(csv_path, encoding="utf-8") as csv_file:
+            checkoffs, read_count = bulk_checkoff.read_checkoffs(csv_file, "CSV")
+        parsed = time.perf_counter()
+        imported_count = habits_db.check_off_many(checkoffs)
+        stored = time.perf_counter()
+        print(f"bulk-checkoff ({args.backend}): {read_count} read, {imported_count} imported")
+        print(f"  read and parse: {parsed - start:8.2f} s")
+        print(f"  store:          {stored - parsed:8.2f} s")
+        print(f"  total:          {stored - start:8.2f} s ({read_count / (stored - start):,.0f} checkoffs/s)")
+        habits_db.close()
+
+        habits_db = storage.BACKENDS[args.backend](os.path.join(directory, "singledb"))
+        habit_ids = create_habits(habits_db, args.habits)
+        sample = checkoff_rows(habit_ids, min(args.sample, args.checkoffs))
+        start = time.perf_counter()
+        for habit_id, date in sample:
+            habits_db.check_off(habit_id, date)
+        total = time.perf_counter() - start
+        rate = len(sample) / total
+        print(f"single check offs ({args.backend}): {len(sample)} in {total:.2f} s ({rate:,.0f} checkoffs/s), "
+              f"extrapolated {args.checkoffs / rate:.1f} s for {args.checkoffs}")
+        habits_db.close()
+
+
+if __name__ == "__main__":
+    main()
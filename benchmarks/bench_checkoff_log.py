@@ -0,0 +1,70 @@
+"""Benchmark check off latency of the shelve backend versus the length of the habit's history.
+
+Compares rewriting the whole pickled habit on each check off (Storage.check_off, as done before the
+check off log) with appending the check off to the log (ShelveStorage.check_off). Both load the habit
+first, as the check off command returns the whole habit. The SQLite backend is listed for reference.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_checkoff_log.py --history 100 1000 10000 100000 --checkoffs 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import storage  # noqa: E402
+import timestamp_codec  # noqa: E402
+from habit import Habit, MICROSECONDS_PER_DAY  # noqa: E402
+
+START = 946717200000000  # 2000-01-01 09:00:00
+
+
+def measure(habits_db, check_off, history, checkoff_count):
+    """Store a habit with given number of check offs, return mean latency (ms) of further check offs."""
+    habit = Habit.from_record("0" * 32, "benchmark", "benchmark habit", "DAILY", "2000-01-01 00:00:00.000000",
+                              array("q", range(START, START + history * MICROSECONDS_PER_DAY, MICROSECONDS_PER_DAY)))
+    habits_db[habit.id] = habit
+    dates = timestamp_codec.format_many(range(START + history * MICROSECONDS_PER_DAY,
+                                              START + (history + checkoff_count) * MICROSECONDS_PER_DAY,
+                                              MICROSECONDS_PER_DAY))
+    start = time.perf_counter()
+    for date in dates:
+        check_off(habits_db, habit.id, date)
+    duration = time.perf_counter() - start
+    assert len(habits_db[habit.id].checkoff_timestamps) == history + checkoff_count
+    return duration / checkoff_count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="Numbers of existing check offs of the habit.")
+    parser.add_argument("--checkoffs", type=int, default=200, help="Number of measured check offs.")
+    args = parser.parse_args()
+
+    cases = [("shelve rewrite", storage.ShelveStorage, storage.Storage.check_off),
+             ("shelve log", storage.ShelveStorage, storage.ShelveStorage.check_off),
+             ("sqlite", storage.SQLiteStorage, storage.SQLiteStorage.check_off)]
+    print(f"{'history':>8} " + " ".join(f"{name + ' (ms)':>20}" for name, _, _ in cases) + f" {'.dat (MB)':>20}")
+    for history in args.history:
+        latencies = []
+        dat_sizes = {}
+        for name, backend, check_off in cases:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "habitdb")
+                habits_db = backend(path)
+                latencies.append(measure(habits_db, check_off, history, args.checkoffs))
+                habits_db.close()
+                if os.path.exists(path + ".dat"):
+                    dat_sizes[name] = os.path.getsize(path + ".dat") / 1e6
+        print(f"{history:8} " + " ".join(f"{latency:20.3f}" for latency in latencies) +
+              f" {dat_sizes['shelve rewrite']:>9.2f} / {dat_sizes['shelve log']:<8.2f}")
+
+
+if __name__ == "__main__":
+    main()
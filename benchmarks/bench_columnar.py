@@ -0,0 +1,94 @@
+"""Benchmark longest streaks from the memory mapped columnar store against loading habit objects.
+
+Stores habits with daily check offs in a SQLite habit database and calculates the longest streak of
+each habit from the check offs: by loading all habits (Storage.items) and by scanning the columns of
+the columnar store (built once, then memory mapped).
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_columnar.py --habits 20000 --checkoffs 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import analytics  # noqa: E402
+import app_config as conf  # noqa: E402
+import columnar  # noqa: E402
+import storage  # noqa: E402
+from habit import Habit, MICROSECONDS_PER_DAY  # noqa: E402
+
+
+def populate(habit_count, checkoff_count):
+    """Store given number of daily habits with given number of check offs each (every fifth day missed)."""
+    start = 946717200000000  # 2000-01-01 09:00:00
+    timestamps = array("q", (start + day * MICROSECONDS_PER_DAY for day in range(checkoff_count * 5 // 4)
+                             if day % 5 != 4))[:checkoff_count]
+    habits_db = storage.open_storage()
+    with habits_db.transaction():
+        for index in range(habit_count):
+            habit = Habit.from_record(f"{index:032x}", f"habit {index}", "benchmark habit", "DAILY",
+                                      "2000-01-01 00:00:00.000000", array("q", timestamps))
+            habits_db[habit.id] = habit
+    habits_db.close()
+
+
+def measure(function):
+    """Return (result, duration) of given function."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def from_habits(engine):
+    """Load all habits and calculate their longest streaks."""
+    habits_db = storage.open_storage()
+    result = analytics.get_longest_streaks(list(habits_db.items()), engine)
+    habits_db.close()
+    return result
+
+
+def from_columns(engine):
+    """Map the columnar store and calculate the longest streaks of the habits."""
+    habits_db = storage.open_storage()
+    with columnar.open_store(habits_db) as store:
+        result = analytics.get_longest_streaks_from_columns(*store.columns(), engine=engine)
+    habits_db.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=20000, help="Number of habits.")
+    parser.add_argument("--checkoffs", type=int, default=100, help="Number of check offs per habit.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        conf.data_dir = directory
+        conf.db_name = "habitdb"
+        populate(args.habits, args.checkoffs)
+        print(f"habits={args.habits} checkoffs={args.habits * args.checkoffs}")
+        expected, duration = measure(lambda: from_habits("python"))
+        print(f"  load habits, python engine:          {duration:8.3f} s")
+        result, duration = measure(lambda: from_habits("numpy"))
+        assert result == expected
+        print(f"  load habits, numpy engine:           {duration:8.3f} s")
+        result, duration = measure(lambda: from_columns("numpy"))
+        assert result == expected
+        print(f"  build columnar store + numpy scan:   {duration:8.3f} s "
+              f"({os.path.getsize(columnar.get_path()) / 1e6:.1f} MB)")
+        result, duration = measure(lambda: from_columns("numpy"))
+        assert result == expected
+        print(f"  mapped columnar store, numpy scan:   {duration:8.3f} s")
+        result, duration = measure(lambda: from_columns("python"))
+        assert result == expected
+        print(f"  mapped columnar store, python scan:  {duration:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
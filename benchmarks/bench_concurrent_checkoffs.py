@@ -0,0 +1,87 @@
+"""Benchmark check offs of concurrent writer processes on the same habits and verify none is lost.
+
+Each writer process opens the habit database itself (like concurrent checkoff commands of cron jobs or
+webhooks) and checks off the habits on its own days. Afterwards the check offs are counted.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_concurrent_checkoffs.py --writers 1 2 4 8 --checkoffs 200 --habits 1
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import storage  # noqa: E402
+import timestamp_codec  # noqa: E402
+from habit import Habit, MICROSECONDS_PER_DAY  # noqa: E402
+
+START = 946717200000000  # 2000-01-01 09:00:00
+
+
+def write(backend, path, habit_ids, writer, checkoff_count, ready):
+    """Check off the habits in turn on distinct days of the writer, starting once all writers are ready."""
+    habits_db = storage.BACKENDS[backend](path)
+    ready.wait()
+    first_day = START + writer * checkoff_count * MICROSECONDS_PER_DAY
+    for index in range(checkoff_count):
+        habits_db.check_off(habit_ids[index % len(habit_ids)],
+                            timestamp_codec.format(first_day + index * MICROSECONDS_PER_DAY))
+    habits_db.close()
+
+
+def run(backend, writers, checkoff_count, habit_count):
+    """Run writer processes, return (duration, stored check offs)."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "habitdb")
+        habits_db = storage.BACKENDS[backend](path)
+        habit_ids = []
+        for index in range(habit_count):
+            habit = Habit(f"habit {index}", "benchmark habit", "DAILY")
+            habits_db[habit.id] = habit
+            habit_ids.append(habit.id)
+        habits_db.close()
+        context = multiprocessing.get_context("fork")
+        ready = context.Barrier(writers + 1)
+        processes = [context.Process(target=write, args=(backend, path, habit_ids, writer, checkoff_count, ready))
+                     for writer in range(writers)]
+        for process in processes:
+            process.start()
+        ready.wait()
+        start = time.perf_counter()
+        for process in processes:
+            process.join()
+        duration = time.perf_counter() - start
+        if any(process.exitcode != 0 for process in processes):
+            raise RuntimeError("Writer process failed")
+        habits_db = storage.BACKENDS[backend](path)
+        stored = sum(len(habit.checkoff_timestamps) for _, habit in habits_db.items())
+        habits_db.close()
+    return duration, stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8], help="Numbers of writer processes.")
+    parser.add_argument("--checkoffs", type=int, default=200, help="Number of check offs per writer.")
+    parser.add_argument("--habits", type=int, default=1, help="Number of habits checked off by the writers.")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), nargs="+", default=["sqlite", "shelve"],
+                        help="Storage backends.")
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} habits={args.habits} checkoffs/writer={args.checkoffs}")
+    print(f"{'backend':>8} {'writers':>8} {'checkoffs':>10} {'lost':>6} {'duration (s)':>13} {'checkoffs/s':>12}")
+    for backend in args.backend:
+        for writers in args.writers:
+            duration, stored = run(backend, writers, args.checkoffs, args.habits)
+            expected = writers * args.checkoffs
+            print(f"{backend:>8} {writers:8} {expected:10} {expected - stored:6} {duration:13.2f} "
+                  f"{expected / duration:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark the streak engines of analytics.get_longest_streaks on many habits.
+
+Compares the pure Python engine (one habit after another) with the vectorized NumPy engine (all
+checkoffs of all habits in one pass). Habits get random checkoffs per period (day or week) with gaps
+and duplicates within a period.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_fleet_streaks.py --habits 1000 10000 50000 --checkoffs 100
+    $ python benchmarks/bench_fleet_streaks.py --habits 1000 --checkoffs 520 --periodicity WEEKLY
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import analytics  # noqa: E402
+from habit import Habit, MICROSECONDS_PER_DAY  # noqa: E402
+
+
+def build_habits(habit_count, checkoff_count, periodicity="DAILY", seed=42):
+    """Build habits with random checkoffs (about 80 % of periods, some twice a period)."""
+    rng = random.Random(seed)
+    period_days = Habit.Periodicity[periodicity].days
+    habits = []
+    for index in range(habit_count):
+        timestamps = array("q")
+        day = 10000
+        while len(timestamps) < checkoff_count:
+            day += period_days if rng.random() < 0.8 else rng.randint(2, 5) * period_days
+            timestamps.append(day * MICROSECONDS_PER_DAY + 8 * 3600 * 1000000)
+            if rng.random() < 0.05:
+                timestamps.append(day * MICROSECONDS_PER_DAY + 20 * 3600 * 1000000)
+        habit_id = f"{index:032x}"
+        habits.append((habit_id, Habit.from_record(habit_id, "benchmark", "benchmark habit", periodicity,
+                                                   "2020-01-01 00:00:00.000000", timestamps)))
+    return habits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, nargs="+", default=[1000, 10000, 50000], help="Numbers of habits.")
+    parser.add_argument("--checkoffs", type=int, default=100, help="Number of checkoffs per habit.")
+    parser.add_argument("--periodicity", choices=["DAILY", "WEEKLY"], default="DAILY", help="Periodicity of habits.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs (best is reported).")
+    args = parser.parse_args()
+
+    print(f"{'habits':>8} {'checkoffs':>10} {'python (ms)':>12} {'numpy (ms)':>11} {'speedup':>8}")
+    for habit_count in args.habits:
+        habits = build_habits(habit_count, args.checkoffs, args.periodicity)
+        assert analytics.get_longest_streaks(habits, "python") == analytics.get_longest_streaks(habits, "numpy")
+        timings = {}
+        for engine in ("python", "numpy"):
+            timings[engine] = min(timeit.repeat(lambda: analytics.get_longest_streaks(habits, engine),
+                                                number=1, repeat=args.repeat))
+        print(f"{habit_count:8} {habit_count * args.checkoffs:10} {timings['python'] * 1000:12.1f} "
+              f"{timings['numpy'] * 1000:11.1f} {timings['python'] / timings['numpy']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark pickle size and memory per habit of the compact habit representation.
+
+The former representation (one Checkoff object per check off, holding a datetime and a back-reference to
+its habit) is rebuilt here for comparison.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_habit_memory.py --checkoffs 10000
+"""
+import argparse
+import os
+import pickle
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+from habit import Habit  # noqa: E402
+
+
+class LegacyHabit:
+    """Former habit representation, kept for comparison."""
+    def __init__(self, habit):
+        self.id = habit.id
+        self.name = habit.name
+        self.description = habit.description
+        self.periodicity = habit.periodicity
+        self.created = habit.created
+        self.checkoffs = [LegacyCheckoff(self, checkoff.timestamp) for checkoff in habit.checkoffs]
+
+
+class LegacyCheckoff:
+    """Former checkoff representation, kept for comparison."""
+    def __init__(self, habit, timestamp):
+        self.habit = habit
+        self.timestamp = timestamp
+
+
+def build_habit(checkoff_count):
+    """Build a daily habit with given number of check offs."""
+    habit = Habit("benchmark", "benchmark habit", "DAILY")
+    start = datetime(1990, 1, 1, 10)
+    for day in range(checkoff_count):
+        habit.check_off((start + timedelta(days=day)).strftime("%Y-%m-%d %H:%M:%S.%f"))
+    return habit
+
+
+def measure(factory):
+    """Return (allocated bytes, pickle bytes) of the object created by given factory."""
+    tracemalloc.start()
+    obj = factory()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated, len(pickle.dumps(obj))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkoffs", type=int, default=10000, help="Number of check offs of the habit.")
+    args = parser.parse_args()
+
+    habit = build_habit(args.checkoffs)
+    # Measure a fresh copy, so that only the memory of the measured representation is traced
+    compact_ram, compact_pickle = measure(lambda: pickle.loads(pickle.dumps(habit)))
+    legacy_ram, legacy_pickle = measure(lambda: LegacyHabit(habit))
+    print(f"checkoffs={args.checkoffs}")
+    print(f"{'':8} {'RAM (bytes)':>14} {'pickle (bytes)':>16}")
+    print(f"{'legacy':8} {legacy_ram:14,} {legacy_pickle:16,}")
+    print(f"{'compact':8} {compact_ram:14,} {compact_pickle:16,}")
+    print(f"{'ratio':8} {legacy_ram / compact_ram:13.1f}x {legacy_pickle / compact_pickle:15.1f}x")
+
+
+if __name__ == "__main__":
+    main()
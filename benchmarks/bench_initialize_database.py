@@ -0,0 +1,75 @@
+"""Benchmark seeding of the habit database from sample data and the warm start check of initialize_database.
+
+Compares seeding as done formerly (check offs added one by one, one write per habit) with the
+seeding of module sample_data (validated in one pass, pre-sorted check offs, one transaction), for
+both storage backends.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_initialize_database.py --habits 200 --checkoffs 365
+"""
+import argparse
+import dbm
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import sample_data  # noqa: E402
+import storage  # noqa: E402
+from habit import Habit  # noqa: E402
+
+
+def seed_one_by_one(habits_db, path):
+    """Seed habits of sample data file as formerly done by initialize_database."""
+    with open(path, encoding="utf-8") as json_file:
+        data = json.load(json_file)
+    for item in data["sample_data"]:
+        sample_habit = Habit(item["name"], item["description"], item["periodicity"])
+        for checkoff_date in item["checkoffs"]:
+            sample_habit.check_off(checkoff_date)
+        habits_db[str(sample_habit.id)] = sample_habit
+
+
+def seed_batched(habits_db, path):
+    """Seed habits of sample data file with module sample_data."""
+    sample_data.seed(habits_db, sample_data.load(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=200, help="Number of sample habits.")
+    parser.add_argument("--checkoffs", type=int, default=365, help="Number of check offs per sample habit.")
+    args = parser.parse_args()
+
+    print(f"habits={args.habits} checkoffs/habit={args.checkoffs}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, sample_data.FILE_NAME)
+        with open(path, "w", encoding="utf-8") as json_file:
+            json_file.writelines(sample_data.dump_json(sample_data.generate(args.habits, args.checkoffs)))
+        print(f"{'backend':8} {'one by one (s)':>15} {'batched (s)':>12} {'speedup':>8}")
+        for backend in ("sqlite", "shelve"):
+            durations = []
+            for index, seed in enumerate((seed_one_by_one, seed_batched)):
+                habits_db = storage.BACKENDS[backend](os.path.join(directory, f"{backend}{index}"))
+                start = time.perf_counter()
+                seed(habits_db, path)
+                habits_db.close()
+                durations.append(time.perf_counter() - start)
+            print(f"{backend:8} {durations[0]:15.3f} {durations[1]:12.3f} {durations[0] / durations[1]:7.1f}x")
+
+        # Warm start: database exists, initialize_database only checks for it
+        shelve_path = os.path.join(directory, "shelve1")
+        number = 10000
+        whichdb = timeit.timeit(lambda: dbm.whichdb(shelve_path), number=number) / number
+        exists = timeit.timeit(lambda: storage.ShelveStorage.exists(shelve_path), number=number) / number
+        print(f"shelve warm start check: whichdb {whichdb * 1e6:.1f} us, exists {exists * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark time to first byte and peak memory of streamed list-habits JSON output.
+
+Compares the streamed output of the list-habits command with building the complete result list and
+serializing it with one json.dumps call (former implementation).
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_list_streaming.py --habits 1000 10000 30000
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import storage  # noqa: E402
+from habit import Habit  # noqa: E402
+
+
+def load_command(name):
+    """Load command module of given name from the commands folder."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HABITTRACKER_DIR, "commands", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def populate(habits_db, habit_count, checkoff_count):
+    """Store given number of daily habits with given number of check offs each."""
+    day = 86400 * 1000000
+    with habits_db.transaction():
+        for index in range(habit_count):
+            habit = Habit.from_record(f"{index:032x}", f"habit {index}", "benchmark habit", "DAILY",
+                                      f"2020-01-01 00:00:00.{index:06d}",
+                                      array("q", range(1577872800000000, 1577872800000000 + checkoff_count * day, day)))
+            habits_db[habit.id] = habit
+
+
+def measure(render, sink):
+    """Return (time to first byte, total time, peak traced memory) of writing rendered chunks to sink."""
+    start = time.perf_counter()
+    first_byte = None
+    for chunk in render():
+        sink.write(chunk)
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+    total = time.perf_counter() - start
+    # Measure memory in a separate run, as tracing slows down execution
+    tracemalloc.start()
+    for chunk in render():
+        sink.write(chunk)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte, total, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, nargs="+", default=[1000, 10000, 30000], help="Numbers of habits.")
+    parser.add_argument("--checkoffs", type=int, default=30, help="Number of check offs per habit.")
+    args = parser.parse_args()
+
+    list_habits = load_command("list-habits")
+    print(f"{'habits':>8} {'mode':>8} {'TTFB (ms)':>10} {'total (ms)':>11} {'peak (MB)':>10}")
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as sink:
+        for habit_count in args.habits:
+            habits_db = storage.SQLiteStorage(os.path.join(directory, f"habitdb{habit_count}"))
+            populate(habits_db, habit_count, args.checkoffs)
+
+            def materialized():
+                yield json.dumps([habit.to_custom_dict() for habit in habits_db.list_habits()], indent=4) + "\n"
+
+            def streamed():
+                return list_habits.get_json_out(habit.to_custom_dict() for habit in habits_db.list_habits())
+
+            for mode, render in (("legacy", materialized), ("stream", streamed)):
+                first_byte, total, peak = measure(render, sink)
+                print(f"{habit_count:8} {mode:>8} {first_byte * 1000:10.2f} {total * 1000:11.1f} {peak / 2 ** 20:10.2f}")
+            habits_db.close()
+
+
+if __name__ == "__main__":
+    main()
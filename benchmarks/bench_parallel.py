@@ -0,0 +1,100 @@
+"""Benchmark list-habits and get-longest-streak with 1, 2, 4 and 8 worker processes.
+
+One worker is the single process implementation of the commands, more workers use the process pool
+of the parallel module (each worker loads its own pages of habits from the database).
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_parallel.py --habits 20000 --checkoffs 100 --workers 1 2 4 8
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import analytics  # noqa: E402
+import app_config as conf  # noqa: E402
+import parallel  # noqa: E402
+import storage  # noqa: E402
+from habit import Habit  # noqa: E402
+
+
+def load_command(name):
+    """Load command module of given name from the commands folder."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HABITTRACKER_DIR, "commands", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def populate(habit_count, checkoff_count):
+    """Store given number of daily habits with given number of check offs each."""
+    day = 86400 * 1000000
+    habits_db = storage.open_storage()
+    with habits_db.transaction():
+        for index in range(habit_count):
+            habit = Habit.from_record(f"{index:032x}", f"habit {index}", "benchmark habit", "DAILY",
+                                      f"2020-01-01 00:00:00.{index:06d}",
+                                      array("q", range(1577872800000000, 1577872800000000 + checkoff_count * day, day)))
+            habits_db[habit.id] = habit
+    habits_db.close()
+
+
+def list_habits_serial(list_habits):
+    """Render list-habits JSON output in one process."""
+    habits_db = storage.open_storage()
+    chunks = list(list_habits.get_json_out(habit.to_custom_dict() for habit in habits_db.list_habits()))
+    habits_db.close()
+    return "".join(chunks)
+
+
+def longest_streak_serial():
+    """Determine longest streak in one process."""
+    habits_db = storage.open_storage()
+    longest_streak = analytics.get_longest_streak_from_summaries(list(habits_db.summaries()))
+    habits_db.close()
+    return longest_streak
+
+
+def measure(function):
+    """Return (result, duration) of given function."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=20000, help="Number of habits.")
+    parser.add_argument("--checkoffs", type=int, default=100, help="Number of check offs per habit.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Numbers of workers.")
+    args = parser.parse_args()
+
+    list_habits = load_command("list-habits")
+    print(f"cpus={os.cpu_count()} habits={args.habits} checkoffs/habit={args.checkoffs}")
+    print(f"{'workers':>8} {'list-habits (s)':>16} {'speedup':>8} {'get-longest-streak (s)':>23} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        conf.data_dir = directory
+        conf.db_name = "habitdb"
+        populate(args.habits, args.checkoffs)
+        expected_list, list_base = measure(lambda: list_habits_serial(list_habits))
+        expected_streak, streak_base = measure(longest_streak_serial)
+        for workers in args.workers:
+            if workers == 1:
+                list_duration, streak_duration = list_base, streak_base
+            else:
+                actual_list, list_duration = measure(lambda: "".join(parallel.list_habits(workers, "JSON")))
+                actual_streak, streak_duration = measure(lambda: parallel.get_longest_streak(workers))
+                assert actual_list == expected_list and actual_streak == expected_streak
+            print(f"{workers:8} {list_duration:16.2f} {list_base / list_duration:7.2f}x "
+                  f"{streak_duration:23.3f} {streak_base / streak_duration:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
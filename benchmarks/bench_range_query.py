@@ -0,0 +1,87 @@
+"""Benchmark time range queries of check offs (options --from/--to) against a full scan.
+
+The full scan loads all habits and filters their check offs to the range, as a listing without time index
+would. The range query looks the range up in the time index of the storage backend (SQLite index on the
+check off timestamps, time ordered columns of the columnar store for shelve) and loads the habits checked
+off within the range only (list-habits), or none at all (get-longest-streak). The columnar store is built
+before timing.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_range_query.py --habits 2000 --checkoffs 365 --days 7
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import analytics  # noqa: E402
+import sample_data  # noqa: E402
+import storage  # noqa: E402
+from habit import MICROSECONDS_PER_DAY  # noqa: E402
+
+
+def full_scan(habits_db, start, end):
+    """Return habits checked off within the range, loading and filtering all habits."""
+    return [habit.between(start, end) for _, habit in habits_db.items()
+            if len(habit.checkoff_timestamps_between(start, end))]
+
+
+def list_habits_between(habits_db, start, end):
+    """Return habits checked off within the range (time index)."""
+    return habits_db.list_habits_between(start, end)
+
+
+def longest_streak_full_scan(habits_db, start, end):
+    """Return longest streak within the range, loading and filtering all habits."""
+    return analytics.get_longest_streaks((habit.id, habit) for habit in full_scan(habits_db, start, end))[1]
+
+
+def longest_streak_range_query(habits_db, start, end):
+    """Return longest streak within the range from the check offs of the range (time index)."""
+    return analytics.get_longest_streaks_from_columns(*habits_db.checkoffs_between(start, end))[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=2000, help="Number of habits.")
+    parser.add_argument("--checkoffs", type=int, default=365, help="Number of check offs per habit.")
+    parser.add_argument("--days", type=int, default=7, help="Length of the queried time range in days.")
+    parser.add_argument("--number", type=int, default=5, help="Number of timed runs, the best is reported.")
+    args = parser.parse_args()
+
+    # Range within the check offs of all generated habits (daily habits span about 400 days)
+    start = sample_data.GENERATE_START + 300 * MICROSECONDS_PER_DAY
+    end = start + args.days * MICROSECONDS_PER_DAY
+    print(f"habits={args.habits} checkoffs/habit={args.checkoffs} range={args.days} days")
+    print(f"{'backend':8} {'query':8} {'habits':>7} {'checkoffs':>10} {'full scan (ms)':>15} "
+          f"{'range query (ms)':>17} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ("sqlite", "shelve"):
+            habits_db = storage.BACKENDS[backend](os.path.join(directory, backend))
+            sample_data.seed(habits_db, sample_data.generate(args.habits, args.checkoffs))
+            # Builds the columnar store of shelve
+            checkoff_count = len(habits_db.checkoffs_between(start, end)[2])
+            expected = sorted((habit.id, list(habit.checkoff_timestamps)) for habit in full_scan(habits_db, start, end))
+            actual = sorted((habit.id, list(habit.checkoff_timestamps))
+                            for habit in habits_db.list_habits_between(start, end))
+            assert actual == expected
+            assert (longest_streak_full_scan(habits_db, start, end)
+                    == longest_streak_range_query(habits_db, start, end))
+            queries = [("list", full_scan, list_habits_between),
+                       ("streak", longest_streak_full_scan, longest_streak_range_query)]
+            for name, scan_function, query_function in queries:
+                scan = min(timeit.repeat(lambda: scan_function(habits_db, start, end), number=1, repeat=args.number))
+                query = min(timeit.repeat(lambda: query_function(habits_db, start, end), number=1,
+                                          repeat=args.number))
+                print(f"{backend:8} {name:8} {len(actual):7} {checkoff_count:10} {scan * 1000:15.1f} "
+                      f"{query * 1000:17.1f} {scan / query:7.1f}x")
+            habits_db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark repeated reads of hot habits through the habit repository (LRU cache) against the storage.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_repository.py --habits 1000 --checkoffs 365 --hot 10 --reads 10000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import repository  # noqa: E402
+import storage  # noqa: E402
+from habit import Habit, MICROSECONDS_PER_DAY  # noqa: E402
+
+START = 946717200000000  # 2000-01-01 09:00:00
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=1000, help="Number of habits.")
+    parser.add_argument("--checkoffs", type=int, default=365, help="Number of check offs per habit.")
+    parser.add_argument("--hot", type=int, default=10, help="Number of habits read repeatedly.")
+    parser.add_argument("--reads", type=int, default=10000, help="Number of reads.")
+    args = parser.parse_args()
+
+    timestamps = array("q", range(START, START + args.checkoffs * MICROSECONDS_PER_DAY, MICROSECONDS_PER_DAY))
+    print(f"habits={args.habits} checkoffs/habit={args.checkoffs} hot habits={args.hot} reads={args.reads}")
+    print(f"{'backend':>8} {'storage (ms)':>13} {'repository (ms)':>16} {'speedup':>8} {'hits':>7} {'misses':>7}")
+    for backend in sorted(storage.BACKENDS):
+        with tempfile.TemporaryDirectory() as directory:
+            habits_db = storage.BACKENDS[backend](os.path.join(directory, "habitdb"))
+            habit_ids = []
+            with habits_db.transaction():
+                for index in range(args.habits):
+                    habit = Habit.from_record(f"{index:032x}", f"habit {index}", "benchmark habit", "DAILY",
+                                              "2000-01-01 00:00:00.000000", array("q", timestamps))
+                    habits_db[habit.id] = habit
+                    habit_ids.append(habit.id)
+            rng = random.Random(42)
+            hot_ids = rng.sample(habit_ids, args.hot)
+            reads = [rng.choice(hot_ids) for _ in range(args.reads)]
+
+            start = time.perf_counter()
+            for habit_id in reads:
+                habits_db[habit_id]
+            storage_duration = time.perf_counter() - start
+
+            habit_repository = repository.HabitRepository(habits_db)
+            start = time.perf_counter()
+            for habit_id in reads:
+                habit_repository[habit_id]
+            repository_duration = time.perf_counter() - start
+            info = habit_repository.cache_info()
+            print(f"{backend:>8} {storage_duration * 1000:13.1f} {repository_duration * 1000:16.1f} "
+                  f"{storage_duration / repository_duration:7.1f}x {info.hits:7} {info.misses:7}")
+            habits_db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark check offs per second of server mode against one process per command.
+
+Modes:
+
+- process: one ``python habit_tracker.py checkoff`` process per check off (former usage)
+- client: one ``python client.py checkoff`` process per check off, forwarded to a running server
+- connection: check offs sent over one open client connection to a running server
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_server.py --checkoffs 200
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HABITTRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+from client import Client  # noqa: E402
+
+DAY = 86400
+
+
+def timestamps(start, count):
+    """Return given number of check off timestamps on consecutive days."""
+    return [time.strftime("%Y-%m-%d %H:%M:%S.000000", time.gmtime((start + day) * DAY)) for day in range(count)]
+
+
+def run_processes(program, habit_id, dates, env):
+    """Check off habit at given dates running one process of given program per check off."""
+    for date in dates:
+        subprocess.run([sys.executable, program, "--test", "checkoff", "-h", habit_id, "-t", date],
+                       cwd=HABITTRACKER_DIR, env=env, stdout=subprocess.DEVNULL, check=True)
+
+
+def run_connection(habit_id, dates, socket_path):
+    """Check off habit at given dates over one client connection."""
+    with Client(socket_path) as client:
+        for date in dates:
+            response = client.run(["--test", "checkoff", "-h", habit_id, "-t", date])
+            assert response["exit_code"] == 0, response
+
+
+def wait_for_socket(socket_path, timeout=10.0):
+    """Wait until server accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            Client(socket_path).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Server not listening on {socket_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkoffs", type=int, default=200, help="Number of check offs per mode.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(os.path.join(HABITTRACKER_DIR, "data", "sample_data.json"), directory)
+        socket_path = os.path.join(directory, "habittracker.sock")
+        env = dict(os.environ, HATRABA_DATA_DIR=directory, HATRABA_SOCKET=socket_path)
+        created = subprocess.run([sys.executable, "habit_tracker.py", "--test", "create", "-n", "benchmark",
+                                  "-d", "benchmark habit", "-p", "DAILY"],
+                                 cwd=HABITTRACKER_DIR, env=env, capture_output=True, check=True)
+        habit_id = json.loads(created.stdout)["id"]
+
+        server = subprocess.Popen([sys.executable, "habit_tracker.py", "--test", "serve"],
+                                  cwd=HABITTRACKER_DIR, env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_for_socket(socket_path)
+            modes = (("process", lambda dates: run_processes("habit_tracker.py", habit_id, dates, env)),
+                     ("client", lambda dates: run_processes("client.py", habit_id, dates, env)),
+                     ("connection", lambda dates: run_connection(habit_id, dates, socket_path)))
+            print(f"{'mode':>10} {'checkoffs':>10} {'total (s)':>10} {'checkoffs/s':>12}")
+            for index, (mode, run) in enumerate(modes):
+                dates = timestamps(18000 + index * args.checkoffs, args.checkoffs)
+                start = time.perf_counter()
+                run(dates)
+                total = time.perf_counter() - start
+                print(f"{mode:>10} {args.checkoffs:10} {total:10.2f} {args.checkoffs / total:12.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
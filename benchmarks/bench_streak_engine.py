@@ -0,0 +1,73 @@
+"""Benchmark the streak engine of analytics against the former string based implementation.
+
+Reports the former implementation, a full recalculation of the streak statistics of all habits
+(single pass over the checkoffs) and analytics.get_longest_streak (max over stored statistics).
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_streak_engine.py --checkoffs 100000 --habits 3
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from functools import reduce
+from itertools import groupby
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import analytics  # noqa: E402
+from habit import Habit, StreakSummary  # noqa: E402
+
+
+def legacy_get_longest_streak(habits):
+    """Former implementation (strftime -> strptime -> sort -> diff -> groupby -> reduce), kept for comparison."""
+    timestamps = [[checkoff.timestamp.strftime("%Y-%m-%d") for checkoff in habit[1].checkoffs] for habit in habits]
+    if any(timestamps):
+        result = [[datetime.strptime(d, "%Y-%m-%d").toordinal() for d in dates] for dates in timestamps]
+        result = [[y - x for x, y in zip(sorted(dates), sorted(dates)[1:])] for dates in result]
+        result = [[(sum(1 for _ in group) + 1) for x, group in groupby(diffs) if x == 1] for diffs in result]
+        if any(result):
+            result = [reduce(lambda a, b: a if a > b else b, values, 0) for values in result]
+            return reduce(lambda a, b: a if a > b else b, result, 0)
+        return 1
+    return 0
+
+
+def build_habits(habit_count, checkoff_count):
+    """Build habits with daily checkoffs, interrupted by a gap every 100 days."""
+    habits = []
+    start = datetime(1900, 1, 1, 10)
+    for _ in range(habit_count):
+        habit = Habit("benchmark", "benchmark habit", "DAILY")
+        for day in range(checkoff_count):
+            if day % 100 != 99:
+                timestamp = start + timedelta(days=day)
+                habit.check_off(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"))
+        habits.append((habit.id, habit))
+    return habits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=3, help="Number of habits.")
+    parser.add_argument("--checkoffs", type=int, default=100000, help="Number of checkoff days per habit.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs (best is reported).")
+    args = parser.parse_args()
+
+    habits = build_habits(args.habits, args.checkoffs)
+    assert analytics.get_longest_streak(habits) == legacy_get_longest_streak(habits)
+
+    legacy = min(timeit.repeat(lambda: legacy_get_longest_streak(habits), number=1, repeat=args.repeat))
+    recalculate = min(timeit.repeat(lambda: [StreakSummary.from_ordinals(habit[1].checkoff_ordinals())
+                                             for habit in habits], number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: analytics.get_longest_streak(habits), number=1, repeat=args.repeat))
+    print(f"habits={args.habits} checkoffs/habit={args.checkoffs}")
+    print(f"legacy      get_longest_streak: {legacy * 1000:12.3f} ms")
+    print(f"recalculate streak statistics:  {recalculate * 1000:12.3f} ms ({legacy / recalculate:.1f}x)")
+    print(f"current     get_longest_streak: {current * 1000:12.3f} ms ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark parsing and formatting of check off timestamps with timestamp_codec against strptime/strftime.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/bench_timestamp_codec.py --timestamps 100000
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "habittracker"))
+
+import timestamp_codec  # noqa: E402
+from habit import to_microseconds, from_microseconds  # noqa: E402
+
+FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def strptime_parse(dates):
+    """Parse timestamps as formerly done by the check off code."""
+    return [to_microseconds(datetime.strptime(date, FORMAT)) for date in dates]
+
+
+def strftime_format(timestamps):
+    """Format timestamps as formerly done by Habit.to_custom_dict."""
+    return [from_microseconds(microseconds).strftime(FORMAT) for microseconds in timestamps]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timestamps", type=int, default=100000, help="Number of timestamps.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs (best is reported).")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # Daily check offs of about three years at random times
+    timestamps = sorted(to_microseconds(datetime(2020, 1, 1)) + rng.randrange(3 * 365 * 86400 * 1000000)
+                        for _ in range(args.timestamps))
+    dates = strftime_format(timestamps)
+    assert timestamp_codec.parse_many(dates).tolist() == strptime_parse(dates) == timestamps
+    assert timestamp_codec.format_many(timestamps) == dates
+
+    cases = [("parse", lambda: strptime_parse(dates), lambda: timestamp_codec.parse_many(dates)),
+             ("format", lambda: strftime_format(timestamps), lambda: timestamp_codec.format_many(timestamps))]
+    print(f"{args.timestamps} timestamps")
+    print(f"{'operation':>10} {'datetime (ms)':>14} {'codec (ms)':>11} {'speedup':>8}")
+    for name, baseline, codec in cases:
+        baseline_time = min(timeit.repeat(baseline, number=1, repeat=args.repeat))
+        codec_time = min(timeit.repeat(codec, number=1, repeat=args.repeat))
+        print(f"{name:>10} {baseline_time * 1000:14.1f} {codec_time * 1000:11.1f} {baseline_time / codec_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Benchmark suite of all hatraba commands and analytics functions on synthetic habit databases.
+
+For each combination of number of habits and number of check offs per habit, a habit database is
+populated with synthetic habits (see sample_data.generate, command generate-sample-data). Then each benchmark runs in a fresh process:
+
+- direct: calls of storage and analytics functions within the process (*analytics.** and *storage.**)
+- cli: invocations of habit_tracker.py commands (*cli.**), including interpreter start
+
+Reported per benchmark are latency percentiles, throughput (calls per second) and peak RSS of the
+process running the benchmark. Results can be saved as JSON and compared with the results of another
+commit to detect regressions.
+
+Usage (from the repository root)::
+
+    $ python benchmarks/suite.py --habits 10 1000 --checkoffs 10 100 --output results.json
+    $ python benchmarks/suite.py --habits 10 1000 100000 1000000 --checkoffs 10 1000 100000 \\
+          --max-total-checkoffs 100000000 --no-cli --output large.json
+    $ python benchmarks/suite.py --habits 10 1000 --checkoffs 10 100 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+HABITTRACKER_DIR = os.path.join(BENCHMARKS_DIR, os.pardir, "habittracker")
+sys.path.insert(0, HABITTRACKER_DIR)
+
+import analytics  # noqa: E402
+import app_config as conf  # noqa: E402
+import columnar  # noqa: E402
+import sample_data  # noqa: E402
+import storage  # noqa: E402
+import timestamp_codec  # noqa: E402
+from habit import Habit, MICROSECONDS_PER_DAY  # noqa: E402
+
+DIRECT_BENCHMARKS = ["storage.load_habits", "storage.create", "storage.check_off", "storage.delete",
+                     "analytics.list_habits", "analytics.list_habits_by_periodicity", "analytics.get_longest_streak",
+                     "analytics.get_longest_streak_for_habit", "analytics.get_longest_streaks",
+                     "analytics.get_longest_streaks_from_columns", "analytics.get_current_streaks_from_summaries"]
+CLI_BENCHMARKS = ["cli.create", "cli.checkoff", "cli.list-habits", "cli.list-habits-by-periodicity", "cli.delete",
+                  "cli.get-longest-streak", "cli.get-longest-streak-for-habit", "cli.get-current-streak"]
+
+
+def populate(habit_count, checkoff_count):
+    """Populate the configured habit database with synthetic habits."""
+    habits_db = storage.open_storage()
+    with habits_db.transaction():
+        for index, sample_habit in enumerate(sample_data.generate(habit_count, checkoff_count)):
+            habit = sample_habit.to_habit(f"{index:032x}", f"2000-01-01 00:00:00.{index % 1000000:06d}")
+            habits_db[habit.id] = habit
+    habits_db.close()
+
+
+def percentile(sorted_values, fraction):
+    """Return percentile (nearest rank) of given sorted values."""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))]
+
+
+def summarize(latencies):
+    """Return latency statistics (ms) and throughput (calls per second) of given latencies (s)."""
+    values = sorted(latencies)
+    mean = sum(values) / len(values)
+    return {"latency_ms": {"min": values[0] * 1000, "p50": percentile(values, 0.5) * 1000,
+                           "p90": percentile(values, 0.9) * 1000, "p99": percentile(values, 0.99) * 1000,
+                           "max": values[-1] * 1000, "mean": mean * 1000},
+            "throughput_per_s": 1 / mean if mean > 0 else None}
+
+
+def timed(function, repeat):
+    """Return latencies (s) of repeat calls of function(i)."""
+    latencies = []
+    for index in range(repeat):
+        start = time.perf_counter()
+        function(index)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def next_checkoff_dates(habits_db, habit_id, count):
+    """Return dates of count check offs of given habit after its last check off (weekly, fits all periodicities)."""
+    timestamps = habits_db[habit_id].checkoff_timestamps
+    last = timestamps[-1] if timestamps else sample_data.GENERATE_START
+    return [timestamp_codec.format(last + (index + 1) * 7 * MICROSECONDS_PER_DAY) for index in range(count)]
+
+
+def run_direct(name, repeat):
+    """Run direct benchmark of given name on the configured habit database, return latencies (s)."""
+    habits_db = storage.open_storage()
+    habit_ids = [habit_id for habit_id, _ in habits_db.summaries(repeat)]
+    try:
+        if name == "storage.load_habits":
+            return timed(lambda _: list(habits_db.items()), repeat)
+        if name == "storage.create":
+            def create(index):
+                habit = Habit(f"created {index}", "benchmark habit", "DAILY")
+                habits_db[habit.id] = habit
+            return timed(create, repeat)
+        if name == "storage.check_off":
+            dates = next_checkoff_dates(habits_db, habit_ids[0], repeat)
+            return timed(lambda index: habits_db.check_off(habit_ids[0], dates[index]), repeat)
+        if name == "storage.delete":
+            def delete(index):
+                del habits_db[habit_ids[index]]
+            return timed(delete, len(habit_ids))
+        if name == "analytics.get_longest_streaks_from_columns":
+            with columnar.open_store(habits_db) as store:
+                return timed(lambda _: analytics.get_longest_streaks_from_columns(*store.columns()), repeat)
+        if name == "analytics.get_current_streaks_from_summaries":
+            # Stored streak statistics of all daily habits, no habits are loaded. The period of the latest
+            # check off, as statistics cannot answer for earlier periods.
+            ordinal = max(summary.last_ordinal for _, summary in habits_db.summaries(periodicity="DAILY")
+                          if summary.last_ordinal is not None)
+            return timed(lambda _: analytics.get_current_streaks_from_summaries(
+                habits_db.summaries(periodicity="DAILY"), ordinal), repeat)
+        habits = list(habits_db.items())
+        if name == "analytics.list_habits":
+            return timed(lambda _: analytics.list_habits(habits), repeat)
+        if name == "analytics.list_habits_by_periodicity":
+            return timed(lambda _: analytics.list_habits_by_periodicity(habits, "WEEKLY"), repeat)
+        if name == "analytics.get_longest_streak":
+            return timed(lambda _: analytics.get_longest_streak(habits), repeat)
+        if name == "analytics.get_longest_streak_for_habit":
+            return timed(lambda _: analytics.get_longest_streak_for_habit(habits, habits[-1][0]), repeat)
+        if name == "analytics.get_longest_streaks":
+            return timed(lambda _: analytics.get_longest_streaks(habits), repeat)
+        raise ValueError(f"Unknown benchmark {name}")
+    finally:
+        habits_db.close()
+
+
+def run_cli(name, repeat):
+    """Run CLI benchmark of given name on the configured habit database, return latencies (s)."""
+    habits_db = storage.open_storage()
+    habit_ids = [habit_id for habit_id, _ in habits_db.summaries(repeat)]
+    dates = next_checkoff_dates(habits_db, habit_ids[0], repeat)
+    habits_db.close()
+    arguments = {
+        "cli.create": lambda index: ["create", "-n", f"created {index}", "-d", "benchmark habit", "-p", "DAILY"],
+        "cli.checkoff": lambda index: ["checkoff", "-h", habit_ids[0], "-t", dates[index]],
+        "cli.list-habits": lambda index: ["list-habits"],
+        "cli.list-habits-by-periodicity": lambda index: ["list-habits-by-periodicity", "-p", "WEEKLY"],
+        "cli.delete": lambda index: ["delete", "-h", habit_ids[index % len(habit_ids)]],
+        "cli.get-longest-streak": lambda index: ["get-longest-streak"],
+        "cli.get-longest-streak-for-habit": lambda index: ["get-longest-streak-for-habit", "-h", habit_ids[-1]],
+        "cli.get-current-streak": lambda index: ["get-current-streak"],
+    }[name]
+    if name == "cli.delete":
+        repeat = min(repeat, len(habit_ids))
+
+    def invoke(index):
+        subprocess.run([sys.executable, "habit_tracker.py", *arguments(index)], cwd=HABITTRACKER_DIR,
+                       stdout=subprocess.DEVNULL, check=True)
+
+    return timed(invoke, repeat)
+
+
+def run_in_process(args, data_dir):
+    """Run this script with given arguments in a new process, return (JSON output, peak RSS in MB)."""
+    environment = dict(os.environ, HATRABA_DATA_DIR=data_dir)
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), *args], stdout=subprocess.PIPE,
+                               env=environment)
+    output = process.stdout.read()
+    process.stdout.close()
+    # Resource usage of this child only (including its children, e.g. CLI invocations)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"Benchmark process {' '.join(args)} failed with exit code {process.returncode}")
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    peak_rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return json.loads(output or b"null"), peak_rss
+
+
+def git_commit():
+    """Return commit of the working tree (None if not available)."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """Print p50 latency ratios against baseline results, return whether a benchmark regressed."""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    baseline_results = {(result["benchmark"], result["habits"], result["checkoffs_per_habit"]): result
+                        for result in baseline["results"]}
+    print(f"\ncomparison with {baseline_path} (commit {baseline['meta'].get('commit')}), p50 latency:")
+    regressed = False
+    for result in results:
+        key = (result["benchmark"], result["habits"], result["checkoffs_per_habit"])
+        if key not in baseline_results:
+            continue
+        before = baseline_results[key]["latency_ms"]["p50"]
+        after = result["latency_ms"]["p50"]
+        ratio = after / before if before > 0 else float("inf")
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        regressed = regressed or bool(flag)
+        print(f"  {key[0]:45} {key[1]:>8} {key[2]:>7} {before:12.3f} -> {after:12.3f} ms {ratio:6.2f}x {flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, nargs="+", default=[10, 1000], help="Numbers of habits.")
+    parser.add_argument("--checkoffs", type=int, nargs="+", default=[10, 100], help="Numbers of check offs per habit.")
+    parser.add_argument("--max-total-checkoffs", type=int, default=10000000,
+                        help="Skip combinations with more check offs in total.")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of calls per direct benchmark.")
+    parser.add_argument("--cli-repeat", type=int, default=5, help="Number of invocations per CLI benchmark.")
+    parser.add_argument("--no-cli", action="store_true", help="Skip CLI benchmarks.")
+    parser.add_argument("--benchmark", nargs="+", default=None, help="Run only benchmarks of these names.")
+    parser.add_argument("--output", help="Save results as JSON to this file.")
+    parser.add_argument("--compare", help="Compare p50 latencies with results saved before (JSON).")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative p50 latency increase reported as regression. Default 0.1.")
+    # Internal: run one step in a separate process
+    parser.add_argument("--populate", nargs=2, type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    conf.db_name = "habitdb"
+    if args.populate:
+        populate(*args.populate)
+        return
+    if args.run:
+        if args.run.startswith("cli."):
+            latencies = run_cli(args.run, args.cli_repeat)
+        else:
+            latencies = run_direct(args.run, args.repeat)
+        json.dump(latencies, sys.stdout)
+        return
+
+    names = DIRECT_BENCHMARKS + ([] if args.no_cli else CLI_BENCHMARKS)
+    if args.benchmark:
+        names = [name for name in names if name in args.benchmark]
+    results = []
+    print(f"{'benchmark':45} {'habits':>8} {'co/habit':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} "
+          f"{'calls/s':>10} {'peak MB':>8}")
+    for habit_count in args.habits:
+        for checkoff_count in args.checkoffs:
+            if habit_count * checkoff_count > args.max_total_checkoffs:
+                print(f"skipped {habit_count} habits x {checkoff_count} check offs (--max-total-checkoffs)")
+                continue
+            with tempfile.TemporaryDirectory() as data_dir:
+                start = time.perf_counter()
+                run_in_process(["--populate", str(habit_count), str(checkoff_count)], data_dir)
+                populate_duration = time.perf_counter() - start
+                print(f"populated {habit_count} habits x {checkoff_count} check offs in {populate_duration:.1f} s")
+                for name in names:
+                    # Each benchmark on a fresh copy, as write benchmarks change the database
+                    with tempfile.TemporaryDirectory() as run_dir:
+                        for file_name in os.listdir(data_dir):
+                            shutil.copyfile(os.path.join(data_dir, file_name), os.path.join(run_dir, file_name))
+                        latencies, peak_rss = run_in_process(
+                            ["--run", name, "--repeat", str(args.repeat), "--cli-repeat", str(args.cli_repeat)],
+                            run_dir)
+                    result = {"benchmark": name, "kind": "cli" if name.startswith("cli.") else "direct",
+                              "habits": habit_count, "checkoffs_per_habit": checkoff_count,
+                              "calls": len(latencies), **summarize(latencies), "peak_rss_mb": peak_rss}
+                    results.append(result)
+                    latency = result["latency_ms"]
+                    print(f"{name:45} {habit_count:8} {checkoff_count:8} {latency['p50']:10.3f} "
+                          f"{latency['p90']:10.3f} {latency['p99']:10.3f} {result['throughput_per_s']:10.1f} "
+                          f"{peak_rss:8.1f}")
+
+    if args.output:
+        meta = {"commit": git_commit(), "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                "arguments": sys.argv[1:]}
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"meta": meta, "results": results}, output_file, indent=4)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
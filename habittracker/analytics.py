@@ -1,196 +1,335 @@
-from itertools import groupby
-from datetime import datetime
 from functools import reduce
 
+import timings
+from habit import StreakSummary, EPOCH_ORDINAL, MICROSECONDS_PER_DAY
 
-def __convert_dates_to_proleptic_gregorian_ordinal(dates):
-    """Convert given dates to proleptic gregorian ordinal values.
+
+def __get_max_value(value_list):
+    """Determine the largest of the input values.
 
     Parameters
     ----------
-    dates : list of datetime
-        List of datetime objects.
+    value_list : iterable of int
+        Iterable of integer values.
 
     Returns
     -------
-    list(int)
-        List of integers representing dates as proleptic gregorian ordinal values
+    int
+        Max value.
     """
-    return [datetime.strptime(d, "%Y-%m-%d").toordinal() for d in dates]
-
-
-def __check_for_consecutive_dates(ordinal_dates):
-    """Check if given ordinal dates are consecutive.
-
-    Create tuples (x, y): (x: ith ordinal date, y:ith ordinal date + 1) through all given ordinal
-    dates and subtract y from x.
+    return reduce(lambda a, b: a if a > b else b, value_list, 0)
 
-    * Consecutive dates are indicated by a result equal to 1 (*e.g. 737761 - 737760 = 1*)
 
-    * Non-consecutive dates are indicated by a result greater than 1 (*e.g. 737765 - 737760 = 5*)
+@timings.timed("analytics.list_habits")
+def list_habits(habits):
+    """Return all habits (1:1, no filtering).
 
     Parameters
     ----------
-    ordinal_dates : list of int
-        List of integer values.
+    habits : list of Habit
+        List of habits.
 
-   Returns
+    Returns
     -------
-    list of integers
-        List of integer values indicating consecutive dates (1) or non-consecutive dates (>1).
+    list
+        List of habits (1:1).
     """
-    # Sort dates (ascending)
-    sorted_ordinal_dates = sorted(ordinal_dates)
-    return [y - x for x, y in zip(sorted_ordinal_dates, sorted_ordinal_dates[1:])]
-
-
-def __sum_consecutive_dates(consecutive_dates_list):
-    """Sum up all consecutive dates (indicated by 1) "in a row".
-
-    Example
-    Given is list *[1, 1, 1, 1, 2, 1, 3, 1, 1, 1]*.
-
-    First bunch of dates "in a row" are items 1-4:
-    sum is 4, but as five dates are initially involved to create this sequence of ones we add 1 --> 5.
-
-    Second bunch of dates "in a row" is item 6:
-    sum is 1, but as two dates are initially involved to create this sequence of ones we add 1 --> 2.
+    return list(filter(lambda habit: True, habits))
 
-    Third bunch of dates "in a row" are items 8-10:
-    sum is 3, but as four dates are initially involved to create this sequence of ones we add 1 --> 4.
 
-    Returned is *[5, 2, 4]*
+@timings.timed("analytics.list_habits_by_periodicity")
+def list_habits_by_periodicity(habits, periodicity):
+    """Return filtered habit list according to given periodicity.
 
     Parameters
     ----------
-    consecutive_dates_list : list of int
-        List of integer values, where consecutive dates must indicated by 1.
+    habits : list of Habit
+        List of habits.
+    periodicity : Periodicity
+        Periodicity of the habit.
 
     Returns
     -------
-    list of integers
-        List of integer values
+    list
+        List containing habits according to given periodicity or
+        empty list in case of no matches.
     """
-    return [(sum(1 for x in group) + 1) for x, group in groupby(consecutive_dates_list) if x == 1]
+    return list(filter(lambda habit: habit[1].periodicity.name == periodicity, habits))
 
 
-def __get_max_value(value_list):
-    """Determine the largest of the input values.
+@timings.timed("analytics.get_longest_streak")
+def get_longest_streak(habits):
+    """Determine the longest run streak from list of habits.
+
+    The longest streak of each habit is maintained in its streak statistics (summary), so no checkoffs
+    have to be analyzed.
 
     Parameters
     ----------
-    value_list : list of int
-        List of integer values.
+    habits : list of (habit_id, Habit)
+        List of habits.
 
     Returns
     -------
     int
-        Max value.
+        Longest streak value.
     """
-    return reduce(lambda a, b: a if a > b else b, value_list, 0)
+    return get_longest_streak_from_summaries((habit[0], habit[1].summary) for habit in habits)
 
 
-def __calculate_longest_streak(timestamps):
-    """Calculate the longest streak of given timestamps.
+@timings.timed("analytics.get_longest_streak_from_summaries")
+def get_longest_streak_from_summaries(summaries):
+    """Determine the longest run streak from streak statistics of habits.
 
     Parameters
     ----------
-    timestamps : list of datetime
-        List of datetime objects.
+    summaries : iterable of (habit_id, StreakSummary)
+        Streak statistics of habits.
 
     Returns
     -------
     int
         Longest streak value.
     """
-    if any(timestamps):
-        # Step 1 - Convert given dates to proleptic gregorian ordinal values
-        result = list(map(__convert_dates_to_proleptic_gregorian_ordinal, timestamps))
-        # Step 2 - Check if given ordinal dates are consecutive
-        result = list(map(__check_for_consecutive_dates, result))
-        # Step 3 - Sum up all consecutive dates (indicated by 1) "in a row"
-        result = list(map(__sum_consecutive_dates, result))
-        if any(result):
-            # Step 5 - return max value for each list
-            result = list(map(__get_max_value, result))
-            # Step 6 - return max value
-            return __get_max_value(result)
-        return 1  # no consecutive timestamps, so longest streak is 1
-    return 0  # no checkoff timestamps have been found, so longest streak is 0
+    return __get_max_value(summary[1].longest_streak for summary in summaries)
 
 
-def list_habits(habits):
-    """Return all habits (1:1, no filtering).
+@timings.timed("analytics.get_current_streaks_from_summaries")
+def get_current_streaks_from_summaries(summaries, ordinal):
+    """Determine the current streak of each habit from streak statistics of habits.
+
+    The streak statistics hold the period of the latest check off and the streak ending there, so each
+    habit is answered in O(1) (see StreakSummary.current_streak_at), no checkoffs have to be analyzed.
 
     Parameters
     ----------
-    habits : list of Habit
-        List of habits.
+    summaries : iterable of (habit_id, StreakSummary)
+        Streak statistics of habits of the same periodicity.
+    ordinal : int
+        Current period of the habits as ordinal value (see Habit.Periodicity.ordinal).
 
     Returns
     -------
-    list
-        List of habits (1:1).
+    dict
+        Current streak value by habit id, 0 if the streak is broken.
+
+    Raises
+    ------
+    ValueError
+        If a habit has been checked off after the given period (see get_summaries_as_of).
     """
-    return list(filter(lambda habit: True, habits))
+    return {habit_id: summary.current_streak_at(ordinal) for habit_id, summary in summaries}
 
 
-def list_habits_by_periodicity(habits, periodicity):
-    """Return filtered habit list according to given periodicity.
+def get_summaries_as_of(summaries, habits, ordinal, microseconds):
+    """Return streak statistics of habits as of given point in time.
+
+    Streak statistics end at the latest check off of a habit, so they answer for its period and later
+    ones only. Habits checked off after the given period are loaded and their statistics are calculated
+    from their check offs up to the given point in time instead. Streaks are counted per period, so check
+    offs later within the given period count.
 
     Parameters
     ----------
-    habits : list of Habit
-        List of habits.
-    periodicity : Periodicity
-        Periodicity of the habit.
+    summaries : iterable of (habit_id, StreakSummary)
+        Streak statistics of habits of the same periodicity.
+    habits : mapping of habit_id to Habit
+        Habits by id (e.g. opened storage), only the habits checked off after the given period are loaded.
+    ordinal : int
+        Period of the point in time as ordinal value (see Habit.Periodicity.ordinal).
+    microseconds : int
+        Point in time as microseconds since epoch.
 
     Returns
     -------
-    list
-        List containing habits according to given periodicity or
-        empty list in case of no matches.
+    list of (habit_id, StreakSummary)
+        Streak statistics of the habits as of the given point in time.
     """
-    return list(filter(lambda habit: habit[1].periodicity.name == periodicity, habits))
+    return [(habit_id, summary if summary.last_ordinal is None or summary.last_ordinal <= ordinal
+             else habits[habit_id].between(None, microseconds + 1).summary)
+            for habit_id, summary in summaries]
 
 
-def get_longest_streak(habits):
-    """Determine the longest run streak from list of habits.
+@timings.timed("analytics.get_longest_streak_for_habit")
+def get_longest_streak_for_habit(habits, habit_id):
+    """Determine the longest run streak of a specific habit from list of habits.
 
     Parameters
     ----------
-    habits : list of (habit_id, Habit)
+    habits : list of (habit_id, habit)
         List of habits.
+    habit_id : str
+        Id of habit.
 
     Returns
     -------
     int
         Longest streak value.
     """
-    # Determine all checkoff timestamps from given habits
-    checkoff_timestamps = [[(checkoff.timestamp.strftime("%Y-%m-%d")) for checkoff in habit[1].checkoffs]
-                           for habit in habits]
+    # Determine longest streak for given habit id from given habits
+    return __get_max_value(habit[1].summary.longest_streak for habit in habits if str(habit[1].id) == str(habit_id))
 
-    return __calculate_longest_streak(checkoff_timestamps)
 
+@timings.timed("analytics.get_longest_streaks")
+def get_longest_streaks(habits, engine=None):
+    """Determine the longest run streak of each habit and of all habits from their checkoffs.
 
-def get_longest_streak_for_habit(habits, habit_id):
-    """Determine the longest run streak of a specific habit from list of habits.
+    Unlike get_longest_streak, the streaks are calculated from the checkoffs instead of the streak
+    statistics (summary) of the habits. The NumPy engine analyzes the checkoffs of all habits in one
+    vectorized pass, the Python engine one habit after another.
 
     Parameters
     ----------
-    habits : list of (habit_id, habit)
-        List of habits.
-    habit_id : str
-        Id of habit.
+    habits : iterable of (habit_id, Habit)
+        Habits.
+    engine : str, optional
+        "numpy" or "python". Default is "numpy" if NumPy is installed, "python" otherwise.
 
     Returns
     -------
-    int
-        Longest streak value.
+    tuple of (dict, int)
+        Longest streak value by habit id and longest streak value of all habits.
+
+    Raises
+    ------
+    ValueError
+        If engine is unknown.
+    ImportError
+        If engine "numpy" is requested, but NumPy is not installed.
     """
-    # Determine checkoff timestamps for given habit id from given habits
-    checkoff_timestamps = [[(checkoff.timestamp.strftime("%Y-%m-%d")) for checkoff in habit[1].checkoffs]
-                           for habit in habits if str(habit[1].id) == str(habit_id)]
+    if engine is None:
+        engine = "numpy" if __numpy_available() else "python"
+    if engine == "numpy":
+        return __get_longest_streaks_numpy(habits)
+    if engine == "python":
+        longest_streaks = {habit_id: StreakSummary.from_ordinals(habit.checkoff_ordinals()).longest_streak
+                           for habit_id, habit in habits}
+        return longest_streaks, __get_max_value(longest_streaks.values())
+    raise ValueError(f"Unknown streak engine {engine}")
+
+
+@timings.timed("analytics.get_longest_streaks_from_columns")
+def get_longest_streaks_from_columns(habit_ids, period_days, timestamps, habit_indexes, engine=None):
+    """Determine the longest run streak of each habit and of all habits from check off columns.
+
+    Entry point for columnar check offs (see module columnar), e.g. the memory mapped columns of a
+    columnar store. The NumPy engine reads the buffers zero-copy, the Python engine iterates them,
+    neither creates habit objects.
+
+    Parameters
+    ----------
+    habit_ids : list of str
+        Ids of the habits.
+    period_days : buffer of int64
+        Period length in days (1 or 7) of each habit.
+    timestamps : buffer of int64
+        Check off timestamps as microseconds since epoch, ordered by habit and timestamp.
+    habit_indexes : buffer of int32
+        Habit index (into habit_ids) of each check off.
+    engine : str, optional
+        "numpy" or "python". Default is "numpy" if NumPy is installed, "python" otherwise.
 
-    return __calculate_longest_streak(checkoff_timestamps)
+    Returns
+    -------
+    tuple of (dict, int)
+        Longest streak value by habit id and longest streak value of all habits.
+
+    Raises
+    ------
+    ValueError
+        If engine is unknown.
+    ImportError
+        If engine "numpy" is requested, but NumPy is not installed.
+    """
+    if engine is None:
+        engine = "numpy" if __numpy_available() else "python"
+    if engine == "numpy":
+        import numpy as np
+
+        longest_streaks = __get_longest_streaks_of_columns_numpy(
+            np.frombuffer(period_days, dtype=np.int64), np.frombuffer(timestamps, dtype=np.int64),
+            np.frombuffer(habit_indexes, dtype=np.int32)).tolist()
+    elif engine == "python":
+        longest_streaks = __get_longest_streaks_of_columns_python(len(habit_ids), period_days, timestamps,
+                                                                  habit_indexes)
+    else:
+        raise ValueError(f"Unknown streak engine {engine}")
+    return dict(zip(habit_ids, longest_streaks)), __get_max_value(longest_streaks)
+
+
+def __numpy_available():
+    """Return whether NumPy is installed (imported on demand, as importing takes long)."""
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
+
+
+def __get_longest_streaks_numpy(habits):
+    """Vectorized implementation of get_longest_streaks."""
+    import numpy as np
+
+    habit_ids = []
+    timestamp_arrays = []
+    period_days = []
+    for habit_id, habit in habits:
+        habit_ids.append(habit_id)
+        # Zero-copy views of the checkoff timestamp arrays
+        timestamp_arrays.append(np.frombuffer(habit.checkoff_timestamps, dtype=np.int64))
+        period_days.append(habit.periodicity.days)
+    if not habit_ids:
+        return {}, 0
+    counts = np.fromiter((len(timestamps) for timestamps in timestamp_arrays), dtype=np.int64, count=len(habit_ids))
+    # Checkoffs of all habits in columns, habit i occupies the checkoffs of habit index i
+    habit_indexes = np.repeat(np.arange(len(habit_ids), dtype=np.int32), counts)
+    longest_streaks = __get_longest_streaks_of_columns_numpy(np.array(period_days, dtype=np.int64),
+                                                             np.concatenate(timestamp_arrays), habit_indexes)
+    return dict(zip(habit_ids, longest_streaks.tolist())), int(longest_streaks.max())
+
+
+def __get_longest_streaks_of_columns_numpy(period_days, timestamps, habit_indexes):
+    """Vectorized longest streak of each habit from check off columns (NumPy arrays), see get_longest_streaks_from_columns."""
+    import numpy as np
+
+    longest_streaks = np.zeros(len(period_days), dtype=np.int64)
+    if len(timestamps) == 0:
+        return longest_streaks
+    # Checkoff periods (see Habit.period_ordinal) of all habits in one array
+    days = timestamps // MICROSECONDS_PER_DAY + (EPOCH_ORDINAL - 1)
+    periods = days // period_days[habit_indexes]
+    first = np.empty(len(periods), dtype=bool)
+    first[0] = True
+    np.not_equal(habit_indexes[1:], habit_indexes[:-1], out=first[1:])
+    gaps = np.diff(periods, prepend=periods[0])
+    # A streak starts at the first checkoff of a habit and after a gap of more than one period,
+    # several checkoffs in the same period count once
+    run_starts = first | (gaps > 1)
+    distinct_periods = first | (gaps != 0)
+    run_ids = np.cumsum(run_starts) - 1
+    run_lengths = np.bincount(run_ids, weights=distinct_periods).astype(np.int64)
+    # Longest streak per habit is the maximum of its runs, which are consecutive
+    longest_streaks[habit_indexes[first]] = np.maximum.reduceat(run_lengths, run_ids[first])
+    return longest_streaks
+
+
+def __get_longest_streaks_of_columns_python(habit_count, period_days, timestamps, habit_indexes):
+    """Longest streak of each habit from check off columns, one check off after another."""
+    longest_streaks = [0] * habit_count
+    current_index = -1
+    last_period = current_streak = 0
+    for microseconds, index in zip(timestamps, habit_indexes):
+        period = (microseconds // MICROSECONDS_PER_DAY + EPOCH_ORDINAL - 1) // period_days[index]
+        if index != current_index:
+            current_index = index
+            current_streak = 1
+        elif period == last_period:
+            continue
+        elif period == last_period + 1:
+            current_streak += 1
+        else:
+            current_streak = 1
+        last_period = period
+        if current_streak > longest_streaks[index]:
+            longest_streaks[index] = current_streak
+    return longest_streaks
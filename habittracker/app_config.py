@@ -1,5 +1,17 @@
 import os
 
 db_name = False
-data_dir = os.path.join(os.path.realpath(os.path.pardir), "habittracker", "data")
+db_backend = "sqlite"
+# Seconds to wait for the write lock of the database while other processes write
+db_timeout = 30.0
+# Maximum number of deserialized habits cached by a habit repository (see repository.HabitRepository)
+habit_cache_size = 1024
+data_dir = os.environ.get("HATRABA_DATA_DIR",
+                          os.path.join(os.path.realpath(os.path.pardir), "habittracker", "data"))
 plugin_folder = os.path.join(os.path.dirname(__file__), "commands")
+# Server mode (see command serve): socket path and whether opened storages are kept open across commands
+socket_path = os.environ.get("HATRABA_SOCKET", os.path.join(data_dir, "habittracker.sock"))
+keep_storage_open = False
+# Asyncio API (see async_api.AsyncHabitTracker): executor threads and maximum number of running requests
+async_workers = 4
+async_max_concurrency = 64
@@ -0,0 +1,368 @@
+"""Asyncio API of the habit tracker for embedding in asyncio applications (e.g. web services).
+
+The API mirrors the commands (create, checkoff, delete, list-habits, get-longest-streak,
+get-longest-streak-for-habit, get-current-streak) and returns the same JSON compatible values. Storage
+I/O never blocks the event loop: each request runs on a thread of an executor with a storage taken from
+a pool of open storages, so databases are opened once per pool slot instead of once per request.
+
+Requests are limited by a semaphore (*max_concurrency*), further requests wait without blocking the
+event loop. Identical reads running at the same time are coalesced: they share one execution and its
+result. Reads issued after a write has completed never join a read started before it, so they see the
+write.
+
+Example::
+
+    async with AsyncHabitTracker("data/habitdb") as tracker:
+        habit = await tracker.create("Workout", "...because it boosts your energy", "DAILY")
+        await tracker.checkoff(habit["id"], "2020-12-01 08:00:00.000000")
+        habits, streak = await asyncio.gather(tracker.list_habits(limit=10), tracker.get_longest_streak())
+"""
+import asyncio
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import app_config as conf
+import analytics
+import storage
+import timestamp_codec
+from habit import Habit
+
+
+class AsyncHabitTracker:
+    """A class to represent the habits of a habit database with an asyncio API.
+
+    Results of coalesced reads are shared by all callers of the coalesced requests and must not be
+    modified.
+
+    Attributes
+    ----------
+    path : str
+        Path of the habit database (without file extension).
+    backend : str
+        Storage backend (see storage.BACKENDS).
+    workers : int
+        Number of executor threads and maximum number of open storages.
+    max_concurrency : int
+        Maximum number of requests running at the same time, further requests wait.
+    coalesce : bool
+        Whether identical concurrent reads are coalesced.
+    coalesced : int
+        Number of reads served by joining an identical running read.
+
+    Methods
+    -------
+    create(name, description, periodicity):
+        Create habit with given details.
+
+    checkoff(habit_id, timestamp):
+        Check off given habit.
+
+    delete(habit_id):
+        Delete given habit.
+
+    list_habits(periodicity, limit, offset, date_from, date_to):
+        Return habits ordered by creation date, filtered and paged.
+
+    get_longest_streak(date_from, date_to):
+        Return the longest streak of all habits.
+
+    get_longest_streak_for_habit(habit_id, date_from, date_to):
+        Return the longest streak of given habit.
+
+    get_current_streaks(habit_id, periodicity, timestamp):
+        Return the current streak of habits.
+
+    close():
+        Wait for running requests and close all storages.
+    """
+
+    def __init__(self, path=None, backend=None, workers=None, max_concurrency=None, coalesce=True):
+        """Create API of the habit database at given path, storages are opened on first use.
+
+        Parameters
+        ----------
+        path : str, optional
+            Path of habit database without file extension. Default is the configured habit database,
+            *data/habitdb* if none is configured.
+        backend : str, optional
+            Storage backend. Default is *app_config.db_backend*.
+        workers : int, optional
+            Number of executor threads. Default is *app_config.async_workers*.
+        max_concurrency : int, optional
+            Maximum number of requests running at the same time. Default is *app_config.async_max_concurrency*.
+        coalesce : bool, optional
+            Whether identical concurrent reads are coalesced. Default is True.
+
+        Raises
+        ------
+        ValueError
+            If the backend is unknown or workers or max_concurrency are not positive.
+        """
+        self.path = os.path.join(conf.data_dir, conf.db_name or "habitdb") if path is None else path
+        self.backend = conf.db_backend if backend is None else backend
+        self.workers = conf.async_workers if workers is None else workers
+        self.max_concurrency = conf.async_max_concurrency if max_concurrency is None else max_concurrency
+        if self.backend not in storage.BACKENDS:
+            raise ValueError(f"Unknown storage backend {self.backend}")
+        if self.workers < 1 or self.max_concurrency < 1:
+            raise ValueError(f"Workers (given {self.workers}) and max concurrency (given {self.max_concurrency}) "
+                             "must be positive")
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hatraba")
+        # Open storages not in use, each used by one executor thread at a time
+        self._storages = queue.SimpleQueue()
+        self._opened = []
+        # Created on first use within the event loop
+        self._semaphore = None
+        # Running reads by request, the generation is increased by each completed write
+        self._reads = {}
+        self._generation = 0
+        self._closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def create(self, name, description, periodicity):
+        """Create habit with given details, see command create.
+
+        Returns
+        -------
+        dict
+            Created habit (see Habit.to_custom_dict).
+        """
+        def create(habits_db):
+            habit = Habit(name, description, periodicity)
+            habits_db[habit.id] = habit
+            return habit.to_custom_dict()
+        return await self._write(create)
+
+    async def checkoff(self, habit_id, timestamp):
+        """Check off given habit at given timestamp (format "%Y-%m-%d %H:%M:%S.%f"), see command checkoff.
+
+        Returns
+        -------
+        dict
+            Checked off habit (see Habit.to_custom_dict).
+
+        Raises
+        ------
+        KeyError
+            If the habit does not exist.
+        ValueError
+            If the habit has already been checked off at given timestamp or it does not match format.
+        """
+        return await self._write(lambda habits_db: habits_db.check_off(habit_id, timestamp).to_custom_dict())
+
+    async def delete(self, habit_id):
+        """Delete given habit, see command delete.
+
+        Returns
+        -------
+        dict
+            Id of deleted habit.
+
+        Raises
+        ------
+        KeyError
+            If the habit does not exist.
+        """
+        def delete(habits_db):
+            del habits_db[habit_id]
+            return {"id": habit_id}
+        return await self._write(delete)
+
+    async def list_habits(self, periodicity=None, limit=0, offset=0, date_from=None, date_to=None):
+        """Return habits ordered by creation date, most recent first, see commands list-habits and
+        list-habits-by-periodicity.
+
+        Parameters
+        ----------
+        periodicity : str, optional
+            Name of periodicity to filter by. Default is no filter.
+        limit : int, optional
+            Maximum number of habits to return. Default (0) is no limit.
+        offset : int, optional
+            Number of habits to skip. Default is 0.
+        date_from : str, optional
+            First day (YYYY-MM-DD) or timestamp of check offs, see timestamp_codec.parse_range. Default is
+            all habits.
+        date_to : str, optional
+            Last day (YYYY-MM-DD, inclusive) or timestamp of check offs. Default is all habits.
+
+        Returns
+        -------
+        list of dict
+            Requested habits (see Habit.to_custom_dict), with the check offs of the time range only if
+            a range is given.
+        """
+        if limit < 0:
+            raise ValueError(f"A negative limit (given {limit}) is not permitted")
+        if offset < 0:
+            raise ValueError(f"A negative offset (given {offset}) is not permitted")
+        start, end = timestamp_codec.parse_range(date_from, date_to)
+
+        def list_habits(habits_db):
+            if date_from is None and date_to is None:
+                habits = habits_db.list_habits(periodicity, limit, offset)
+            else:
+                habits = habits_db.list_habits_between(start, end, periodicity, limit, offset)
+            return [habit.to_custom_dict() for habit in habits]
+        return await self._read(list_habits, "list_habits", periodicity, limit, offset, start, end)
+
+    async def get_longest_streak(self, date_from=None, date_to=None):
+        """Return the longest streak of all habits, see command get-longest-streak.
+
+        The streak statistics of the habits are used, the check offs of the time range if one is given.
+
+        Returns
+        -------
+        int
+            Longest streak value.
+        """
+        start, end = timestamp_codec.parse_range(date_from, date_to)
+
+        def get_longest_streak(habits_db):
+            if date_from is None and date_to is None:
+                return analytics.get_longest_streak_from_summaries(habits_db.summaries())
+            return analytics.get_longest_streaks_from_columns(*habits_db.checkoffs_between(start, end))[1]
+        return await self._read(get_longest_streak, "get_longest_streak", start, end)
+
+    async def get_longest_streak_for_habit(self, habit_id, date_from=None, date_to=None):
+        """Return the longest streak of given habit, see command get-longest-streak-for-habit.
+
+        Returns
+        -------
+        dict
+            Id, name and longest streak value of the habit.
+
+        Raises
+        ------
+        KeyError
+            If the habit does not exist.
+        """
+        start, end = timestamp_codec.parse_range(date_from, date_to)
+
+        def get_longest_streak_for_habit(habits_db):
+            habit = habits_db[habit_id]
+            if date_from is not None or date_to is not None:
+                habit = habit.between(start, end)
+            return {"id": habit_id, "name": habit.name, "longest_streak": habit.summary.longest_streak}
+        return await self._read(get_longest_streak_for_habit, "get_longest_streak_for_habit", habit_id, start, end)
+
+    async def get_current_streaks(self, habit_id=None, periodicity=None, timestamp=None):
+        """Return the current streak of habits from their streak statistics, see command get-current-streak.
+
+        Parameters
+        ----------
+        habit_id : str, optional
+            Id of habit. Default is all habits.
+        periodicity : str, optional
+            Name of periodicity to filter by. Default is no filter.
+        timestamp : str, optional
+            Point in time of the current streaks, day (YYYY-MM-DD, until the end of that day) or timestamp, see
+            timestamp_codec.parse_range. Default is now (UTC).
+
+        Returns
+        -------
+        list of dict
+            Id, periodicity, current streak value and whether the streak is broken of each habit.
+        """
+        if timestamp is None:
+            now = timestamp_codec.to_microseconds(datetime.now(timezone.utc).replace(tzinfo=None))
+        else:
+            # Parsed like the end of a time range, a day counts up to its last microsecond
+            now = timestamp_codec.parse_range(None, timestamp)[1] - 1
+
+        def get_current_streaks(habits_db):
+            if habit_id is not None:
+                habit = habits_db[habit_id]
+                groups = [(habit.periodicity, [(habit.id, habit.summary)])]
+                habits = {habit.id: habit}
+            else:
+                periodicities = list(Habit.Periodicity) if periodicity is None else [Habit.Periodicity[periodicity]]
+                groups = [(habit_periodicity, habits_db.summaries(periodicity=habit_periodicity.name))
+                          for habit_periodicity in periodicities]
+                habits = habits_db
+            current_streaks = []
+            for habit_periodicity, summaries in groups:
+                ordinal = habit_periodicity.ordinal(now)
+                summaries = analytics.get_summaries_as_of(summaries, habits, ordinal, now)
+                current_streaks += [{"id": current_habit_id, "periodicity": habit_periodicity.name,
+                                     "current_streak": current_streak, "broken": current_streak == 0}
+                                    for current_habit_id, current_streak in analytics.get_current_streaks_from_summaries(
+                                        summaries, ordinal).items()]
+            return current_streaks
+        # Requests of the current time differ by their timestamp, so they are coalesced per microsecond only
+        return await self._read(get_current_streaks, "get_current_streaks", habit_id, periodicity, now)
+
+    async def close(self):
+        """Wait for running requests and close all storages (without blocking the event loop)."""
+        if self._closed:
+            return
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    async def _read(self, function, *request):
+        """Run given read on a storage, joining an identical running read if coalescing is enabled."""
+        if not self.coalesce:
+            return await self._run(function)
+        key = (*request, self._generation)
+        task = self._reads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(function))
+            self._reads[key] = task
+            task.add_done_callback(lambda done_task: self._read_done(key, done_task))
+        else:
+            self.coalesced += 1
+        # Shielded, so a cancelled caller does not cancel the read of the other callers
+        return await asyncio.shield(task)
+
+    def _read_done(self, key, task):
+        """Remove completed read from the running reads."""
+        if self._reads.get(key) is task:
+            del self._reads[key]
+        if not task.cancelled():
+            # Retrieved, in case all callers have been cancelled
+            task.exception()
+
+    async def _write(self, function):
+        """Run given write on a storage, later reads do not join reads started before it completed."""
+        try:
+            return await self._run(function)
+        finally:
+            self._generation += 1
+
+    async def _run(self, function):
+        """Run given function with a storage of the pool on an executor thread, limited by the semaphore."""
+        if self._closed:
+            raise RuntimeError("Habit tracker has been closed")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, function)
+
+    def _call(self, function):
+        """Call given function with a storage of the pool (opened if none is available), on an executor thread."""
+        try:
+            habits_db = self._storages.get_nowait()
+        except queue.Empty:
+            # At most one storage per executor thread
+            habits_db = storage.BACKENDS[self.backend](self.path)
+            self._opened.append(habits_db)
+        try:
+            return function(habits_db)
+        finally:
+            self._storages.put(habits_db)
+
+    def _shutdown(self):
+        """Wait for the executor threads and close all storages."""
+        self._executor.shutdown(wait=True)
+        for habits_db in self._opened:
+            habits_db.close()
+        self._opened.clear()
@@ -0,0 +1,95 @@
+"""Thin client forwarding commands to a running server (see command serve).
+
+Usage is the same as of habit_tracker.py, but the command is run by the server::
+
+    (env) $ python client.py [OPTIONS] COMMAND [ARGS]
+
+The socket of the server is taken from the environment variable HATRABA_SOCKET, default is
+*data/habittracker.sock*. Only the standard library is imported to keep the startup cheap.
+"""
+import json
+import socket
+import sys
+
+import app_config as conf
+
+
+class Client:
+    """A class to represent a connection to the server.
+
+    Methods
+    -------
+    run(args):
+        Run command with given command line arguments on the server.
+
+    close():
+        Close the connection.
+    """
+
+    def __init__(self, socket_path=None):
+        """Connect to the server.
+
+        Parameters
+        ----------
+        socket_path : str, optional
+            Path of the Unix socket of the server. Default is *app_config.socket_path*.
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path or conf.socket_path)
+        self._reader = self._socket.makefile("rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def run(self, args):
+        """Run command with given command line arguments on the server.
+
+        Parameters
+        ----------
+        args : list of str
+            Command line arguments, e.g. ["--test", "list-habits"].
+
+        Returns
+        -------
+        dict
+            Output of the command (keys *stdout*, *stderr*) and its *exit_code*.
+
+        Raises
+        ------
+        ConnectionError
+            If the server closed the connection.
+        """
+        self._socket.sendall(json.dumps({"args": args}).encode("utf-8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        """Close the connection."""
+        self._reader.close()
+        self._socket.close()
+
+
+def main(args):
+    try:
+        with Client() as client:
+            response = client.run(args)
+    except OSError as e:
+        # Inform user: Return error if server is not reachable and exit application
+        print("################# ERROR #################", file=sys.stderr)
+        print("! Server not reachable !", file=sys.stderr)
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        print("====> Start server: python habit_tracker.py serve", file=sys.stderr)
+        print("########################################", file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit_code"])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
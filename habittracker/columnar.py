@@ -0,0 +1,263 @@
+"""Columnar check off store (file .columns), memory mapped for analytics scans and time range queries.
+
+The store holds the check offs of all habits in two columns: timestamps (int64, microseconds since
+epoch) and habit indexes (int32), ordered by habit and timestamp, plus the period length in days
+(int64) and the id of each habit. Analytics scan the mapped columns directly (see
+analytics.get_longest_streaks_from_columns), no habit objects are created.
+
+The same columns ordered by timestamp are the time index of the check offs (which habits have been
+checked off when): check offs of a time range are found by binary search, see
+ColumnarStore.checkoffs_between.
+
+The store is derived from the habit database and rebuilt by open_store once the database has been
+modified after the store was written. It is a local cache in native byte order.
+
+File layout::
+
+    header               magic, habit count, check off count, size of habit ids (HEADER)
+    period_days          int64[habit count]
+    timestamps           int64[check off count]
+    habit_indexes        int32[check off count]
+    time_timestamps      int64[check off count], ordered by timestamp (time index)
+    time_habit_indexes   int32[check off count]
+    habit_ids            utf-8, separated by newlines
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+
+import storage
+import timings
+
+FILE_EXTENSION = ".columns"
+MAGIC = b"HTCOLS02"
+HEADER = struct.Struct("<8sQQQ")
+
+
+class ColumnarStore:
+    """A class to represent an opened (memory mapped) columnar check off store.
+
+    Attributes
+    ----------
+    habit_ids : list of str
+        Ids of the habits, habit index i refers to habit_ids[i].
+    period_days : memoryview of int
+        Period length in days (1 or 7) of each habit.
+    timestamps : memoryview of int
+        Check off timestamps as microseconds since epoch, ordered by habit and timestamp.
+    habit_indexes : memoryview of int
+        Habit index of each check off.
+    time_timestamps : memoryview of int
+        Check off timestamps ordered by timestamp (time index).
+    time_habit_indexes : memoryview of int
+        Habit index of each check off of the time index.
+
+    Methods
+    -------
+    columns():
+        Return the columns as accepted by analytics.get_longest_streaks_from_columns.
+
+    checkoffs_between(start, end):
+        Return the columns of the check offs within the given time range.
+
+    close():
+        Release the columns and unmap the file.
+    """
+
+    def __init__(self, path):
+        """Map columnar store at given path.
+
+        Parameters
+        ----------
+        path : str
+            Path of store (including file extension).
+
+        Raises
+        ------
+        ValueError
+            If the file is not a columnar check off store.
+        """
+        with open(path, "rb") as store_file:
+            self._mmap = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, habit_count, checkoff_count, ids_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or len(self._mmap) != HEADER.size + habit_count * 8 + checkoff_count * 24 + ids_size:
+            self._mmap.close()
+            raise ValueError(f"File {path} is not a valid columnar check off store")
+        buffer = memoryview(self._mmap)
+        position = HEADER.size
+        # Zero-copy views of the mapped file
+        self.period_days = buffer[position:position + habit_count * 8].cast("q")
+        position += habit_count * 8
+        self.timestamps = buffer[position:position + checkoff_count * 8].cast("q")
+        position += checkoff_count * 8
+        self.habit_indexes = buffer[position:position + checkoff_count * 4].cast("i")
+        position += checkoff_count * 4
+        self.time_timestamps = buffer[position:position + checkoff_count * 8].cast("q")
+        position += checkoff_count * 8
+        self.time_habit_indexes = buffer[position:position + checkoff_count * 4].cast("i")
+        position += checkoff_count * 4
+        self.habit_ids = bytes(buffer[position:]).decode("utf-8").split("\n") if habit_count else []
+        self._views = [buffer, self.period_days, self.timestamps, self.habit_indexes, self.time_timestamps,
+                       self.time_habit_indexes]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def columns(self):
+        """Return (habit_ids, period_days, timestamps, habit_indexes)."""
+        return self.habit_ids, self.period_days, self.timestamps, self.habit_indexes
+
+    def checkoffs_between(self, start=None, end=None):
+        """Return the columns of the check offs within the given time range, see Storage.checkoffs_between.
+
+        The range is found by binary search in the time index, only its k check offs are read and
+        ordered by habit: O(log n + k log k) for n check offs in total.
+        """
+        low = 0 if start is None else bisect_left(self.time_timestamps, start)
+        high = len(self.time_timestamps) if end is None else bisect_left(self.time_timestamps, end)
+        try:
+            import numpy as np
+        except ImportError:
+            return self._group_by_habit(low, high)
+        # Check offs of the range ordered by habit (stable, thus by timestamp within each habit), habits
+        # renumbered in order of their ids
+        range_indexes = np.frombuffer(self.time_habit_indexes[low:high], dtype=np.int32)
+        time_order = np.argsort(range_indexes, kind="stable")
+        range_habits, habit_indexes = np.unique(range_indexes[time_order], return_inverse=True)
+        timestamps = array("q", np.frombuffer(self.time_timestamps[low:high], dtype=np.int64)[time_order].tobytes())
+        period_days = array("q", np.frombuffer(self.period_days, dtype=np.int64)[range_habits].tobytes())
+        return ([self.habit_ids[index] for index in range_habits.tolist()], period_days, timestamps,
+                array("i", habit_indexes.astype(np.int32).tobytes()))
+
+    def _group_by_habit(self, low, high):
+        """Return the columns of the check offs low to high of the time index, see checkoffs_between."""
+        checkoffs = sorted(zip(self.time_habit_indexes[low:high], self.time_timestamps[low:high]))
+        habit_ids = []
+        period_days = array("q")
+        timestamps = array("q")
+        habit_indexes = array("i")
+        last_index = None
+        for index, timestamp in checkoffs:
+            if index != last_index:
+                last_index = index
+                habit_ids.append(self.habit_ids[index])
+                period_days.append(self.period_days[index])
+            timestamps.append(timestamp)
+            habit_indexes.append(len(habit_ids) - 1)
+        return habit_ids, period_days, timestamps, habit_indexes
+
+    def close(self):
+        """Release the columns and unmap the file."""
+        # Views are released first, as a mapped file with exported buffers cannot be closed
+        for view in reversed(self._views):
+            view.release()
+        self._mmap.close()
+
+
+def write(path, habit_ids, period_days, timestamps, habit_indexes, modified_ns=None):
+    """Write columnar store to given path (replaced atomically).
+
+    Parameters
+    ----------
+    path : str
+        Path of store (including file extension).
+    habit_ids : list of str
+        Ids of the habits.
+    period_days : array of int
+        Period length in days of each habit (typecode "q").
+    timestamps : array of int
+        Check off timestamps as microseconds since epoch, ordered by habit and timestamp (typecode "q").
+    habit_indexes : array of int
+        Habit index of each check off (typecode "i").
+    modified_ns : int, optional
+        Modification time of the store in nanoseconds since epoch. Default is the time of writing.
+    """
+    encoded_ids = "\n".join(habit_ids).encode("utf-8")
+    time_timestamps, time_habit_indexes = _order_by_time(timestamps, habit_indexes)
+    # Unique per writer, stores may be rebuilt by several threads (see async_api) or processes at once
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary_path, "wb") as store_file:
+        store_file.write(HEADER.pack(MAGIC, len(habit_ids), len(timestamps), len(encoded_ids)))
+        store_file.write(period_days)
+        store_file.write(timestamps)
+        store_file.write(habit_indexes)
+        store_file.write(time_timestamps)
+        store_file.write(time_habit_indexes)
+        store_file.write(encoded_ids)
+    if modified_ns is not None:
+        os.utime(temporary_path, ns=(modified_ns, modified_ns))
+    os.replace(temporary_path, path)
+
+
+def _order_by_time(timestamps, habit_indexes):
+    """Return timestamps and habit indexes of the check offs ordered by timestamp (time index)."""
+    try:
+        import numpy as np
+    except ImportError:
+        time_order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        return (array("q", map(timestamps.__getitem__, time_order)),
+                array("i", map(habit_indexes.__getitem__, time_order)))
+    timestamp_column = np.frombuffer(timestamps, dtype=np.int64)
+    time_order = np.argsort(timestamp_column, kind="stable")
+    return (timestamp_column[time_order].tobytes(),
+            np.frombuffer(habit_indexes, dtype=np.int32)[time_order].tobytes())
+
+
+def get_path():
+    """Return path of the columnar store of the configured habit database."""
+    return storage.get_path() + FILE_EXTENSION
+
+
+def is_current(path, habits_db):
+    """Return whether the columnar store at given path exists and is newer than the files of given habit database."""
+    try:
+        store_modified = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    for file_path in habits_db.files():
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        # Empty files (e.g. the write-ahead log created on opening a database) hold no data
+        if file_stat.st_size > 0 and file_stat.st_mtime_ns >= store_modified:
+            return False
+    return True
+
+
+@timings.timed("columnar.open_store")
+def open_store(habits_db, path=None):
+    """Open the columnar store of the given habit database, rebuilding it if it is outdated.
+
+    Parameters
+    ----------
+    habits_db : Storage
+        Opened habit database.
+    path : str, optional
+        Path of store (including file extension). Default is the store of the configured habit database.
+
+    Returns
+    -------
+    ColumnarStore
+        Mapped columnar store, to be closed by the caller.
+    """
+    path = get_path() if path is None else path
+    if is_current(path, habits_db):
+        try:
+            return ColumnarStore(path)
+        except ValueError:
+            # Store of a former version of the file layout
+            pass
+    # The store is dated to the start of the rebuild (clock of the file system), so it stays
+    # outdated if the database is modified meanwhile
+    with tempfile.TemporaryFile(dir=os.path.dirname(path)) as clock_file:
+        started = os.fstat(clock_file.fileno()).st_mtime_ns
+    write(path, *habits_db.checkoff_columns(), modified_ns=started)
+    return ColumnarStore(path)
@@ -0,0 +1,141 @@
+import csv
+import json
+import sys
+from array import array
+
+import click
+
+import repository
+import timestamp_codec
+import timings
+
+
+def get_json_out(raw_text):
+    """Convert input raw text and return JSON."""
+    return json.dumps(raw_text, indent=4, sort_keys=False)
+
+
+def get_human_out(raw_text):
+    """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
+    human_text = PrettyTable(["habits", "read checkoffs", "imported checkoffs"])
+    human_text.add_row([raw_text["habits"], raw_text["read_checkoffs"], raw_text["imported_checkoffs"]])
+    return human_text
+
+
+def read_rows(input_file, input_format):
+    """Return (line number, habit id, timestamp) of each check off of the given input file."""
+    if input_format == "CSV":
+        reader = csv.reader(input_file)
+        for row in reader:
+            if not row or row == ["habit_id", "timestamp"]:
+                # Skip empty lines and header
+                continue
+            if len(row) != 2:
+                raise ValueError(f"Line {reader.line_num}: Expected 2 fields (habit_id,timestamp), got {len(row)}")
+            yield reader.line_num, row[0], row[1]
+    else:
+        for line_number, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                habit_id, timestamp = item["habit_id"], item["timestamp"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"Line {line_number}: Invalid check off {line.strip()} ({type(e).__name__}: {e})")
+            yield line_number, habit_id, timestamp
+
+
+def read_checkoffs(input_file, input_format):
+    """Read check offs of given input file and group them per habit.
+
+    Parameters
+    ----------
+    input_file : file
+        Text file with one check off per line.
+    input_format : str
+        CSV (habit_id,timestamp) or NDJSON ({"habit_id": ..., "timestamp": ...}).
+
+    Returns
+    -------
+    tuple of (dict, int)
+        Check off timestamps (array of microseconds since epoch) by habit id and number of read check offs.
+
+    Raises
+    ------
+    ValueError
+        If a check off is malformed or its timestamp does not match format "%Y-%m-%d %H:%M:%S.%f".
+    """
+    checkoffs = {}
+    count = 0
+    for line_number, habit_id, timestamp in read_rows(input_file, input_format):
+        # Parsed per row (not with timestamp_codec.parse_many), so errors name the line of the check off
+        try:
+            microseconds = timestamp_codec.parse(timestamp)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Line {line_number}: {e}")
+        timestamps = checkoffs.get(habit_id)
+        if timestamps is None:
+            timestamps = checkoffs[habit_id] = array("q")
+        timestamps.append(microseconds)
+        count += 1
+    return checkoffs, count
+
+
+@click.command(short_help="Check off habits in bulk")
+@click.option("-i", "--input", "input_file", required=False, default="-", type=click.File("r", encoding="utf-8"),
+              help="File with check offs, one per line. Default stdin.")
+@click.option("-f", "--format", "input_format", required=False, default="CSV",
+              type=click.Choice(["CSV", "NDJSON"], case_sensitive=True), help="Input format. Default CSV.")
+@click.option("-o", "--output", required=False, default="JSON",
+              type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
+def cli(input_file, input_format, output):
+    """Checks off habits in bulk (import of check off history).
+
+    Check offs are read from a file or stdin, as CSV lines "habit_id,timestamp" (optional header) or as
+    NDJSON lines {"habit_id": ..., "timestamp": ...}, timestamp format YYYY-MM-DD HH:MM:SS.f.
+
+    Check offs are grouped per habit, deduplicated and sorted once, and each habit is written once within a
+    single transaction. Check offs already stored are skipped. Nothing is imported, if any line is invalid.
+    """
+    try:
+        # Read and group check offs
+        checkoffs, read_count = read_checkoffs(input_file, input_format)
+        # Open habits database (repository caching deserialized habits)
+        habits_db = repository.open_repository()
+        # Check off habits and save checkoffs
+        try:
+            imported_count = habits_db.check_off_many(checkoffs)
+        finally:
+            # Close habits database
+            habits_db.close()
+        # Return number of imported check offs
+        return_value = {"habits": len(checkoffs), "read_checkoffs": read_count, "imported_checkoffs": imported_count}
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
+    except KeyError as e:
+        # Inform user: Return error if given id is invalid and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: Given id {e.args[0]} is invalid", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except ValueError as e:
+        # Inform user: Return error if input is invalid and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except Exception as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An unexpected error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
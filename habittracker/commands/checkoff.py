@@ -1,12 +1,10 @@
 import json
 import sys
-import shelve
-import os
 
 import click
-from prettytable import PrettyTable
 
-import app_config as conf
+import repository
+import timings
 
 
 def get_json_out(raw_text):
@@ -16,6 +14,9 @@ def get_json_out(raw_text):
 
 def get_human_out(raw_text):
     """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
     human_text = PrettyTable(["id", "name", "description", "periodicity", "created", "checkoffs"])
     human_text.add_row([raw_text["id"], raw_text["name"], raw_text["description"], raw_text["periodicity"], raw_text["created"],
                         "\n".join(raw_text["checkoffs"])])
@@ -31,21 +32,18 @@ def cli(habit_id, timestamp, output):
     """Checks off a given habit."""
     # Check off given habit with given timestamp and save habit to database and return as json
     try:
-        # Open habits database
-        habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
-        # Load habit
-        habit = habits_db[habit_id]
-        # Check off habit
-        habit.check_off(timestamp)
-        # Update habit
-        habits_db[habit.id] = habit
+        # Open habits database (repository caching deserialized habits)
+        habits_db = repository.open_repository()
+        # Check off habit and save checkoff
+        habit = habits_db.check_off(habit_id, timestamp)
         # Close habits database
         habits_db.close()
         # Return habit
-        if output == "JSON":
-            click.echo(get_json_out(habit.to_custom_dict()))
-        else:
-            click.echo(get_human_out(habit.to_custom_dict()))
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(habit.to_custom_dict()))
+            else:
+                click.echo(get_human_out(habit.to_custom_dict()))
     except KeyError as e:
         # Inform user: Return error if given id is invalid and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
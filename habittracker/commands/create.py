@@ -1,13 +1,11 @@
 import json
 import sys
-import shelve
-import os
 
 import click
-from prettytable import PrettyTable
 
-import app_config as conf
+import repository
 import habit
+import timings
 
 
 def get_json_out(raw_text):
@@ -17,6 +15,9 @@ def get_json_out(raw_text):
 
 def get_human_out(raw_text):
     """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
     human_text = PrettyTable(["id", "name", "description", "periodicity", "created", "checkoffs"])
     human_text.add_row([raw_text["id"], raw_text["name"], raw_text["description"], raw_text["periodicity"], raw_text["created"],
                         "\n".join(raw_text["checkoffs"])])
@@ -36,17 +37,18 @@ def cli(name, description, periodicity, output):
     try:
         # Create habit
         habit_created = habit.Habit(name, description, periodicity)
-        # Open habits database
-        habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
+        # Open habits database (repository caching deserialized habits)
+        habits_db = repository.open_repository()
         # Save habit
         habits_db[habit_created.id] = habit_created
         # Close habits database
         habits_db.close()
         # Return habit
-        if output == "JSON":
-            click.echo(get_json_out(habit_created.to_custom_dict()))
-        else:
-            click.echo(get_human_out(habit_created.to_custom_dict()))
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(habit_created.to_custom_dict()))
+            else:
+                click.echo(get_human_out(habit_created.to_custom_dict()))
     except Exception as e:
         # Inform user: Return error if unexpected error occurred and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
@@ -1,12 +1,10 @@
 import json
 import sys
-import shelve
-import os
 
 import click
-from prettytable import PrettyTable
 
-import app_config as conf
+import repository
+import timings
 
 
 def get_json_out(raw_text):
@@ -16,6 +14,9 @@ def get_json_out(raw_text):
 
 def get_human_out(raw_text):
     """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
     human_text = PrettyTable(["id"])
     human_text.add_row([raw_text["id"]])
     return human_text
@@ -29,18 +30,19 @@ def cli(habit_id, output):
     """Delete given habit."""
     # Check off given habit with given timestamp and save habit to database and return as json
     try:
-        # Open habits database
-        habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
+        # Open habits database (repository caching deserialized habits)
+        habits_db = repository.open_repository()
         # Delete habit
         del habits_db[habit_id]
         # Close habits database
         habits_db.close()
         # Return habit
         return_value = {"id": habit_id}
-        if output == "JSON":
-            click.echo(get_json_out(return_value))
-        else:
-            click.echo(get_human_out(return_value))
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
     except KeyError as e:
         # Inform user: Return error if given id is invalid and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
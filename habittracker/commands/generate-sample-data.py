@@ -0,0 +1,84 @@
+import json
+import sys
+
+import click
+
+import sample_data
+import storage
+import timings
+
+
+def get_json_out(raw_text):
+    """Convert input raw text and return JSON."""
+    return json.dumps(raw_text, indent=4, sort_keys=False)
+
+
+def count_checkoffs(sample_habits, counts):
+    """Yield given sample habits, counting habits and check offs in counts (dict)."""
+    for sample_habit in sample_habits:
+        counts["habits"] += 1
+        counts["checkoffs"] += len(sample_habit.checkoff_timestamps)
+        yield sample_habit
+
+
+@click.command(short_help="Generate synthetic sample data of any size")
+@click.option("-n", "--habits", required=True, type=int, help="Number of habits.")
+@click.option("-c", "--checkoffs", default=30, type=int, help="Number of check offs per habit. Default is 30.")
+@click.option("-s", "--seed", default=42, type=int,
+              help="Seed of the random generator, the same seed yields the same habits. Default is 42.")
+@click.option("--weekly-share", default=0.3, type=float, help="Share of weekly habits. Default is 0.3.")
+@click.option("--streak-length", default=(1, 30), type=(int, int), show_default=True,
+              help="Minimum and maximum streak length in periods.")
+@click.option("--streak-distribution", default="UNIFORM",
+              type=click.Choice(sample_data.STREAK_DISTRIBUTIONS, case_sensitive=True),
+              help="Distribution of streak lengths, GEOMETRIC favours short streaks. Default UNIFORM.")
+@click.option("--gap", default=(1, 3), type=(int, int), show_default=True,
+              help="Minimum and maximum number of periods without check offs between streaks.")
+@click.option("--duplicate-share", default=0.0, type=float,
+              help="Share of check offs followed by a second check off in the same period. Default is 0.")
+@click.option("-o", "--output", required=False, default="JSON",
+              type=click.Choice(["JSON", "NDJSON", "STORE"], case_sensitive=True),
+              help="JSON (sample data file) or NDJSON (one habit per line) streamed to stdout, or STORE to "
+                   "create the habits in the habit database. Default JSON.")
+def cli(habits, checkoffs, seed, weekly_share, streak_length, streak_distribution, gap, duplicate_share, output):
+    """Generate synthetic habits in the schema of data/sample_data.json.
+
+    Check offs follow streaks of consecutive periods separated by gaps, generated reproducibly from
+    the seed. Habits are generated and written one by one, so memory does not depend on the number of
+    habits: JSON output can be used as sample data file, STORE creates the habits (new ids) in the
+    habit database within one transaction and returns the number of created habits and check offs.
+    """
+    try:
+        sample_habits = sample_data.generate(habits, checkoffs, seed=seed, weekly_share=weekly_share,
+                                             streak_length=streak_length, streak_distribution=streak_distribution,
+                                             gap=gap, duplicate_share=duplicate_share)
+        if output == "STORE":
+            counts = {"habits": 0, "checkoffs": 0}
+            # Open habits database
+            habits_db = storage.open_storage()
+            # Create habits within one transaction
+            sample_data.seed(habits_db, count_checkoffs(sample_habits, counts))
+            # Close habits database
+            habits_db.close()
+            with timings.span("render"):
+                click.echo(get_json_out(counts))
+        else:
+            with timings.span("render"):
+                chunks = sample_data.dump_json(sample_habits) if output == "JSON" \
+                    else sample_data.dump_ndjson(sample_habits)
+                for chunk in chunks:
+                    click.echo(chunk, nl=False)
+    except ValueError as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except Exception as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An unexpected error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
@@ -0,0 +1,113 @@
+import json
+import sys
+from datetime import datetime, timezone
+
+import click
+
+import repository
+import storage
+import analytics
+import timestamp_codec
+import timings
+from habit import Habit
+
+
+def get_json_out(raw_text):
+    """Convert input raw text and return JSON."""
+    return json.dumps(raw_text, indent=4, sort_keys=False)
+
+
+def get_human_out(raw_text):
+    """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
+    human_text = PrettyTable(["id", "periodicity", "current streak", "broken"])
+    for item in raw_text:
+        human_text.add_row([item["id"], item["periodicity"], item["current_streak"], item["broken"]])
+    return human_text
+
+
+@click.command(short_help="Return the current streak of all currently tracked habits")
+@click.option("-h", "--habit-id", default=None, type=str,
+              help="Id of habit that has to be analyzed for current streak. Default is all habits.")
+@click.option("-p", "--periodicity", default=None, type=click.Choice(["DAILY", "WEEKLY"], case_sensitive=True),
+              help="Periodicity of habits to analyze. Default is all periodicities.")
+@click.option("-t", "--timestamp", default=None, type=str,
+              help="Point in time of the current streaks, day YYYY-MM-DD (until the end of that day) or timestamp "
+                   "YYYY-MM-DD HH:MM:SS.f. Default is now (UTC).")
+@click.option("-o", "--output", required=False, default="JSON",
+              type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
+def cli(habit_id, periodicity, timestamp, output):
+    """Return the current streak of all currently tracked habits.
+
+    A streak is current (not broken) as long as the habit has been checked off in the current period or
+    the period before, as the current period may still be checked off. Broken streaks are returned as 0.
+
+    The streak statistics of each habit hold the period of its latest check off and the streak ending
+    there, so the current streaks are determined without loading any check offs. Only habits checked off
+    after the given point in time are loaded, to count their check offs up to it.
+    """
+    try:
+        # Validate point in time, check offs are stored in UTC like the creation timestamps
+        if timestamp is None:
+            now = timestamp_codec.to_microseconds(datetime.now(timezone.utc).replace(tzinfo=None))
+        else:
+            # Parsed like the end of a time range (--to), a day counts up to its last microsecond
+            now = timestamp_codec.parse_range(None, timestamp)[1] - 1
+        if habit_id is not None and periodicity is not None:
+            raise ValueError("Options --habit-id and --periodicity cannot be combined")
+        if habit_id is not None:
+            # Open habits database (repository caching deserialized habits)
+            habits_db = repository.open_repository()
+            # Load habit (raises KeyError if habit does not exist)
+            habit = habits_db[habit_id]
+            groups = [(habit.periodicity, [(habit.id, habit.summary)])]
+            habits = {habit.id: habit}
+        else:
+            # Open habits database
+            habits_db = storage.open_storage()
+            # Streak statistics of the habits of each periodicity (no checkoffs required)
+            periodicities = list(Habit.Periodicity) if periodicity is None else [Habit.Periodicity[periodicity]]
+            groups = [(habit_periodicity, habits_db.summaries(periodicity=habit_periodicity.name))
+                      for habit_periodicity in periodicities]
+            habits = habits_db
+        return_value = []
+        for habit_periodicity, summaries in groups:
+            # Current period of the habits of this periodicity
+            ordinal = habit_periodicity.ordinal(now)
+            # Habits checked off after the point in time are loaded to recalculate their streak statistics
+            summaries = analytics.get_summaries_as_of(summaries, habits, ordinal, now)
+            current_streaks = analytics.get_current_streaks_from_summaries(summaries, ordinal)
+            return_value += [{"id": current_habit_id, "periodicity": habit_periodicity.name,
+                              "current_streak": current_streak, "broken": current_streak == 0}
+                             for current_habit_id, current_streak in current_streaks.items()]
+        # Close habits database
+        habits_db.close()
+        # Return current streaks
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
+    except KeyError as e:
+        # Inform user: Return error if given id is invalid and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: Given id {habit_id} is invalid", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except ValueError as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except Exception as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An unexpected error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
@@ -1,13 +1,12 @@
 import json
 import sys
-import shelve
-import os
 
 import click
-from prettytable import PrettyTable
 
-import app_config as conf
+import repository
 import analytics
+import timestamp_codec
+import timings
 
 
 def get_json_out(raw_text):
@@ -17,6 +16,9 @@ def get_json_out(raw_text):
 
 def get_human_out(raw_text):
     """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
     human_text = PrettyTable(["id", "name", "longest streak"])
     human_text.add_row([raw_text["id"], raw_text["name"], raw_text["longest_streak"]])
     return human_text
@@ -27,30 +29,39 @@ def get_human_out(raw_text):
                                                                 "analyzed for longest streak.")
 @click.option("-o", "--output", required=False, default="JSON",
               type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
-def cli(habit_id, output):
-    """Return the longest streak for the given habit."""
+@click.option("--from", "date_from", default=None, type=str,
+              help="First day (YYYY-MM-DD) or timestamp (YYYY-MM-DD HH:MM:SS.f) of check offs to consider.")
+@click.option("--to", "date_to", default=None, type=str,
+              help="Last day (YYYY-MM-DD, inclusive) or timestamp of check offs to consider.")
+def cli(habit_id, output, date_from, date_to):
+    """Return the longest streak for the given habit.
+
+    Use from and to to calculate the streak from the check offs within this time range only.
+    """
     try:
-        # Open habits database
-        habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
-        # Load habits
-        habits = [habit for habit in habits_db.items()]
-        # Close habits database
-        habits_db.close()
+        # Validate time range
+        start, end = timestamp_codec.parse_range(date_from, date_to)
+        # Open habits database (repository caching deserialized habits)
+        habits_db = repository.open_repository()
         # Retrieve longest streak
         if habit_id == "None":
             raise KeyError()
         else:
-            if any(habit[0] == habit_id for habit in habits):
-                longest_streak = analytics.get_longest_streak_for_habit(habits, habit_id)
-                habit_name = list(habit[1].name for habit in habits if habit[1].id == habit_id)[0]
-                return_value = {"id": habit_id, "name": habit_name, "longest_streak": longest_streak}
-            else:
-                raise KeyError()
+            # Load habit (raises KeyError if habit does not exist)
+            habit = habits_db[habit_id]
+            if date_from is not None or date_to is not None:
+                # Check offs of the range only (binary search in the check offs of the habit)
+                habit = habit.between(start, end)
+            longest_streak = analytics.get_longest_streak_for_habit([(habit.id, habit)], habit_id)
+            return_value = {"id": habit_id, "name": habit.name, "longest_streak": longest_streak}
+        # Close habits database
+        habits_db.close()
         # Return longest streak
-        if output == "JSON":
-            click.echo(get_json_out(return_value))
-        else:
-            click.echo(get_human_out(return_value))
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
     except KeyError as e:
         # Inform user: Return error if given id is invalid and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
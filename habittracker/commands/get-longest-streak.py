@@ -1,13 +1,12 @@
 import json
 import sys
-import shelve
-import os
 
 import click
-from prettytable import PrettyTable
 
-import app_config as conf
+import storage
 import analytics
+import timestamp_codec
+import timings
 
 
 def get_json_out(raw_text):
@@ -17,6 +16,9 @@ def get_json_out(raw_text):
 
 def get_human_out(raw_text):
     """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
     human_text = PrettyTable(["longest streak"])
     human_text.add_row([raw_text["longest_streak"]])
     return human_text
@@ -25,23 +27,72 @@ def get_human_out(raw_text):
 @click.command(short_help="Return the longest streak of all currently tracked habits")
 @click.option("-o", "--output", required=False, default="JSON",
               type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
-def cli(output):
-    """Return the longest streak of all currently tracked habits."""
+@click.option("-w", "--workers", default=1, type=int,
+              help="Number of worker processes analyzing habits in parallel. Default is 1.")
+@click.option("-c", "--from-checkoffs", is_flag=True,
+              help="Calculate streaks from the check offs (columnar store) instead of the streak statistics.")
+@click.option("--from", "date_from", default=None, type=str,
+              help="First day (YYYY-MM-DD) or timestamp (YYYY-MM-DD HH:MM:SS.f) of check offs to consider.")
+@click.option("--to", "date_to", default=None, type=str,
+              help="Last day (YYYY-MM-DD, inclusive) or timestamp of check offs to consider.")
+def cli(output, workers, from_checkoffs, date_from, date_to):
+    """Return the longest streak of all currently tracked habits.
+
+    Use workers to analyze habits on several processes, each loading its own pages of habits.
+
+    Use from-checkoffs to calculate the streaks from the check offs of all habits. They are scanned in
+    the memory mapped columnar store (file .columns), which is rebuilt if the habit database changed.
+
+    Use from and to to calculate the streaks from the check offs within this time range only, which are
+    looked up in the time index of the habit database.
+    """
     try:
-        # Open habits database
-        habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
-        # Load habits
-        habits = [habit for habit in habits_db.items()]
-        # Close habits database
-        habits_db.close()
-        # Retrieve longest streak
-        longest_streak = analytics.get_longest_streak(habits)
+        if workers != 1:
+            # Deferred import, worker processes (multiprocessing) are only required for several workers
+            import parallel
+            parallel.validate_workers(workers)
+        if from_checkoffs and workers > 1:
+            raise ValueError("Options --from-checkoffs and --workers cannot be combined")
+        # Validate time range
+        start, end = timestamp_codec.parse_range(date_from, date_to)
+        in_range = date_from is not None or date_to is not None
+        if in_range and workers > 1:
+            raise ValueError("Options --from/--to and --workers cannot be combined")
+        if in_range:
+            # Open habits database
+            habits_db = storage.open_storage()
+            # Check offs of the range only, no habits are loaded
+            _, longest_streak = analytics.get_longest_streaks_from_columns(*habits_db.checkoffs_between(start, end))
+            # Close habits database
+            habits_db.close()
+        elif from_checkoffs:
+            # Open habits database
+            habits_db = storage.open_storage()
+            # Deferred import, the columnar store is only required for option --from-checkoffs
+            import columnar
+            # Scan check off columns, no habits are loaded
+            with columnar.open_store(habits_db) as store:
+                _, longest_streak = analytics.get_longest_streaks_from_columns(*store.columns())
+            # Close habits database
+            habits_db.close()
+        elif workers > 1:
+            longest_streak = parallel.get_longest_streak(workers)
+        else:
+            # Open habits database
+            habits_db = storage.open_storage()
+            # Load streak statistics of habits (no checkoffs required)
+            summaries = [summary for summary in habits_db.summaries()]
+            # Close habits database
+            habits_db.close()
+            # Retrieve longest streak
+            longest_streak = analytics.get_longest_streak_from_summaries(summaries)
         return_value = {"longest_streak": longest_streak}
         # Return longest streak
-        if output == "JSON":
-            click.echo(get_json_out(return_value))
-        else:
-            click.echo(get_human_out(return_value))
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
     except ValueError as e:
         # Inform user: Return error if unexpected error occurred and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
@@ -1,22 +1,36 @@
 import json
-import shelve
 import sys
-import os
 
 import click
-from prettytable import PrettyTable
 
-import app_config as conf
-import analytics
+import storage
+import timestamp_codec
+import timings
 
 
 def get_json_out(raw_text):
-    """Convert input raw text and return JSON."""
-    return json.dumps(raw_text, indent=4, sort_keys=False)
+    """Convert input raw text (iterable of habits) and yield JSON array, streamed habit by habit.
+
+    The streamed text equals *json.dumps(list(raw_text), indent=4)* followed by a new line.
+    """
+    separator = "[\n    "
+    for item in raw_text:
+        yield separator + json.dumps(item, indent=4, sort_keys=False).replace("\n", "\n    ")
+        separator = ",\n    "
+    yield "[]\n" if separator == "[\n    " else "\n]\n"
+
+
+def get_ndjson_out(raw_text):
+    """Convert input raw text (iterable of habits) and yield NDJSON, one line per habit."""
+    for item in raw_text:
+        yield json.dumps(item, sort_keys=False) + "\n"
 
 
 def get_human_out(raw_text):
     """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
     human_text = PrettyTable(["id", "name", "description", "periodicity", "created", "checkoffs"])
     for item in raw_text:
         human_text.add_row([item["id"], item["name"], item["description"], item["periodicity"], item["created"],
@@ -27,42 +41,71 @@ def get_human_out(raw_text):
 @click.command(short_help="Return a list of all currently tracked habits")
 @click.option("-l", "--limit", default=0, type=int,
               help="A limit on the number of objects to be returned, must be positive. Default is no limit.")
+@click.option("-s", "--offset", default=0, type=int,
+              help="Number of objects to skip before returning objects, must be positive. Default is 0.")
 @click.option("-o", "--output", required=False, default="JSON",
-              type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
-def cli(limit, output):
+              type=click.Choice(["JSON", "NDJSON", "HUMAN"], case_sensitive=True),
+              help="Output format, JSON and NDJSON are streamed. Default JSON.")
+@click.option("-w", "--workers", default=1, type=int,
+              help="Number of worker processes rendering habits in parallel. Default is 1.")
+@click.option("--from", "date_from", default=None, type=str,
+              help="First day (YYYY-MM-DD) or timestamp (YYYY-MM-DD HH:MM:SS.f) of check offs to consider.")
+@click.option("--to", "date_to", default=None, type=str,
+              help="Last day (YYYY-MM-DD, inclusive) or timestamp of check offs to consider.")
+def cli(limit, offset, output, workers, date_from, date_to):
     """Return a list of all currently tracked habits.
 
     The habits are returned sorted by creation date, with the most recently created habit appearing first.
+    Use limit and offset to page through large habit lists. Use workers to render large habit lists on
+    several processes, each loading its own pages of habits.
+
+    Use from and to to list only the habits checked off within this time range, each with the check
+    offs of the range.
     """
     try:
-        # Open habits database
-        habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
-        # Load habits
-        habits = [habit for habit in habits_db.items()]
-        # Close habits database
-        habits_db.close()
-        # Analyze
-        habit_list = analytics.list_habits(habits)
-        # Return habit
-        return_value = []
-        for item in habit_list:
-            return_value.append(item[1].to_custom_dict())
-        # Reverse order, that the most recently created habit appearing first
-        return_value = sorted(return_value, key=lambda k: k["created"], reverse=True)
-
-        # Apply limit if given
-        if limit > 0:
-            if output == "JSON":
-                click.echo(get_json_out(return_value[:limit]))
-            else:
-                click.echo(get_human_out(return_value[:limit]))
-        elif limit < 0:
+        # Validate limit and offset
+        if limit < 0:
             raise ValueError(f"A negative limit (given {limit}) is not permitted")
+        if offset < 0:
+            raise ValueError(f"A negative offset (given {offset}) is not permitted")
+        if workers != 1:
+            # Deferred import, worker processes (multiprocessing) are only required for several workers
+            import parallel
+            parallel.validate_workers(workers)
+        # Validate time range
+        start, end = timestamp_codec.parse_range(date_from, date_to)
+        if (date_from is not None or date_to is not None) and workers > 1:
+            raise ValueError("Options --from/--to and --workers cannot be combined")
+        if workers > 1:
+            # Habits are loaded and rendered by worker processes, merged in order
+            chunks = parallel.list_habits(workers, output, limit=limit, offset=offset)
+            if output == "HUMAN":
+                click.echo(get_human_out(chunks))
+            else:
+                for chunk in chunks:
+                    click.echo(chunk, nl=False)
+            return
+        # Open habits database
+        habits_db = storage.open_storage()
+        # Load requested habits only (lazily), the most recently created habit appearing first
+        if date_from is None and date_to is None:
+            habit_list = habits_db.list_habits(limit=limit, offset=offset)
         else:
+            # Habits checked off within the range (time index), with the check offs of the range only
+            habit_list = habits_db.list_habits_between(start, end, limit=limit, offset=offset)
+        # Return habits, JSON and NDJSON are streamed habit by habit
+        return_value = (item.to_custom_dict() for item in habit_list)
+        with timings.span("render"):
             if output == "JSON":
-                click.echo(get_json_out(return_value))
+                for chunk in get_json_out(return_value):
+                    click.echo(chunk, nl=False)
+            elif output == "NDJSON":
+                for chunk in get_ndjson_out(return_value):
+                    click.echo(chunk, nl=False)
             else:
                 click.echo(get_human_out(return_value))
+        # Close habits database
+        habits_db.close()
     except ValueError as e:
         # Inform user: Return error if unexpected error occurred and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
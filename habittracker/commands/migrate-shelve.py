@@ -0,0 +1,72 @@
+import json
+import sys
+import os
+
+import click
+
+import app_config as conf
+import storage
+import timings
+
+
+def get_json_out(raw_text):
+    """Convert input raw text and return JSON."""
+    return json.dumps(raw_text, indent=4, sort_keys=False)
+
+
+def get_human_out(raw_text):
+    """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
+    human_text = PrettyTable(["source", "migrated habits"])
+    human_text.add_row([raw_text["source"], raw_text["migrated_habits"]])
+    return human_text
+
+
+@click.command(short_help="Import habits of a shelve database")
+@click.option("-s", "--source", required=True, type=str,
+              help="Path of shelve database to import, without file extension (.dat/.dir/.bak).")
+@click.option("-o", "--output", required=False, default="JSON",
+              type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
+def cli(source, output):
+    """Import all habits of a shelve database (files .dat/.dir/.bak) into the habit database.
+
+    Habits already existing in the habit database (same id) are replaced.
+    """
+    # A shelve habit database cannot import itself: reading the source holds a shared lock of the lock file,
+    # which the writes to the same database would wait for (exclusive lock) forever
+    if conf.db_backend == "shelve" and os.path.realpath(source) == os.path.realpath(storage.get_path()):
+        raise click.BadParameter("Source is the habit database itself", param_hint="'-s' / '--source'")
+    try:
+        if not storage.ShelveStorage.exists(source):
+            raise ValueError(f"Shelve database {source} does not exist")
+        # Open shelve database and habits database
+        source_db = storage.ShelveStorage(os.path.abspath(source))
+        habits_db = storage.open_storage()
+        # Import habits
+        migrated_habits = storage.migrate(source_db, habits_db)
+        # Close databases
+        habits_db.close()
+        source_db.close()
+        # Return number of imported habits
+        return_value = {"source": source, "migrated_habits": migrated_habits}
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
+    except ValueError as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except Exception as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An unexpected error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
@@ -0,0 +1,73 @@
+import json
+import signal
+import sys
+
+import click
+
+import app_config as conf
+import server
+import timings
+
+
+def stop_server(signum, frame):
+    """Stop server on SIGTERM like on Ctrl+C (socket and databases are closed)."""
+    raise KeyboardInterrupt
+
+
+def get_json_out(raw_text):
+    """Convert input raw text and return JSON."""
+    return json.dumps(raw_text, indent=4, sort_keys=False)
+
+
+def get_human_out(raw_text):
+    """Convert input raw text and return human readable format (table style)."""
+    # Deferred import, only required for human readable output
+    from prettytable import PrettyTable
+
+    human_text = PrettyTable(["socket", "status"])
+    human_text.add_row([raw_text["socket"], raw_text["status"]])
+    return human_text
+
+
+@click.command(short_help="Run server keeping the habit database open")
+@click.option("--socket", "socket_path", required=False, default=conf.socket_path, type=str,
+              help="Path of the Unix socket. Default data/habittracker.sock.")
+@click.option("-o", "--output", required=False, default="JSON",
+              type=click.Choice(["JSON", "HUMAN"], case_sensitive=True), help="Output format. Default JSON.")
+def cli(socket_path, output):
+    """Run server mode until interrupted (Ctrl+C or SIGTERM).
+
+    The server keeps the habit database open and runs the commands forwarded by the thin client
+    (python client.py COMMAND [ARGS]) over a Unix socket, one after another.
+    """
+    try:
+        if conf.keep_storage_open:
+            raise ValueError("Command serve is not available in server mode")
+        habit_server = server.HabitServer(socket_path, click.get_current_context().find_root().command)
+        return_value = {"socket": socket_path, "status": "running"}
+        with timings.span("render"):
+            if output == "JSON":
+                click.echo(get_json_out(return_value))
+            else:
+                click.echo(get_human_out(return_value))
+        signal.signal(signal.SIGTERM, stop_server)
+        try:
+            habit_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            habit_server.server_close()
+    except ValueError as e:
+        # Inform user: Return error if server cannot be started and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
+    except Exception as e:
+        # Inform user: Return error if unexpected error occurred and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! An unexpected error occurred !", bg="red", fg="white", bold=True)
+        click.secho(f"{type(e).__name__}: {e}", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
@@ -1,11 +1,21 @@
 from enum import Enum
 from datetime import datetime, timezone
+from bisect import bisect_left
+from array import array
+import heapq
 import uuid
 
+import timestamp_codec
+import timings
+from timestamp_codec import EPOCH_ORDINAL, MICROSECONDS_PER_DAY, to_microseconds, from_microseconds
+
 
 class Habit:
     """A class to represent a habit.
 
+    Checkoffs are held compactly as sorted array of epoch microseconds, Checkoff objects are only
+    created when requested via attribute *checkoffs*.
+
     Attributes
     ----------
     id : str
@@ -19,23 +29,54 @@ class Habit:
     created : str
         Creation timestamp of the habit.
     checkoffs : list of Checkoffs
-        List of all check offs.
+        List of all check offs, sorted by timestamp (ascending).
+    checkoff_timestamps : array of int
+        Sorted (ascending) check off timestamps as microseconds since epoch.
+    summary : StreakSummary
+        Streak statistics of the check offs, maintained by check_off.
 
     Methods
     -------
     checkoff(date):
         Mark the habit as completed (checked-off).
 
+    check_off_many(timestamps):
+        Mark the habit as completed at several timestamps at once.
+
+    checkoff_timestamps_between(start, end):
+        Return the check off timestamps within the given time range.
+
+    between(start, end):
+        Return copy of the habit holding the check offs within the given time range only.
+
+    period_ordinal(microseconds):
+        Return the period (day or week) of the given timestamp as ordinal value.
+
+    checkoff_ordinals():
+        Return the periods of the check offs as ordinal values.
+
     to_custom_dict():
         Return dictionary representation of habit.
 
     """
+    __slots__ = ("id", "name", "description", "periodicity", "created", "_checkoff_timestamps", "summary")
+
     class Periodicity(Enum):
         """A class to represent a periodicity.
         """
         DAILY = 1, "Daily basis"
         WEEKLY = 2, "Weekly basis"
 
+        @property
+        def days(self):
+            """int: Length of a period in days."""
+            return 7 if self.name == "WEEKLY" else 1
+
+        def ordinal(self, microseconds):
+            """Return the period of the given timestamp (microseconds since epoch) as ordinal value, see
+            Habit.period_ordinal."""
+            return (microseconds // MICROSECONDS_PER_DAY + EPOCH_ORDINAL - 1) // self.days + 1
+
     def __init__(self, name, description, periodicity):
         """Constructs all the necessary attributes for the habit object.
 
@@ -53,7 +94,93 @@ class Habit:
         self.description = description
         self.periodicity = self.Periodicity[periodicity.upper()]
         self.created = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
-        self.checkoffs = []
+        self._checkoff_timestamps = array("q")
+        self.summary = StreakSummary()
+
+    @classmethod
+    def from_record(cls, habit_id, name, description, periodicity, created, checkoff_timestamps, summary=None):
+        """Create habit object from stored details without generating new id and creation timestamp.
+
+        Parameters
+        ----------
+        habit_id : str
+            Unique identifier of the habit.
+        name : str
+            Name of the habit.
+        description : str
+            Description of the habit.
+        periodicity : str
+            Name of the periodicity of the habit.
+        created : str
+            Creation timestamp of the habit.
+        checkoff_timestamps : array of int
+            Sorted (ascending) check off timestamps as microseconds since epoch.
+        summary : StreakSummary, optional
+            Stored streak statistics of the check offs. Default is to calculate them from the check offs.
+
+        Returns
+        -------
+        Habit
+            Habit object.
+        """
+        habit = cls.__new__(cls)
+        habit.id = habit_id
+        habit.name = name
+        habit.description = description
+        habit.periodicity = cls.Periodicity[periodicity]
+        habit.created = created
+        habit._checkoff_timestamps = checkoff_timestamps
+        habit.summary = summary if summary is not None else StreakSummary.from_ordinals(habit.checkoff_ordinals())
+        if timings.enabled:
+            timings.count("habits.loaded")
+            timings.count("checkoffs.loaded", len(checkoff_timestamps))
+        return habit
+
+    def __getstate__(self):
+        """Return compact state for pickling (checkoffs as raw bytes of the timestamp array).
+
+        The trailing element marks streak statistics based on periods (weeks for weekly habits).
+        """
+        return (self.id, self.name, self.description, self.periodicity.name, self.created,
+                self._checkoff_timestamps.tobytes(), self.summary.to_tuple(), "periods")
+
+    def __setstate__(self, state):
+        """Restore state from pickle.
+
+        Habits pickled by former versions (dictionary state holding Checkoff objects) are converted.
+        """
+        if isinstance(state, dict):
+            checkoff_timestamps = array("q", sorted(to_microseconds(checkoff.timestamp)
+                                                    for checkoff in state["checkoffs"]))
+            state = (state["id"], state["name"], state["description"], state["periodicity"].name,
+                     state["created"], checkoff_timestamps.tobytes(), None)
+        elif len(state) == 6:
+            # Compact state without streak statistics
+            state = (*state, None)
+        elif len(state) == 7 and state[3] != "DAILY":
+            # Streak statistics of former versions are based on days for all periodicities
+            state = (*state[:6], None)
+        self.id, self.name, self.description, periodicity, self.created, checkoff_timestamps, summary = state[:7]
+        self.periodicity = self.Periodicity[periodicity]
+        self._checkoff_timestamps = array("q")
+        self._checkoff_timestamps.frombytes(checkoff_timestamps)
+        if summary is None:
+            self.summary = StreakSummary.from_ordinals(self.checkoff_ordinals())
+        else:
+            self.summary = StreakSummary(*summary)
+        if timings.enabled:
+            timings.count("habits.loaded")
+            timings.count("checkoffs.loaded", len(self._checkoff_timestamps))
+
+    @property
+    def checkoffs(self):
+        """list of Checkoff: All check offs, sorted by timestamp (ascending), created on request."""
+        return [Checkoff.from_microseconds(self, microseconds) for microseconds in self._checkoff_timestamps]
+
+    @property
+    def checkoff_timestamps(self):
+        """array of int: Sorted (ascending) check off timestamps as microseconds since epoch."""
+        return self._checkoff_timestamps
 
     def check_off(self, date):
         """ Mark the habit as completed (checked-off).
@@ -73,12 +200,126 @@ class Habit:
         ValueError
             If habit has been already checked off at given timestamp or date does not match format.
         """
-        date_formatted = str(datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f"))
-        if date_formatted in list(checkoff.timestamp.strftime("%Y-%m-%d %H:%M:%S.%f") for checkoff in self.checkoffs):
-            raise ValueError(f"Habit has been already checked off at given time {date_formatted}")
-        self.checkoffs.append(Checkoff(self, date))
-        return self.checkoffs[-1]
+        # Parsed once, the Checkoff object is created from the parsed timestamp
+        microseconds = timestamp_codec.parse(date)
+        # Binary search in sorted timestamps for duplicate detection and insert position
+        index = bisect_left(self._checkoff_timestamps, microseconds)
+        if index < len(self._checkoff_timestamps) and self._checkoff_timestamps[index] == microseconds:
+            raise ValueError(f"Habit has been already checked off at given time {from_microseconds(microseconds)}")
+        self._checkoff_timestamps.insert(index, microseconds)
+        if index == len(self._checkoff_timestamps) - 1:
+            # Appended in order, so streak statistics are updated incrementally
+            self.summary.add(self.period_ordinal(microseconds))
+        else:
+            self.summary = StreakSummary.from_ordinals(self.checkoff_ordinals())
+        timings.count("checkoffs.added")
+        return Checkoff.from_microseconds(self, microseconds)
+
+    def check_off_many(self, timestamps):
+        """Mark the habit as completed at several timestamps at once (bulk import).
+
+        Timestamps are deduplicated and sorted once, timestamps the habit has already been checked off at
+        are skipped. Streak statistics are updated incrementally if all timestamps are after the latest
+        check off, otherwise recalculated once.
+
+        Parameters
+        ----------
+        timestamps : iterable of int
+            Completion timestamps as microseconds since epoch, in any order.
+
+        Returns
+        -------
+        array of int
+            Sorted (ascending) timestamps actually added.
+        """
+        # Binary search for existing check offs, cost depends on the number of added timestamps only
+        existing = self._checkoff_timestamps
+        added = array("q", (microseconds for microseconds in sorted(set(timestamps))
+                            if not self._contains(existing, microseconds)))
+        if not added:
+            return added
+        if not self._checkoff_timestamps or added[0] > self._checkoff_timestamps[-1]:
+            self._checkoff_timestamps.extend(added)
+            for microseconds in added:
+                self.summary.add(self.period_ordinal(microseconds))
+        else:
+            self._checkoff_timestamps = array("q", heapq.merge(self._checkoff_timestamps, added))
+            self.summary = StreakSummary.from_ordinals(self.checkoff_ordinals())
+        timings.count("checkoffs.added", len(added))
+        return added
+
+    def checkoff_timestamps_between(self, start=None, end=None):
+        """Return the check off timestamps within the given time range.
+
+        The sorted timestamps are the index of the habit: the range is found by binary search, O(log n + k).
+
+        Parameters
+        ----------
+        start : int, optional
+            Start of range (inclusive) as microseconds since epoch. Default is no lower bound.
+        end : int, optional
+            End of range (exclusive) as microseconds since epoch. Default is no upper bound.
+
+        Returns
+        -------
+        array of int
+            Sorted (ascending) check off timestamps within the range.
+        """
+        timestamps = self._checkoff_timestamps
+        low = 0 if start is None else bisect_left(timestamps, start)
+        high = len(timestamps) if end is None else bisect_left(timestamps, end)
+        return timestamps[low:high]
+
+    def between(self, start=None, end=None):
+        """Return copy of the habit holding the check offs within the given time range only.
+
+        Streak statistics of the copy are based on these check offs. See checkoff_timestamps_between.
+
+        Returns
+        -------
+        Habit
+            Habit with same id and details.
+        """
+        return Habit.from_record(self.id, self.name, self.description, self.periodicity.name, self.created,
+                                 self.checkoff_timestamps_between(start, end))
+
+    @staticmethod
+    def _contains(timestamps, microseconds):
+        """Return whether the sorted timestamps contain the given timestamp."""
+        index = bisect_left(timestamps, microseconds)
+        return index < len(timestamps) and timestamps[index] == microseconds
+
+    def period_ordinal(self, microseconds):
+        """Return the period (day or week, according to periodicity) of the given timestamp as ordinal value.
+
+        Days are proleptic gregorian ordinal values. Weeks run from Monday to Sunday like ISO weeks, as
+        ordinal 1 (0001-01-01) is a Monday, and are numbered consecutively across years.
+
+        Parameters
+        ----------
+        microseconds : int
+            Timestamp as microseconds since epoch.
+
+        Returns
+        -------
+        int
+            Period ordinal value.
+        """
+        return self.periodicity.ordinal(microseconds)
+
+    def checkoff_ordinals(self):
+        """Return the periods of the check offs as ordinal values (see period_ordinal).
+
+        Returns
+        -------
+        generator of int
+            Integers representing the check off periods (days or weeks) as ordinal values (ascending).
+        """
+        days = self.periodicity.days
+        return ((microseconds // MICROSECONDS_PER_DAY + EPOCH_ORDINAL - 1) // days + 1
+                for microseconds in self._checkoff_timestamps)
 
+    @timings.timed("habit.to_custom_dict")
     def to_custom_dict(self):
         """Return dictionary representation of habit.
 
@@ -88,9 +329,7 @@ class Habit:
             Dictionary containing all currently stored habit details.
         """
         # Build custom representation
-        checkoffs = []
-        for checkoff in self.checkoffs:
-            checkoffs.append(checkoff.timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"))
+        checkoffs = timestamp_codec.format_many(self._checkoff_timestamps)
         custom_dict = {"id": self.id,
                        "name": self.name,
                        "description": self.description,
@@ -101,6 +340,143 @@ class Habit:
         return custom_dict
 
 
+class StreakSummary:
+    """A class to represent the streak statistics of the check offs of a habit.
+
+    Streaks count consecutive periods (days or weeks, see Habit.period_ordinal) with check offs.
+
+    Attributes
+    ----------
+    count : int
+        Number of check offs.
+    last_ordinal : int
+        Period of the latest check off as ordinal value (None in case of no check offs).
+    current_streak : int
+        Streak value ending at the latest check off.
+    longest_streak : int
+        Longest streak value.
+
+    Methods
+    -------
+    add(ordinal):
+        Add check off in given period, which must not be before the latest check off.
+
+    from_ordinals(ordinals):
+        Calculate streak statistics of given sorted check off periods.
+
+    is_broken(ordinal):
+        Return whether the current streak is broken as of given period.
+
+    current_streak_at(ordinal):
+        Return the current streak value as of given period.
+    """
+    __slots__ = ("count", "last_ordinal", "current_streak", "longest_streak")
+
+    def __init__(self, count=0, last_ordinal=None, current_streak=0, longest_streak=0):
+        self.count = count
+        self.last_ordinal = last_ordinal
+        self.current_streak = current_streak
+        self.longest_streak = longest_streak
+
+    def __eq__(self, other):
+        return isinstance(other, StreakSummary) and self.to_tuple() == other.to_tuple()
+
+    def __repr__(self):
+        return f"StreakSummary{self.to_tuple()}"
+
+    def add(self, ordinal):
+        """Add check off in given period, which must not be before the latest check off (O(1)).
+
+        Several check offs in the same period count once for streaks, consecutive periods extend the current
+        streak and a gap starts a new one.
+
+        Parameters
+        ----------
+        ordinal : int
+            Check off period as ordinal value.
+        """
+        self.count += 1
+        if ordinal == self.last_ordinal:
+            return
+        if self.last_ordinal is not None and ordinal - self.last_ordinal == 1:
+            self.current_streak += 1
+        else:
+            self.current_streak = 1
+        if self.current_streak > self.longest_streak:
+            self.longest_streak = self.current_streak
+        self.last_ordinal = ordinal
+
+    def is_broken(self, ordinal):
+        """Return whether the current streak is broken as of given period (O(1), no check offs required).
+
+        The streak is alive as long as the latest check off is in the given period or the period before,
+        as the given period may still be checked off. It is broken once a whole period has been missed,
+        or if there are no check offs at all. The statistics end at the latest check off, so they cannot
+        answer for earlier periods (see analytics.get_summaries_as_of).
+
+        Parameters
+        ----------
+        ordinal : int
+            Period as ordinal value, e.g. the current period (see Habit.Periodicity.ordinal).
+
+        Returns
+        -------
+        bool
+            True if the current streak is broken.
+
+        Raises
+        ------
+        ValueError
+            If the given period is before the period of the latest check off.
+        """
+        if self.last_ordinal is not None and ordinal < self.last_ordinal:
+            raise ValueError(f"Period {ordinal} is before the period of the latest check off ({self.last_ordinal})")
+        return self.last_ordinal is None or self.last_ordinal < ordinal - 1
+
+    def current_streak_at(self, ordinal):
+        """Return the current streak value as of given period, 0 if the streak is broken (see is_broken).
+
+        Parameters
+        ----------
+        ordinal : int
+            Period as ordinal value, e.g. the current period (see Habit.Periodicity.ordinal).
+
+        Returns
+        -------
+        int
+            Current streak value.
+
+        Raises
+        ------
+        ValueError
+            If the given period is before the period of the latest check off.
+        """
+        return 0 if self.is_broken(ordinal) else self.current_streak
+
+    @classmethod
+    def from_ordinals(cls, ordinals):
+        """Calculate streak statistics of given check off periods in a single pass.
+
+        Parameters
+        ----------
+        ordinals : iterable of int
+            Sorted (ascending) check off periods as ordinal values.
+
+        Returns
+        -------
+        StreakSummary
+            Streak statistics.
+        """
+        summary = cls()
+        for ordinal in ordinals:
+            summary.add(ordinal)
+        return summary
+
+    def to_tuple(self):
+        """Return streak statistics as tuple (count, last_ordinal, current_streak, longest_streak)."""
+        return self.count, self.last_ordinal, self.current_streak, self.longest_streak
+
+
 class Checkoff:
     """A class to represent the completion (checked-off) of a habit.
 
@@ -111,6 +487,8 @@ class Checkoff:
         date : str
             Completion timestamp (format "%Y-%m-%d %H:%M:%S.%f").
     """
+    __slots__ = ("habit", "timestamp")
+
     def __init__(self, habit, date):
         """Constructs all the necessary attributes for the checkoff object.
 
@@ -123,4 +501,32 @@ class Checkoff:
 
         """
         self.habit = habit
-        self.timestamp = datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f")
+        self.timestamp = from_microseconds(timestamp_codec.parse(date))
+
+    def __setstate__(self, state):
+        """Restore state from pickle (also accepts the dictionary state of former versions)."""
+        if isinstance(state, tuple):
+            state = state[1]
+        self.habit = state["habit"]
+        self.timestamp = state["timestamp"]
+
+    @classmethod
+    def from_microseconds(cls, habit, microseconds):
+        """Create checkoff object from given timestamp without parsing.
+
+        Parameters
+        ----------
+        habit : Habit
+            Habit object.
+        microseconds : int
+            Completion timestamp as microseconds since epoch.
+
+        Returns
+        -------
+        Checkoff
+            Checkoff object containing the completion timestamp.
+        """
+        checkoff = cls.__new__(cls)
+        checkoff.habit = habit
+        checkoff.timestamp = from_microseconds(microseconds)
+        return checkoff
@@ -1,13 +1,20 @@
+import time
+
+# Start of startup profiling (option --profile-startup), taken before any other import
+startup_time = time.perf_counter()
+
 import os
-import shelve
-import glob
 import json
 import sys
+import importlib.util
 
 import click
 
 import app_config as conf
-import habit
+import storage
+import timings
+
+import_duration = time.perf_counter() - startup_time
 
 
 class MyCLI(click.MultiCommand):
@@ -16,24 +23,55 @@ class MyCLI(click.MultiCommand):
     Note: get_command extended with error handling in case of unknown command is called.
 
     For details please refer to https://click.palletsprojects.com/en/7.x/commands/#custom-multi-commands
+
+    Commands are resolved through a registry: the command folder is listed once and each command module is
+    imported once via importlib, which reuses the compiled bytecode of *commands/__pycache__*.
+
+    With option --timings or --timings-json, instrumentation (see module timings) is enabled before the
+    command is resolved and its report is written once the command has finished.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._command_names = None
+        self._commands = {}
+        self.load_durations = {}
+        self._invoked = False
+
+    def invoke(self, ctx):
+        if ctx.params.get("timings_enabled") or ctx.params.get("timings_json"):
+            # The first invocation of the process is measured from its start (including imports),
+            # further invocations (server mode) from now
+            timings.enable(startup_time if not self._invoked else None)
+            if not self._invoked:
+                timings.add("startup.imports", import_duration)
+            ctx.call_on_close(lambda: write_timings(ctx.params.get("timings_enabled"), ctx.params.get("timings_json")))
+        self._invoked = True
+        return super().invoke(ctx)
+
     def list_commands(self, ctx):
-        rv = []
-        for filename in os.listdir(conf.plugin_folder):
-            if filename.endswith(".py"):
-                rv.append(filename[:-3])
-        rv.sort()
-        return rv
+        if self._command_names is None:
+            rv = []
+            for filename in os.listdir(conf.plugin_folder):
+                if filename.endswith(".py"):
+                    rv.append(filename[:-3])
+            rv.sort()
+            self._command_names = rv
+        return self._command_names
 
     def get_command(self, ctx, name):
-        ns = {}
-        fn = os.path.join(conf.plugin_folder, name + ".py")
-        if glob.glob(fn):
-            with open(fn) as f:
-                code = compile(f.read(), fn, "exec")
-                eval(code, ns, ns)
-            return ns['cli']
+        if name in self._commands:
+            return self._commands[name]
+        if name in self.list_commands(ctx):
+            start = time.perf_counter()
+            fn = os.path.join(conf.plugin_folder, name + ".py")
+            spec = importlib.util.spec_from_file_location(f"commands.{name}", fn)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._commands[name] = module.cli
+            self.load_durations[name] = time.perf_counter() - start
+            timings.add("startup.command_loading", self.load_durations[name])
+            return self._commands[name]
         else:
             # Inform user: Return error if command is invalid and exit application
             click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
@@ -52,38 +90,49 @@ def initialize_database():
 
     - Each with tracking data for a period of four or five weeks
 
-    Example data coming from */data/sample_data.json*
+    Example data coming from */data/sample_data.json*, validated completely and written within one
+    transaction (see module sample_data).
+
+    A shelve database (files .dat/.dir/.bak) of former versions is migrated instead, if present.
+
+    If seeding or migration fails, the created database is removed again, so the next run initializes it.
+
+    Once the database exists (warm start), checking it costs a single file lookup.
     """
     try:
-        sample_data_json = os.path.join(conf.data_dir, "sample_data.json")
         # Initialize database if necessary
-        if not glob.glob(os.path.join(conf.data_dir, f"{conf.db_name}.dat")):
-            if glob.glob(sample_data_json):
-                # Read json file with example data
-                with open(sample_data_json, encoding="utf-8") as json_file:
-                    # Load json file containing example data
-                    data = json.load(json_file)
-                    # Create habits database
-                    habits_db = shelve.open(os.path.join(conf.data_dir, conf.db_name))
-                    # Create habit coming from json and save to habit database
-                    for item in data["sample_data"]:
-                        sample_habit = habit.Habit(item["name"], item["description"], item["periodicity"])
-                        for checkoff_date in item["checkoffs"]:
-                            sample_habit.check_off(checkoff_date)
-                        habits_db[str(sample_habit.id)] = sample_habit
-                    # Close habits database
-                    habits_db.close()
-            else:
-                # Inform user: Return error if </data/sample_data.json> does not exist and exit application
-                click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
-                click.secho("! Failed to initialize database !", bg="red", fg="white", bold=True)
-                click.secho("A problem occurred with file <data/sample_data.json>:", bg="red", fg="white", bold=True)
-                click.secho(f"- File does not exist", bg="red", fg="white", bold=True)
-                click.secho("---------------- SOLUTION ---------------", bg="red", fg="white", bold=True)
-                click.secho("1====> Place file to <data/sample_data.json>", bg="red", fg="white", bold=True)
-                click.secho("2====> Run *~HaTraBa~* again", bg="red", fg="white", bold=True)
-                click.secho("########################################", bg="red", fg="white", bold=True)
-                sys.exit(1)
+        if storage.exists():
+            return
+        # Deferred import, only required at first run
+        import sample_data
+
+        sample_data_json = os.path.join(conf.data_dir, sample_data.FILE_NAME)
+        if conf.db_backend != "shelve" and storage.ShelveStorage.exists(storage.get_path()):
+            # Migrate habits of former shelve database (database removed again if the migration fails)
+            legacy_db = storage.ShelveStorage(storage.get_path())
+            try:
+                with storage.creating_storage() as habits_db:
+                    storage.migrate(legacy_db, habits_db)
+            finally:
+                legacy_db.close()
+        elif os.path.isfile(sample_data_json):
+            # Load and validate json file with example data before the database is created
+            sample_habits = sample_data.load(sample_data_json)
+            # Create habits database and save habits coming from json within one transaction (database
+            # removed again if seeding fails)
+            with storage.creating_storage() as habits_db:
+                sample_data.seed(habits_db, sample_habits)
+        else:
+            # Inform user: Return error if </data/sample_data.json> does not exist and exit application
+            click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+            click.secho("! Failed to initialize database !", bg="red", fg="white", bold=True)
+            click.secho("A problem occurred with file <data/sample_data.json>:", bg="red", fg="white", bold=True)
+            click.secho(f"- File does not exist", bg="red", fg="white", bold=True)
+            click.secho("---------------- SOLUTION ---------------", bg="red", fg="white", bold=True)
+            click.secho("1====> Place file to <data/sample_data.json>", bg="red", fg="white", bold=True)
+            click.secho("2====> Run *~HaTraBa~* again", bg="red", fg="white", bold=True)
+            click.secho("########################################", bg="red", fg="white", bold=True)
+            sys.exit(1)
 
     except json.JSONDecodeError as e:
         # Inform user: Return error if </data/sample_data.json> is invalid and exit application
@@ -96,6 +145,17 @@ def initialize_database():
         click.secho("2====> Run *~HaTraBa~* again", bg="red", fg="white", bold=True)
         click.secho("########################################", bg="red", fg="white", bold=True)
         sys.exit(1)
+    except ValueError as e:
+        # Inform user: Return error if content of </data/sample_data.json> is invalid and exit application
+        click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
+        click.secho("! Failed to initialize database !", bg="red", fg="white", bold=True)
+        click.secho("A problem occurred with file <data/sample_data.json>:", bg="red", fg="white", bold=True)
+        click.secho(f"- Invalid sample data: {e}", bg="red", fg="white", bold=True)
+        click.secho("---------------- SOLUTION ---------------", bg="red", fg="white", bold=True)
+        click.secho("1====> Fix file <data/sample_data.json>", bg="red", fg="white", bold=True)
+        click.secho("2====> Run *~HaTraBa~* again", bg="red", fg="white", bold=True)
+        click.secho("########################################", bg="red", fg="white", bold=True)
+        sys.exit(1)
     except Exception as e:
         # Inform user: Return error if unexpected error occurred and exit application
         click.secho("################# ERROR #################", bg="red", fg="white", bold=True)
@@ -105,17 +165,56 @@ def initialize_database():
         sys.exit(1)
 
 
-def callback(test):
+def print_startup_profile(command_name, init_duration, startup_duration):
+    """Print startup profile (durations since start of module habit_tracker) to stderr."""
+    command_duration = cli.load_durations.get(command_name, 0.0)
+    click.echo("############# STARTUP PROFILE #############", err=True)
+    click.echo(f"Imports:                 {import_duration * 1000:9.2f} ms", err=True)
+    click.echo(f"Command loading ({command_name}): {command_duration * 1000:.2f} ms", err=True)
+    click.echo(f"Database initialization: {init_duration * 1000:9.2f} ms", err=True)
+    click.echo(f"Startup (until command): {startup_duration * 1000:9.2f} ms", err=True)
+    click.echo(f"Total:                   {(time.perf_counter() - startup_time) * 1000:9.2f} ms", err=True)
+    click.echo("###########################################", err=True)
+
+
+def write_timings(to_stderr, json_path):
+    """Disable instrumentation and write its report to stderr (table) and/or to a JSON file."""
+    timings.disable()
+    timings_report = timings.report()
+    if to_stderr:
+        click.echo(timings.format_report(timings_report), err=True)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump(timings_report, json_file, indent=4)
+
+
+def callback(test, profile_startup, timings_enabled, timings_json):
     # Init application conf
     if test:
         conf.db_name = "test_habitdb"
     else:
         conf.db_name = "habitdb"
     # Initialize db if necessary
-    initialize_database()
-
-
-cli = MyCLI(params=[click.Option(("--test",), is_flag=True, default=False, help="Run in test mode")],
+    init_start = time.perf_counter()
+    with timings.span("initialize_database"):
+        initialize_database()
+    if profile_startup:
+        # Report startup profile once the command has finished
+        ctx = click.get_current_context()
+        ctx.call_on_close(lambda: print_startup_profile(ctx.invoked_subcommand, time.perf_counter() - init_start,
+                                                        time.perf_counter() - startup_time))
+
+
+cli = MyCLI(params=[click.Option(("--test",), is_flag=True, default=False, help="Run in test mode"),
+                    click.Option(("--profile-startup",), is_flag=True, default=False,
+                                 help="Report startup durations (imports, command loading, database initialization) "
+                                      "to stderr"),
+                    click.Option(("--timings", "timings_enabled"), is_flag=True, default=False,
+                                 help="Report durations of the phases of the command (e.g. database opening, "
+                                      "loading, analytics, rendering) and counters of loaded habits and check "
+                                      "offs to stderr"),
+                    click.Option(("--timings-json",), type=click.Path(dir_okay=False, writable=True), default=None,
+                                 help="Write the timings report as JSON to this file")],
             callback=callback,
             help=f"Welcome to *~HaTraBa~* (Version 1.0.0) - a CLI-based habit tracking backend!")
 
@@ -0,0 +1,143 @@
+"""Parallel analytics and habit lists on a pool of worker processes (option --workers of the commands).
+
+Habits are sharded into pages (limit/offset). Each worker opens the habit database itself and loads
+only the pages it is given, so no habit objects are pickled between processes: workers return
+rendered output (or plain values) of their page. Results are merged in page order, so the output is
+the same as of a single process.
+
+Pages are loaded with Storage.list_habits and Storage.summaries. The SQLite backend reads only the
+rows of a page. The shelve backend has no index to page by: each page goes through Storage.items and
+unpickles the whole database, so the workers * PAGES_PER_WORKER pages cost as many full scans. Use
+several workers with the SQLite backend only.
+"""
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import app_config as conf
+import storage
+
+# Pages per worker, more pages balance the load and let the first results arrive earlier
+PAGES_PER_WORKER = 4
+
+# Habit database of a worker process, opened by _init_worker
+_habits_db = None
+
+
+def _init_worker(backend, path):
+    """Open the habit database in the worker process."""
+    global _habits_db
+    _habits_db = storage.BACKENDS[backend](path)
+
+
+def _render_page(periodicity, limit, offset, output):
+    """Load a page of habits and render it.
+
+    Returns the habits as JSON array elements joined by separators (JSON), as NDJSON lines (NDJSON) or
+    as list of dictionaries (HUMAN).
+    """
+    habit_dicts = (habit.to_custom_dict() for habit in _habits_db.list_habits(periodicity, limit, offset))
+    if output == "JSON":
+        return ",\n    ".join(json.dumps(item, indent=4, sort_keys=False).replace("\n", "\n    ")
+                               for item in habit_dicts)
+    if output == "NDJSON":
+        return "".join(json.dumps(item, sort_keys=False) + "\n" for item in habit_dicts)
+    return list(habit_dicts)
+
+
+def _longest_streak_of_page(limit, offset):
+    """Load streak statistics of a page of habits and return their longest streak."""
+    return max((summary.longest_streak for _, summary in _habits_db.summaries(limit, offset)), default=0)
+
+
+def _pages(count, limit, offset, workers):
+    """Split the habits selected by limit and offset into pages, returned as (limit, offset) pairs."""
+    end = count if limit <= 0 else min(count, offset + limit)
+    if end <= offset:
+        return []
+    page_size = math.ceil((end - offset) / (workers * PAGES_PER_WORKER))
+    return [(min(page_size, end - start), start) for start in range(offset, end, page_size)]
+
+
+def _create_pool(workers):
+    """Create a pool of worker processes, each with its own connection to the configured habit database."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(conf.db_backend, storage.get_path()))
+
+
+def validate_workers(workers):
+    """Raise ValueError if given number of workers is not positive."""
+    if workers < 1:
+        raise ValueError(f"Number of workers (given {workers}) must be positive")
+
+
+def list_habits(workers, output, periodicity=None, limit=0, offset=0):
+    """Yield habits of the configured habit database, rendered by a pool of worker processes.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes.
+    output : str
+        JSON or NDJSON (text chunks are yielded, equal to the output of a single process) or HUMAN
+        (dictionaries of habits are yielded, see Habit.to_custom_dict).
+    periodicity : str, optional
+        Name of periodicity to filter by. Default is no filter.
+    limit : int, optional
+        Maximum number of habits to return. Default (0) is no limit.
+    offset : int, optional
+        Number of habits to skip. Default is 0.
+
+    Yields
+    ------
+    str or dict
+        Output chunks (JSON, NDJSON) or habit dictionaries (HUMAN), in order of creation date, the most
+        recently created habit first.
+    """
+    habits_db = storage.open_storage()
+    count = habits_db.count(periodicity)
+    habits_db.close()
+    pages = _pages(count, limit, offset, workers)
+    if not pages:
+        if output == "JSON":
+            yield "[]\n"
+        return
+    with _create_pool(workers) as pool:
+        # map returns results in page order, while pages are rendered in parallel
+        results = pool.map(_render_page, *zip(*((periodicity, page_limit, page_offset, output)
+                                                for page_limit, page_offset in pages)))
+        separator = "[\n    "
+        for result in results:
+            if output == "JSON":
+                if result:
+                    yield separator + result
+                    separator = ",\n    "
+            elif output == "NDJSON":
+                yield result
+            else:
+                yield from result
+        if output == "JSON":
+            yield "[]\n" if separator == "[\n    " else "\n]\n"
+
+
+def get_longest_streak(workers):
+    """Determine the longest streak of all habits of the configured habit database on a pool of workers.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes.
+
+    Returns
+    -------
+    int
+        Longest streak value.
+    """
+    habits_db = storage.open_storage()
+    count = habits_db.count()
+    habits_db.close()
+    pages = _pages(count, 0, 0, workers)
+    if not pages:
+        return 0
+    with _create_pool(workers) as pool:
+        return max(pool.map(_longest_streak_of_page, *zip(*pages)))
@@ -0,0 +1,212 @@
+"""Habit repository: habit storage with an in-process LRU cache of deserialized habits."""
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+import app_config as conf
+import storage
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Repositories of storages kept open across commands (server mode), by path
+_repositories = {}
+
+
+class HabitRepository:
+    """A class to represent the habits of a storage with an LRU cache of deserialized habits.
+
+    Habits read by id are kept in the cache, so repeated reads of the same habits skip loading and
+    deserialization. Writes through the repository update the cache. The cache is invalidated as a
+    whole once the data version of the storage changes, i.e. other processes changed the habits or
+    habits were written through the storage instead of the repository (e.g. by other commands sharing
+    the storage in server mode).
+
+    Habits returned by the repository are shared with the cache and must not be modified directly,
+    use check_off or save them again instead.
+
+    Attributes
+    ----------
+    habits_db : Storage
+        Underlying habit storage, e.g. for listings and analytics.
+    maxsize : int
+        Maximum number of cached habits (0 disables the cache).
+    hits : int
+        Number of habit reads served from the cache.
+    misses : int
+        Number of habit reads loaded from the storage.
+
+    Methods
+    -------
+    check_off(habit_id, date):
+        Mark the given habit as completed (checked-off) and save it.
+
+    check_off_many(checkoffs):
+        Mark habits as completed at several timestamps and save each habit once.
+
+    cache_info():
+        Return cache statistics.
+
+    clear():
+        Remove all habits from the cache.
+
+    close():
+        Close the underlying storage.
+    """
+
+    def __init__(self, habits_db, maxsize=None):
+        """Create repository of given storage.
+
+        Parameters
+        ----------
+        habits_db : Storage
+            Opened habit storage.
+        maxsize : int, optional
+            Maximum number of cached habits. Default is *app_config.habit_cache_size*.
+        """
+        self.habits_db = habits_db
+        self.maxsize = conf.habit_cache_size if maxsize is None else maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._data_version = habits_db.data_version()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getitem__(self, habit_id):
+        self._validate()
+        habit = self._cache.get(habit_id)
+        if habit is not None:
+            self._cache.move_to_end(habit_id)
+            self.hits += 1
+            return habit
+        self.misses += 1
+        habit = self.habits_db[habit_id]
+        self._put(habit_id, habit)
+        return habit
+
+    def __setitem__(self, habit_id, habit):
+        self.save(habit_id, habit)
+
+    def __delitem__(self, habit_id):
+        with self._writing():
+            self._cache.pop(habit_id, None)
+            del self.habits_db[habit_id]
+
+    def __contains__(self, habit_id):
+        self._validate()
+        return habit_id in self._cache or habit_id in self.habits_db
+
+    def save(self, habit_id, habit):
+        """Save given habit in the storage and the cache.
+
+        Parameters
+        ----------
+        habit_id : str
+            Id of habit.
+        habit : Habit
+            Habit to save.
+        """
+        with self._writing():
+            self._cache.pop(habit_id, None)
+            self.habits_db[habit_id] = habit
+        self._put(habit_id, habit)
+
+    def check_off(self, habit_id, date):
+        """Mark the given habit as completed (checked-off) and save it, see Storage.check_off.
+
+        Returns
+        -------
+        Habit
+            Checked off habit.
+        """
+        with self._writing():
+            # Dropped first, the storage might have changed the habit even if the check off fails
+            self._cache.pop(habit_id, None)
+            habit = self.habits_db.check_off(habit_id, date)
+        self._put(habit_id, habit)
+        return habit
+
+    def check_off_many(self, checkoffs):
+        """Mark habits as completed at several timestamps and save each habit once, see Storage.check_off_many.
+
+        Returns
+        -------
+        int
+            Number of added check offs.
+        """
+        with self._writing():
+            for habit_id in checkoffs:
+                self._cache.pop(habit_id, None)
+            return self.habits_db.check_off_many(checkoffs)
+
+    def cache_info(self):
+        """Return cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            Hits, misses, maximum and current number of cached habits.
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def clear(self):
+        """Remove all habits from the cache (statistics are kept)."""
+        self._cache.clear()
+
+    def close(self):
+        """Close the underlying storage (ignored while the storage is kept open)."""
+        self.habits_db.close()
+
+    def _validate(self):
+        """Invalidate the cache if the habits have been changed by other processes."""
+        data_version = self.habits_db.data_version()
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    @contextmanager
+    def _writing(self):
+        """Write within the context in one transaction of the storage, the cache stays valid afterwards.
+
+        Other processes cannot write within the transaction, so the data version read at its end differs
+        from the one validated at its start by the writes of the context only. If the context fails, the
+        data version is not updated and the next read invalidates the cache.
+        """
+        with self.habits_db.transaction():
+            self._validate()
+            yield
+            self._data_version = self.habits_db.data_version()
+
+    def _put(self, habit_id, habit):
+        """Add habit to the cache, evicting the least recently used habits beyond maxsize."""
+        if self.maxsize <= 0:
+            return
+        self._cache[habit_id] = habit
+        self._cache.move_to_end(habit_id)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+
+def open_repository():
+    """Open the repository of the configured habit database.
+
+    While the storage is kept open across commands (server mode, see storage.open_storage), the same
+    repository and thus its cache is returned again.
+
+    Returns
+    -------
+    HabitRepository
+        Repository of the storage returned by storage.open_storage.
+    """
+    habits_db = storage.open_storage()
+    if not habits_db.keep_open:
+        return HabitRepository(habits_db)
+    path = storage.get_path()
+    habit_repository = _repositories.get(path)
+    if habit_repository is None or habit_repository.habits_db is not habits_db:
+        habit_repository = HabitRepository(habits_db)
+        _repositories[path] = habit_repository
+    return habit_repository
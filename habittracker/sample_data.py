@@ -0,0 +1,265 @@
+"""Sample data (file data/sample_data.json) to seed the habit database with at first run.
+
+The file holds a JSON object with key *sample_data*, a list of habits with name, description,
+periodicity and checkoffs (format "%Y-%m-%d %H:%M:%S.%f")::
+
+    {"sample_data": [{"name": "...", "description": "...", "periodicity": "DAILY",
+                      "checkoffs": ["2020-12-01 08:00:00.000000", ...]}]}
+
+The file is validated completely before any habit is written, and all habits are written within one
+transaction, so a failed seeding leaves no partially seeded database behind.
+
+Synthetic sample data of any size is created by generate (see command generate-sample-data).
+"""
+import json
+import math
+import random
+from array import array
+
+import timestamp_codec
+from habit import Habit, MICROSECONDS_PER_DAY
+
+FILE_NAME = "sample_data.json"
+# First check off of generated habits: 2000-01-01 09:00:00
+GENERATE_START = 946717200000000
+STREAK_DISTRIBUTIONS = ("UNIFORM", "GEOMETRIC")
+
+
+class SampleHabit:
+    """A class to represent a validated habit of the sample data.
+
+    Attributes
+    ----------
+    name : str
+        Name of the habit.
+    description : str
+        Description of the habit.
+    periodicity : str
+        Name of the periodicity of the habit.
+    checkoff_timestamps : array of int
+        Sorted (ascending) unique check off timestamps as microseconds since epoch.
+    """
+    __slots__ = ("name", "description", "periodicity", "checkoff_timestamps")
+
+    def __init__(self, name, description, periodicity, checkoff_timestamps):
+        self.name = name
+        self.description = description
+        self.periodicity = periodicity
+        self.checkoff_timestamps = checkoff_timestamps
+
+    def to_dict(self):
+        """Return habit in the schema of the sample data file."""
+        return {"name": self.name, "description": self.description, "periodicity": self.periodicity,
+                "checkoffs": timestamp_codec.format_many(self.checkoff_timestamps)}
+
+    def to_habit(self, habit_id=None, created=None):
+        """Create habit with the check offs of this sample habit.
+
+        Parameters
+        ----------
+        habit_id : str, optional
+            Id of habit. Default is a new id.
+        created : str, optional
+            Creation timestamp of habit. Default is now.
+
+        Returns
+        -------
+        Habit
+            Habit object.
+        """
+        habit = Habit(self.name, self.description, self.periodicity)
+        # Check offs are sorted and unique already, the streak statistics are calculated in one pass
+        return Habit.from_record(habit.id if habit_id is None else habit_id, habit.name, habit.description,
+                                 habit.periodicity.name, habit.created if created is None else created,
+                                 array("q", self.checkoff_timestamps))
+
+
+def load(path):
+    """Load and validate sample data file.
+
+    Parameters
+    ----------
+    path : str
+        Path of sample data file.
+
+    Returns
+    -------
+    list of SampleHabit
+        Validated habits of the sample data.
+
+    Raises
+    ------
+    json.JSONDecodeError
+        If the file is not valid JSON.
+    ValueError
+        If the content does not match the sample data schema.
+    """
+    with open(path, encoding="utf-8") as json_file:
+        return validate(json.load(json_file))
+
+
+def validate(data):
+    """Validate sample data in one pass and parse the check offs of each habit.
+
+    Parameters
+    ----------
+    data : dict
+        Decoded content of a sample data file.
+
+    Returns
+    -------
+    list of SampleHabit
+        Validated habits of the sample data.
+
+    Raises
+    ------
+    ValueError
+        If the content does not match the sample data schema, a periodicity is unknown, a check off
+        does not match format or a habit has been checked off twice at the same time.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("sample_data"), list):
+        raise ValueError("Object with list 'sample_data' expected")
+    sample_habits = []
+    for index, item in enumerate(data["sample_data"]):
+        if not isinstance(item, dict):
+            raise ValueError(f"Habit {index}: object expected")
+        for key in ("name", "description", "periodicity"):
+            if not isinstance(item.get(key), str):
+                raise ValueError(f"Habit {index}: string '{key}' expected")
+        periodicity = item["periodicity"].upper()
+        if periodicity not in Habit.Periodicity.__members__:
+            raise ValueError(f"Habit {index}: invalid periodicity {item['periodicity']}")
+        checkoffs = item.get("checkoffs", [])
+        if not isinstance(checkoffs, list):
+            raise ValueError(f"Habit {index}: list 'checkoffs' expected")
+        try:
+            checkoff_timestamps = array("q", sorted(timestamp_codec.parse_many(checkoffs)))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Habit {index}: invalid check off: {e}") from None
+        for position in range(1, len(checkoff_timestamps)):
+            if checkoff_timestamps[position] == checkoff_timestamps[position - 1]:
+                raise ValueError(f"Habit {index}: checked off twice at "
+                                 f"{timestamp_codec.format(checkoff_timestamps[position])}")
+        sample_habits.append(SampleHabit(item["name"], item["description"], periodicity, checkoff_timestamps))
+    return sample_habits
+
+
+def generate(habit_count, checkoff_count, seed=42, weekly_share=0.3, streak_length=(1, 30),
+             streak_distribution="UNIFORM", gap=(1, 3), duplicate_share=0.0):
+    """Return synthetic sample habits, reproducible from the seed.
+
+    Check offs of each habit follow streaks (check offs in consecutive periods) separated by gaps of
+    periods without check offs, at random times of day between 09:00 and 21:00, starting at 2000-01-01.
+    Habits are yielded one by one, so memory does not depend on the number of habits.
+
+    Parameters
+    ----------
+    habit_count : int
+        Number of habits.
+    checkoff_count : int
+        Number of check offs per habit.
+    seed : int, optional
+        Seed of the random generator, the same seed (and parameters) yields the same habits. Default 42.
+    weekly_share : float, optional
+        Share of weekly habits, the others are daily. Default 0.3.
+    streak_length : tuple of (int, int), optional
+        Minimum and maximum streak length in periods. Default (1, 30).
+    streak_distribution : str, optional
+        Distribution of streak lengths between minimum and maximum: UNIFORM (default) or GEOMETRIC
+        (short streaks frequent, mean length halfway between minimum and maximum before capping).
+    gap : tuple of (int, int), optional
+        Minimum and maximum number of periods without check offs between streaks. Default (1, 3).
+    duplicate_share : float, optional
+        Share of check offs followed by another check off in the same period (a second completion
+        later that day, which does not extend the streak). Default 0.
+
+    Returns
+    -------
+    iterator of SampleHabit
+        Generated habits, generated one by one while iterating.
+
+    Raises
+    ------
+    ValueError
+        If a parameter is out of range (before any habit is generated).
+    """
+    if habit_count < 0 or checkoff_count < 0:
+        raise ValueError("Numbers of habits and check offs must not be negative")
+    if not 0 <= weekly_share <= 1 or not 0 <= duplicate_share < 1:
+        raise ValueError("Weekly share must be within [0, 1] and duplicate share within [0, 1)")
+    if not 1 <= streak_length[0] <= streak_length[1] or not 0 <= gap[0] <= gap[1]:
+        raise ValueError(f"Invalid streak length {streak_length} or gap {gap} (minimum, maximum)")
+    if streak_distribution not in STREAK_DISTRIBUTIONS:
+        raise ValueError(f"Invalid streak distribution {streak_distribution}")
+    return _generate(habit_count, checkoff_count, random.Random(seed), weekly_share, streak_length,
+                     streak_distribution, gap, duplicate_share)
+
+
+def _generate(habit_count, checkoff_count, rng, weekly_share, streak_length, streak_distribution, gap,
+              duplicate_share):
+    """Yield synthetic sample habits with validated parameters, see generate."""
+    # Success probability of the geometric distribution with the requested mean
+    mean_excess = (streak_length[1] - streak_length[0]) / 2
+    log_failure = math.log(mean_excess / (mean_excess + 1)) if mean_excess > 0 else None
+    for index in range(habit_count):
+        periodicity = "WEEKLY" if rng.random() < weekly_share else "DAILY"
+        period_length = Habit.Periodicity[periodicity].days * MICROSECONDS_PER_DAY
+        checkoff_timestamps = array("q")
+        period = 0
+        while len(checkoff_timestamps) < checkoff_count:
+            if streak_distribution == "UNIFORM" or log_failure is None:
+                length = rng.randint(*streak_length)
+            else:
+                # Inversion of the geometric distribution, capped at the maximum
+                length = min(streak_length[1], streak_length[0] + int(math.log(1.0 - rng.random()) / log_failure))
+            for _ in range(length):
+                if len(checkoff_timestamps) >= checkoff_count:
+                    break
+                microseconds = GENERATE_START + period * period_length + rng.randrange(12 * 3600) * 1000000
+                checkoff_timestamps.append(microseconds)
+                if (duplicate_share and len(checkoff_timestamps) < checkoff_count
+                        and rng.random() < duplicate_share):
+                    # Later on the same day (before 22:00), thus in the same period
+                    checkoff_timestamps.append(microseconds + rng.randrange(1, 3600) * 1000000)
+                period += 1
+            period += rng.randint(*gap)
+        yield SampleHabit(f"habit {index}", f"synthetic habit {index}", periodicity, checkoff_timestamps)
+
+
+def dump_json(sample_habits):
+    """Yield chunks of a sample data file (JSON) holding given habits, streamed habit by habit."""
+    separator = '{"sample_data": [\n'
+    for sample_habit in sample_habits:
+        yield separator + json.dumps(sample_habit.to_dict())
+        separator = ",\n"
+    yield '{"sample_data": []}\n' if separator != ",\n" else "\n]}\n"
+
+
+def dump_ndjson(sample_habits):
+    """Yield lines of NDJSON, one habit (schema of the sample data file) per line."""
+    for sample_habit in sample_habits:
+        yield json.dumps(sample_habit.to_dict()) + "\n"
+
+
+def seed(habits_db, sample_habits):
+    """Create habits of given sample data in given storage within one transaction.
+
+    Parameters
+    ----------
+    habits_db : Storage
+        Opened habit storage.
+    sample_habits : iterable of SampleHabit
+        Validated habits of the sample data.
+
+    Returns
+    -------
+    int
+        Number of created habits.
+    """
+    count = 0
+    with habits_db.transaction():
+        for sample_habit in sample_habits:
+            habit = sample_habit.to_habit()
+            habits_db[habit.id] = habit
+            count += 1
+    return count
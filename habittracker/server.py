@@ -0,0 +1,129 @@
+"""Server mode: run commands sent by clients over a Unix socket within one long-running process.
+
+The process pays interpreter start, command loading and database opening only once: storages are kept
+open across commands (see *storage.open_storage*). Clients send one JSON document per line::
+
+    {"args": ["checkoff", "-h", "<habit id>"]}
+
+and receive one JSON document per line::
+
+    {"stdout": "...", "stderr": "...", "exit_code": 0}
+
+Commands are run one after another, so commands of several clients never interleave.
+"""
+import io
+import json
+import os
+import socket
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+
+import app_config as conf
+import storage
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Handle all requests of one client connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                args = json.loads(line)["args"]
+                if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+                    raise ValueError("Arguments must be a list of strings")
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"stdout": "", "stderr": f"Invalid request: {e}\n", "exit_code": 2}
+            else:
+                response = self.server.run_command(args)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class HabitServer(socketserver.UnixStreamServer):
+    """Server running commands of the given click command group for clients of a Unix socket.
+
+    Attributes
+    ----------
+    command : click.MultiCommand
+        Command group used to run the requested commands.
+    socket_path : str
+        Path of the Unix socket.
+
+    Methods
+    -------
+    run_command(args):
+        Run command with given command line arguments and return its output and exit code.
+    """
+
+    def __init__(self, socket_path, command):
+        """Bind the Unix socket and keep storages open from now on.
+
+        Parameters
+        ----------
+        socket_path : str
+            Path of the Unix socket. A stale socket file of a former server is replaced.
+        command : click.MultiCommand
+            Command group used to run the requested commands.
+
+        Raises
+        ------
+        ValueError
+            If a server is already listening on the given socket.
+        """
+        remove_stale_socket(socket_path)
+        self.command = command
+        self.socket_path = socket_path
+        super().__init__(socket_path, CommandHandler)
+        conf.keep_storage_open = True
+
+    def run_command(self, args):
+        """Run command with given command line arguments and return its output and exit code.
+
+        Parameters
+        ----------
+        args : list of str
+            Command line arguments, e.g. ["--test", "list-habits"].
+
+        Returns
+        -------
+        dict
+            Captured output of the command (keys *stdout*, *stderr*) and its *exit_code*.
+        """
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                self.command.main(args, prog_name="habit_tracker.py")
+                exit_code = 0
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+            except Exception as e:
+                print(f"{type(e).__name__}: {e}", file=stderr)
+                exit_code = 1
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+    def server_close(self):
+        """Close the socket and all storages kept open."""
+        super().server_close()
+        conf.keep_storage_open = False
+        storage.close_storages()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def remove_stale_socket(socket_path):
+    """Remove socket file of a former server, which is not listening anymore.
+
+    Raises
+    ------
+    ValueError
+        If a server is listening on the given socket.
+    """
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+            return
+    raise ValueError(f"Server is already running on socket {socket_path}")
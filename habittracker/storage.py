@@ -0,0 +1,1054 @@
+import os
+import dbm
+import shelve
+import sqlite3
+import struct
+import heapq
+from abc import ABC, abstractmethod
+from array import array
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, the shelve backend is not locked there
+    fcntl = None
+
+import app_config as conf
+import timings
+from habit import Habit, StreakSummary, to_microseconds
+
+
+class Storage(ABC):
+    """Abstract base class of habit storages.
+
+    Storages offer a shelf like interface (*habits_db[habit_id]*, *habits_db[habit_id] = habit*,
+    *del habits_db[habit_id]*, *habits_db.items()*) plus dedicated operations that backends can implement
+    more efficiently than loading and saving whole habits.
+
+    Backends implement the abstract methods (exists, __getitem__, __setitem__, __delitem__, items, files,
+    data_version and close), the other methods are based on them and may be overridden.
+
+    Methods
+    -------
+    items():
+        Return all habits as (habit_id, Habit) pairs.
+
+    list_habits(periodicity, limit, offset):
+        Return habits ordered by creation date (most recent first), filtered and paged.
+
+    count(periodicity):
+        Return number of habits, optionally filtered by periodicity.
+
+    list_habits_between(start, end, periodicity, limit, offset):
+        Return habits checked off within a time range, holding the check offs of the range only.
+
+    summaries(limit, offset, periodicity):
+        Return streak statistics of habits, ordered, filtered and paged.
+
+    checkoff_columns():
+        Return the check offs of all habits as columns (see module columnar).
+
+    checkoffs_between(start, end):
+        Return the check offs within a time range as columns.
+
+    check_off(habit_id, date):
+        Mark the given habit as completed (checked-off) and save it.
+
+    check_off_many(checkoffs):
+        Mark habits as completed at several timestamps and save each habit once.
+
+    transaction():
+        Context manager grouping several writes into one transaction.
+
+    compact():
+        Compact the storage (if supported by the backend).
+
+    files():
+        Return paths of the files of the storage.
+
+    data_version():
+        Return a value that changes whenever the habits are changed.
+
+    close():
+        Close the storage (ignored while the storage is kept open, see *keep_open*).
+    """
+    # Kept open across commands in server mode, close() is ignored then
+    keep_open = False
+    # Number of writes through this storage object, part of the data version
+    _writes = 0
+
+    @classmethod
+    @abstractmethod
+    def exists(cls, path):
+        """Return whether a database of this backend exists at given path (without file extension)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def __getitem__(self, habit_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def __setitem__(self, habit_id, habit):
+        raise NotImplementedError
+
+    @abstractmethod
+    def __delitem__(self, habit_id):
+        raise NotImplementedError
+
+    def __contains__(self, habit_id):
+        try:
+            self[habit_id]
+        except KeyError:
+            return False
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @abstractmethod
+    def items(self):
+        """Return all habits.
+
+        Returns
+        -------
+        iterable of (str, Habit)
+            All stored habits as (habit_id, Habit) pairs.
+        """
+        raise NotImplementedError
+
+    @timings.timed("storage.load")
+    def list_habits(self, periodicity=None, limit=0, offset=0):
+        """Return habits ordered by creation date, with the most recently created habit first.
+
+        Filtering, ordering and paging happen before habits are returned, so backends only need to
+        load the requested page. This default implementation selects the page with a heap.
+
+        Parameters
+        ----------
+        periodicity : str, optional
+            Name of periodicity to filter by. Default is no filter.
+        limit : int, optional
+            Maximum number of habits to return. Default (0) is no limit.
+        offset : int, optional
+            Number of habits to skip. Default is 0.
+
+        Returns
+        -------
+        iterable of Habit
+            Requested habits.
+        """
+        habits = (habit for _, habit in self.items() if periodicity is None or habit.periodicity.name == periodicity)
+        if limit > 0:
+            return heapq.nlargest(offset + limit, habits, key=lambda habit: habit.created)[offset:]
+        return sorted(habits, key=lambda habit: habit.created, reverse=True)[offset:]
+
+    def list_habits_between(self, start=None, end=None, periodicity=None, limit=0, offset=0):
+        """Return habits checked off within the given time range, holding the check offs of the range only.
+
+        Habits are found by the time index (see checkoffs_between), only these habits are loaded.
+
+        Parameters
+        ----------
+        start : int, optional
+            Start of range (inclusive) as microseconds since epoch. Default is no lower bound.
+        end : int, optional
+            End of range (exclusive) as microseconds since epoch. Default is no upper bound.
+        periodicity : str, optional
+            Name of periodicity to filter by. Default is no filter.
+        limit : int, optional
+            Maximum number of habits to return. Default (0) is no limit.
+        offset : int, optional
+            Number of habits to skip. Default is 0.
+
+        Returns
+        -------
+        list of Habit
+            Requested habits (see Habit.between), with the most recently created habit first.
+        """
+        habit_ids, period_days, _, _ = self.checkoffs_between(start, end)
+        days = None if periodicity is None else Habit.Periodicity[periodicity].days
+        habits = [self[habit_id].between(start, end) for habit_id, habit_days in zip(habit_ids, period_days)
+                  if days is None or habit_days == days]
+        habits.sort(key=lambda habit: habit.created, reverse=True)
+        return habits[offset:offset + limit] if limit > 0 else habits[offset:]
+
+    def count(self, periodicity=None):
+        """Return number of habits.
+
+        Parameters
+        ----------
+        periodicity : str, optional
+            Name of periodicity to filter by. Default is no filter.
+
+        Returns
+        -------
+        int
+            Number of stored habits (of given periodicity).
+        """
+        return sum(1 for _, habit in self.items() if periodicity is None or habit.periodicity.name == periodicity)
+
+    @timings.timed("storage.load_summaries")
+    def summaries(self, limit=0, offset=0, periodicity=None):
+        """Return streak statistics of habits.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Maximum number of habits to return. Default (0) is no limit.
+        offset : int, optional
+            Number of habits to skip. Default is 0.
+        periodicity : str, optional
+            Name of periodicity to filter by. Default is no filter.
+
+        Returns
+        -------
+        iterable of (str, StreakSummary)
+            Streak statistics of stored habits as (habit_id, StreakSummary) pairs, in a stable order so
+            that pages can be processed independently.
+        """
+        summaries = sorted(((habit_id, habit.summary) for habit_id, habit in self.items()
+                            if periodicity is None or habit.periodicity.name == periodicity), key=lambda item: item[0])
+        return summaries[offset:offset + limit] if limit > 0 else summaries[offset:]
+
+    @timings.timed("storage.load_columns")
+    def checkoff_columns(self):
+        """Return the check offs of all habits as columns.
+
+        Returns
+        -------
+        tuple of (list of str, array of int, array of int, array of int)
+            Habit ids, period length in days of each habit, check off timestamps (microseconds since
+            epoch, ordered by habit and timestamp) and habit index (into habit ids) of each check off.
+        """
+        habit_ids = []
+        period_days = array("q")
+        timestamps = array("q")
+        habit_indexes = array("i")
+        for habit_id, habit in sorted(self.items(), key=lambda item: item[0]):
+            habit_indexes.extend(array("i", [len(habit_ids)]) * len(habit.checkoff_timestamps))
+            timestamps.extend(habit.checkoff_timestamps)
+            habit_ids.append(habit_id)
+            period_days.append(habit.periodicity.days)
+        return habit_ids, period_days, timestamps, habit_indexes
+
+    @timings.timed("storage.load_range")
+    def checkoffs_between(self, start=None, end=None):
+        """Return the check offs of all habits within the given time range as columns.
+
+        Habits without check offs in the range are omitted, so the habit ids are the habits checked off
+        within the range. Backends answer the query with a time index in O(log n + k) for k of n check
+        offs, this default implementation filters the columns of all check offs.
+
+        Parameters
+        ----------
+        start : int, optional
+            Start of range (inclusive) as microseconds since epoch. Default is no lower bound.
+        end : int, optional
+            End of range (exclusive) as microseconds since epoch. Default is no upper bound.
+
+        Returns
+        -------
+        tuple of (list of str, array of int, array of int, array of int)
+            Columns like checkoff_columns: habit ids, period length in days of each habit, check off
+            timestamps (ordered by habit and timestamp) and habit index of each check off.
+        """
+        all_habit_ids, all_period_days, all_timestamps, all_habit_indexes = self.checkoff_columns()
+        habit_ids = []
+        period_days = array("q")
+        timestamps = array("q")
+        habit_indexes = array("i")
+        last_index = None
+        for timestamp, index in zip(all_timestamps, all_habit_indexes):
+            if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                continue
+            if index != last_index:
+                last_index = index
+                habit_ids.append(all_habit_ids[index])
+                period_days.append(all_period_days[index])
+            timestamps.append(timestamp)
+            habit_indexes.append(len(habit_ids) - 1)
+        return habit_ids, period_days, timestamps, habit_indexes
+
+    @timings.timed("storage.check_off")
+    def check_off(self, habit_id, date):
+        """Mark the given habit as completed (checked-off) and save it.
+
+        Parameters
+        ----------
+        habit_id : str
+            Id of habit.
+        date : str
+            Completion timestamp (format "%Y-%m-%d %H:%M:%S.%f").
+
+        Returns
+        -------
+        Habit
+            Checked off habit.
+
+        Raises
+        ------
+        KeyError
+            If habit with given id does not exist.
+        ValueError
+            If habit has been already checked off at given timestamp or date does not match format.
+        """
+        habit = self[habit_id]
+        habit.check_off(date)
+        self[habit.id] = habit
+        return habit
+
+    @timings.timed("storage.check_off")
+    def check_off_many(self, checkoffs):
+        """Mark habits as completed at several timestamps and save each habit once, within one transaction.
+
+        Parameters
+        ----------
+        checkoffs : dict
+            Completion timestamps (iterable of microseconds since epoch) by habit id. Timestamps a habit
+            has already been checked off at are skipped.
+
+        Returns
+        -------
+        int
+            Number of added check offs.
+
+        Raises
+        ------
+        KeyError
+            If a habit id is invalid, no habit is changed then.
+        """
+        # Load all habits first, so an invalid habit id fails before any write
+        habits = [self[habit_id] for habit_id in checkoffs]
+        added = 0
+        with self.transaction():
+            for habit in habits:
+                added += len(habit.check_off_many(checkoffs[habit.id]))
+                self[habit.id] = habit
+        return added
+
+    @contextmanager
+    def transaction(self):
+        """Group all writes within the context into one transaction (if supported by the backend)."""
+        yield self
+
+    def compact(self):
+        """Compact the storage (if supported by the backend)."""
+
+    @abstractmethod
+    def files(self):
+        """Return paths of the files of the storage (some may not exist)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def data_version(self):
+        """Return a value that changes whenever the habits are changed.
+
+        The value is a tuple of a version changed by other processes (or connections) and the number of
+        writes through this storage object, so callers sharing this storage object (server mode) notice
+        the writes of each other. Callers keeping data they changed themselves read the value again
+        within the transaction of their writes (see repository.HabitRepository).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        """Close the storage."""
+        raise NotImplementedError
+
+
+class ShelveStorage(Storage):
+    """Habit storage based on shelve (pickled habits, files .dat/.dir/.bak), used by former versions.
+
+    Check offs are appended to a log (file .log) instead of pickling the whole habit again, so a check
+    off writes a few bytes regardless of the length of the habit's history. Habits are materialized by
+    merging the pickled habit with its logged check offs. A habit with *HABIT_COMPACT_THRESHOLD* logged
+    check offs is pickled again, which bounds the cost of merging. Once the log holds
+    *COMPACT_THRESHOLD* records, logged check offs are merged into the pickled habits and the log is
+    truncated.
+
+    Concurrent processes are synchronized by a lock file (file .lock): operations reading habits hold
+    a shared lock, operations writing habits (including the whole read-modify-write of a check off) an
+    exclusive lock. Changes of other processes are loaded when the lock is acquired.
+    """
+    LOG_FILE_EXTENSION = ".log"
+    LOCK_FILE_EXTENSION = ".lock"
+    # Log record header: timestamp (microseconds since epoch) and length of the following habit id
+    LOG_RECORD = struct.Struct("<qH")
+    # Timestamp of a record discarding the logged check offs of its habit (habit saved or deleted)
+    LOG_RESET = -2 ** 63
+    COMPACT_THRESHOLD = 4096
+    HABIT_COMPACT_THRESHOLD = 64
+
+    def __init__(self, path):
+        """Open (or create) shelve database at given path.
+
+        Parameters
+        ----------
+        path : str
+            Path of database without file extension.
+        """
+        self._path = path
+        self._shelf = None
+        # Unbuffered, each record is appended by a single write
+        self._log = open(path + self.LOG_FILE_EXTENSION, "a+b", buffering=0)
+        # Logged check offs (microseconds since epoch) by habit id, and number of log records
+        self._logged_checkoffs = {}
+        self._log_records = 0
+        self._lock_file = open(path + self.LOCK_FILE_EXTENSION, "a+b")
+        self._lock_depth = 0
+        self._locked_shared = False
+        # Number of reloads due to changes of other processes
+        self._reloads = 0
+        # Size and modification time of the files as loaded, to detect changes of other processes
+        self._file_signature = None
+        # Shelf and log are loaded with the lock held
+        with self.transaction():
+            pass
+
+    @classmethod
+    def exists(cls, path):
+        # Index file of dbm.dumb (single stat), other dbm formats are detected by reading their files
+        return os.path.exists(path + ".dir") or bool(dbm.whichdb(path))
+
+    @timings.timed("storage.load")
+    def __getitem__(self, habit_id):
+        with self._locked(shared=True):
+            return self._merge_log(habit_id, self._shelf[habit_id])
+
+    @timings.timed("storage.save")
+    def __setitem__(self, habit_id, habit):
+        timings.count("habits.saved")
+        self._writes += 1
+        with self.transaction():
+            # The habit is saved with all its check offs, logged check offs must not be applied anymore
+            self._shelf[habit_id] = habit
+            self._reset_log(habit_id)
+
+    def __delitem__(self, habit_id):
+        self._writes += 1
+        with self.transaction():
+            del self._shelf[habit_id]
+            self._reset_log(habit_id)
+
+    def __contains__(self, habit_id):
+        with self._locked(shared=True):
+            return habit_id in self._shelf
+
+    @timings.timed_iteration("storage.load")
+    def items(self):
+        with self._locked(shared=True):
+            for habit_id, habit in self._shelf.items():
+                yield habit_id, self._merge_log(habit_id, habit)
+
+    @timings.timed("storage.check_off")
+    def check_off(self, habit_id, date):
+        self._writes += 1
+        # Load and check off under the exclusive lock, so concurrent check offs are not lost
+        with self.transaction():
+            habit = self[habit_id]
+            checkoff = habit.check_off(date)
+            # Only the new check off is written
+            self._append_log(habit, [to_microseconds(checkoff.timestamp)])
+            self._compact_if_needed()
+        return habit
+
+    @timings.timed("storage.check_off")
+    def check_off_many(self, checkoffs):
+        self._writes += 1
+        with self.transaction():
+            # Load all habits first, so an invalid habit id fails before any write
+            habits = [self[habit_id] for habit_id in checkoffs]
+            added = 0
+            for habit in habits:
+                added_timestamps = habit.check_off_many(checkoffs[habit.id])
+                self._append_log(habit, added_timestamps)
+                added += len(added_timestamps)
+            self._compact_if_needed()
+        return added
+
+    @timings.timed("storage.load_range")
+    def checkoffs_between(self, start=None, end=None):
+        # Time index of the columnar store, rebuilt once the shelf or the log changed. Deferred import,
+        # as module columnar depends on this module.
+        import columnar
+
+        with columnar.open_store(self, self._path + columnar.FILE_EXTENSION) as store:
+            return store.checkoffs_between(start, end)
+
+    def list_habits_between(self, start=None, end=None, periodicity=None, limit=0, offset=0):
+        # One shared lock for the lookup and all habits loaded
+        with self._locked(shared=True):
+            return super().list_habits_between(start, end, periodicity, limit, offset)
+
+    @contextmanager
+    def transaction(self):
+        # Writes within the context hold the exclusive lock, there is no rollback
+        with self._locked(shared=False):
+            yield self
+
+    def compact(self):
+        """Merge logged check offs into the pickled habits and truncate the log."""
+        with self.transaction():
+            for habit_id in self._logged_checkoffs:
+                self._shelf[habit_id] = self[habit_id]
+            self._sync()
+            # Replaying the log again after a crash before truncation is harmless, check offs are deduplicated
+            self._logged_checkoffs.clear()
+            self._log.truncate(0)
+            self._log_records = 0
+
+    def files(self):
+        return [self._path + extension for extension in (".dat", ".dir", self.LOG_FILE_EXTENSION)]
+
+    def data_version(self):
+        # Acquiring the lock reloads changes of other processes
+        with self._locked(shared=True):
+            return self._reloads, self._writes
+
+    def close(self):
+        if not self.keep_open:
+            self._shelf.close()
+            self._log.close()
+            self._lock_file.close()
+
+    @contextmanager
+    def _locked(self, shared):
+        """Hold the lock file (shared or exclusive) within the context and load changes of other processes.
+
+        Nested contexts keep the lock of the outermost one, so an exclusive lock must not be requested
+        within a shared one.
+        """
+        if self._lock_depth > 0:
+            if not shared and self._locked_shared:
+                raise RuntimeError("Exclusive lock of habit database requested within shared lock")
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        self._lock_depth = 1
+        self._locked_shared = shared
+        try:
+            self._reload_if_changed()
+            yield
+        finally:
+            self._lock_depth = 0
+            try:
+                if not shared and self._shelf is not None:
+                    # Publish changes (index of the shelf) before other processes acquire the lock
+                    self._sync()
+                    self._file_signature = self._get_file_signature()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _get_file_signature(self):
+        """Return size and modification time of the files of the shelf and of the log."""
+        signature = []
+        for file_path in self.files():
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns))
+        return signature
+
+    def _sync(self):
+        """Write the index of the shelf and mark the shelf as unmodified.
+
+        dbm.dumb never resets its modified flag, so it would write its index again on each sync and on
+        closing, e.g. when reloading after other processes wrote, overwriting their changes with an
+        outdated index.
+        """
+        self._shelf.sync()
+        if hasattr(self._shelf.dict, "_modified"):
+            self._shelf.dict._modified = False
+
+    def _reload_if_changed(self):
+        """Reopen the shelf and read the log again if their files changed since they were loaded."""
+        if self._shelf is not None and self._get_file_signature() == self._file_signature:
+            return
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
+            self._reloads += 1
+        self._shelf = shelve.open(self._path)
+        self._logged_checkoffs = {}
+        self._log_records = 0
+        self._read_log()
+        self._file_signature = self._get_file_signature()
+
+    def _read_log(self):
+        """Read logged check offs, dropping an incomplete last record (interrupted write)."""
+        self._log.seek(0)
+        data = self._log.read()
+        position = 0
+        while position + self.LOG_RECORD.size <= len(data):
+            timestamp, id_length = self.LOG_RECORD.unpack_from(data, position)
+            end = position + self.LOG_RECORD.size + id_length
+            if end > len(data):
+                break
+            habit_id = data[position + self.LOG_RECORD.size:end].decode("utf-8")
+            if timestamp == self.LOG_RESET:
+                self._logged_checkoffs.pop(habit_id, None)
+            else:
+                self._logged_checkoffs.setdefault(habit_id, array("q")).append(timestamp)
+            self._log_records += 1
+            position = end
+        if position < len(data):
+            self._log.truncate(position)
+
+    def _append_log(self, habit, timestamps):
+        """Append check offs (microseconds since epoch) of given habit to the log.
+
+        The habit (including the check offs) is pickled instead if it reaches HABIT_COMPACT_THRESHOLD
+        logged check offs.
+        """
+        if not timestamps:
+            return
+        logged_checkoffs = self._logged_checkoffs.setdefault(habit.id, array("q"))
+        if len(logged_checkoffs) + len(timestamps) >= self.HABIT_COMPACT_THRESHOLD:
+            self[habit.id] = habit
+            return
+        encoded_id = habit.id.encode("utf-8")
+        self._log.write(b"".join(self.LOG_RECORD.pack(timestamp, len(encoded_id)) + encoded_id
+                                 for timestamp in timestamps))
+        logged_checkoffs.extend(timestamps)
+        self._log_records += len(timestamps)
+
+    def _reset_log(self, habit_id):
+        """Discard logged check offs of given habit."""
+        if self._logged_checkoffs.pop(habit_id, None):
+            encoded_id = habit_id.encode("utf-8")
+            self._log.write(self.LOG_RECORD.pack(self.LOG_RESET, len(encoded_id)) + encoded_id)
+            self._log_records += 1
+
+    def _merge_log(self, habit_id, habit):
+        """Add logged check offs of given habit to it."""
+        logged_checkoffs = self._logged_checkoffs.get(habit_id)
+        if logged_checkoffs:
+            habit.check_off_many(logged_checkoffs)
+        return habit
+
+    def _compact_if_needed(self):
+        """Compact the storage once the log holds COMPACT_THRESHOLD records."""
+        if self._log_records >= self.COMPACT_THRESHOLD:
+            self.compact()
+
+
+class SQLiteStorage(Storage):
+    """Habit storage based on SQLite (file .sqlite).
+
+    Habits and checkoffs are stored in normalized tables, checkoffs as microseconds since epoch. Habits
+    hold their streak statistics, so analytics based on them need no checkoffs. The database runs in WAL
+    mode, so readers do not block the writer. Writes run in transactions holding the write lock from
+    their start (BEGIN IMMEDIATE), so a check off reads and updates the habit without concurrent
+    writers and no check off is lost.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS habits (
+            id TEXT NOT NULL PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            periodicity TEXT NOT NULL,
+            created TEXT NOT NULL,
+            checkoff_count INTEGER NOT NULL DEFAULT 0,
+            last_ordinal INTEGER,
+            current_streak INTEGER NOT NULL DEFAULT 0,
+            longest_streak INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS habits_created ON habits (created);
+        CREATE INDEX IF NOT EXISTS habits_periodicity_created ON habits (periodicity, created);
+        CREATE TABLE IF NOT EXISTS checkoffs (
+            habit_id TEXT NOT NULL REFERENCES habits (id) ON DELETE CASCADE,
+            timestamp INTEGER NOT NULL,
+            PRIMARY KEY (habit_id, timestamp)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS checkoffs_timestamp ON checkoffs (timestamp);
+    """
+    HABIT_COLUMNS = ("id, name, description, periodicity, created, "
+                     "checkoff_count, last_ordinal, current_streak, longest_streak")
+    FILE_EXTENSION = ".sqlite"
+
+    def __init__(self, path):
+        """Open (or create) SQLite database at given path.
+
+        Parameters
+        ----------
+        path : str
+            Path of database without file extension.
+        """
+        self._path = path + self.FILE_EXTENSION
+        # Autocommit mode, transactions are controlled explicitly by transaction(). Concurrent writers
+        # wait up to the configured timeout for the write lock. The connection may be used by other
+        # threads, one at a time (storage pool of module async_api).
+        self._connection = sqlite3.connect(self._path, timeout=conf.db_timeout, isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(self.SCHEMA)
+        self._transaction_depth = 0
+        self._upgrade_schema()
+
+    @classmethod
+    def exists(cls, path):
+        return os.path.exists(path + cls.FILE_EXTENSION)
+
+    @timings.timed("storage.load")
+    def __getitem__(self, habit_id):
+        # Habit row and checkoffs of the same snapshot, so the streak statistics match the checkoffs
+        with self._read_transaction():
+            row = self._connection.execute(f"SELECT {self.HABIT_COLUMNS} FROM habits WHERE id = ?",
+                                           (habit_id,)).fetchone()
+            if row is None:
+                raise KeyError(habit_id)
+            return self._load_habit(row)
+
+    @timings.timed("storage.save")
+    def __setitem__(self, habit_id, habit):
+        timings.count("habits.saved")
+        self._writes += 1
+        with self.transaction():
+            # Updated in place, so the habit keeps its rowid (order of summaries, ties of list_habits)
+            self._connection.execute(f"INSERT INTO habits ({self.HABIT_COLUMNS}) "
+                                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                                     "ON CONFLICT (id) DO UPDATE SET name = excluded.name, "
+                                     "description = excluded.description, periodicity = excluded.periodicity, "
+                                     "created = excluded.created, checkoff_count = excluded.checkoff_count, "
+                                     "last_ordinal = excluded.last_ordinal, current_streak = excluded.current_streak, "
+                                     "longest_streak = excluded.longest_streak",
+                                     (habit_id, habit.name, habit.description, habit.periodicity.name, habit.created,
+                                      *habit.summary.to_tuple()))
+            self._connection.execute("DELETE FROM checkoffs WHERE habit_id = ?", (habit_id,))
+            self._connection.executemany("INSERT INTO checkoffs (habit_id, timestamp) VALUES (?, ?)",
+                                         ((habit_id, timestamp) for timestamp in habit.checkoff_timestamps))
+
+    def __delitem__(self, habit_id):
+        self._writes += 1
+        with self.transaction():
+            if self._connection.execute("DELETE FROM habits WHERE id = ?", (habit_id,)).rowcount == 0:
+                raise KeyError(habit_id)
+
+    def __contains__(self, habit_id):
+        return self._connection.execute("SELECT 1 FROM habits WHERE id = ?", (habit_id,)).fetchone() is not None
+
+    @timings.timed_iteration("storage.load")
+    def items(self):
+        habit_rows = self._connection.execute(f"SELECT {self.HABIT_COLUMNS} FROM habits ORDER BY id")
+        # Merge habits with their checkoffs in one pass, both ordered by habit id
+        checkoff_rows = self._connection.execute("SELECT habit_id, timestamp FROM checkoffs "
+                                                 "ORDER BY habit_id, timestamp")
+        checkoff_row = checkoff_rows.fetchone()
+        for row in habit_rows:
+            checkoff_timestamps = array("q")
+            while checkoff_row is not None and checkoff_row[0] <= row[0]:
+                if checkoff_row[0] == row[0]:
+                    checkoff_timestamps.append(checkoff_row[1])
+                checkoff_row = checkoff_rows.fetchone()
+            yield row[0], Habit.from_record(*row[:5], checkoff_timestamps, StreakSummary(*row[5:]))
+
+    @timings.timed_iteration("storage.load")
+    def list_habits(self, periodicity=None, limit=0, offset=0):
+        # Filter, order and page by index, only habits of the requested page are loaded
+        query = f"SELECT {self.HABIT_COLUMNS} FROM habits"
+        parameters = []
+        if periodicity is not None:
+            query += " WHERE periodicity = ?"
+            parameters.append(periodicity)
+        # rowid breaks ties of the creation date and is part of each index entry
+        query += " ORDER BY created DESC, rowid DESC LIMIT ? OFFSET ?"
+        parameters += [limit if limit > 0 else -1, offset]
+        for row in self._connection.execute(query, parameters):
+            yield self._load_habit(row)
+
+    @timings.timed("storage.check_off")
+    def check_off(self, habit_id, date):
+        self._writes += 1
+        with self.transaction():
+            habit = self[habit_id]
+            checkoff = habit.check_off(date)
+            # Only the new checkoff and the streak statistics are written
+            self._connection.execute("INSERT INTO checkoffs (habit_id, timestamp) VALUES (?, ?)",
+                                     (habit_id, to_microseconds(checkoff.timestamp)))
+            self._save_summary(habit)
+        return habit
+
+    @timings.timed("storage.check_off")
+    def check_off_many(self, checkoffs):
+        self._writes += 1
+        added = 0
+        with self.transaction():
+            for habit_id, timestamps in checkoffs.items():
+                habit = self[habit_id]
+                added_timestamps = habit.check_off_many(timestamps)
+                # Only the added checkoffs and the streak statistics are written
+                self._connection.executemany("INSERT INTO checkoffs (habit_id, timestamp) VALUES (?, ?)",
+                                             ((habit_id, timestamp) for timestamp in added_timestamps))
+                self._save_summary(habit)
+                added += len(added_timestamps)
+        return added
+
+    def count(self, periodicity=None):
+        if periodicity is None:
+            return self._connection.execute("SELECT COUNT(*) FROM habits").fetchone()[0]
+        return self._connection.execute("SELECT COUNT(*) FROM habits WHERE periodicity = ?",
+                                        (periodicity,)).fetchone()[0]
+
+    @timings.timed_iteration("storage.load_summaries")
+    def summaries(self, limit=0, offset=0, periodicity=None):
+        query = "SELECT id, checkoff_count, last_ordinal, current_streak, longest_streak FROM habits"
+        parameters = []
+        if periodicity is not None:
+            query += " WHERE periodicity = ?"
+            parameters.append(periodicity)
+        query += " ORDER BY rowid LIMIT ? OFFSET ?"
+        parameters += [limit if limit > 0 else -1, offset]
+        for habit_id, *summary in self._connection.execute(query, parameters):
+            yield habit_id, StreakSummary(*summary)
+
+    @timings.timed("storage.load_range")
+    def checkoffs_between(self, start=None, end=None):
+        # Range scan of the timestamp index, only the check offs of the range are sorted by habit
+        habit_ids = []
+        period_days = array("q")
+        timestamps = array("q")
+        habit_indexes = array("i")
+        for habit_id, periodicity, timestamp in self._connection.execute(
+                "SELECT checkoffs.habit_id, habits.periodicity, checkoffs.timestamp "
+                "FROM checkoffs INDEXED BY checkoffs_timestamp JOIN habits ON habits.id = checkoffs.habit_id "
+                "WHERE checkoffs.timestamp >= ? AND checkoffs.timestamp < ? "
+                "ORDER BY checkoffs.habit_id, checkoffs.timestamp",
+                (-2 ** 63 if start is None else start, 2 ** 63 - 1 if end is None else end)):
+            if not habit_ids or habit_ids[-1] != habit_id:
+                habit_ids.append(habit_id)
+                period_days.append(Habit.Periodicity[periodicity].days)
+            timestamps.append(timestamp)
+            habit_indexes.append(len(habit_ids) - 1)
+        return habit_ids, period_days, timestamps, habit_indexes
+
+    @timings.timed("storage.load")
+    def list_habits_between(self, start=None, end=None, periodicity=None, limit=0, offset=0):
+        # Check offs of the range only, the habits of the requested page are filtered, ordered and paged
+        # by index. Habits are created from their check offs of the range, no other check offs are loaded.
+        habit_ids, _, timestamps, habit_indexes = self.checkoffs_between(start, end)
+        bounds = {}
+        for position, index in enumerate(habit_indexes):
+            bounds.setdefault(habit_ids[index], [position, position])[1] = position + 1
+        query = (f"SELECT {self.HABIT_COLUMNS} FROM habits WHERE id IN (SELECT habit_id FROM checkoffs "
+                 "INDEXED BY checkoffs_timestamp WHERE timestamp >= ? AND timestamp < ?)")
+        parameters = [-2 ** 63 if start is None else start, 2 ** 63 - 1 if end is None else end]
+        if periodicity is not None:
+            query += " AND periodicity = ?"
+            parameters.append(periodicity)
+        query += " ORDER BY created DESC, rowid DESC LIMIT ? OFFSET ?"
+        parameters += [limit if limit > 0 else -1, offset]
+        habits = []
+        for row in self._connection.execute(query, parameters):
+            # Check offs inserted since the range was read are not part of the listing
+            low, high = bounds.get(row[0], (0, 0))
+            habits.append(Habit.from_record(*row[:5], timestamps[low:high]))
+        return habits
+
+    @timings.timed("storage.load_columns")
+    def checkoff_columns(self):
+        habit_ids = []
+        period_days = array("q")
+        habit_indexes_by_id = {}
+        for habit_id, periodicity in self._connection.execute("SELECT id, periodicity FROM habits ORDER BY id"):
+            habit_indexes_by_id[habit_id] = len(habit_ids)
+            habit_ids.append(habit_id)
+            period_days.append(Habit.Periodicity[periodicity].days)
+        timestamps = array("q")
+        habit_indexes = array("i")
+        # Primary key order (habit id, timestamp), no habit objects are created
+        for habit_id, timestamp in self._connection.execute("SELECT habit_id, timestamp FROM checkoffs "
+                                                            "ORDER BY habit_id, timestamp"):
+            timestamps.append(timestamp)
+            habit_indexes.append(habit_indexes_by_id[habit_id])
+        return habit_ids, period_days, timestamps, habit_indexes
+
+    @contextmanager
+    def transaction(self):
+        # Nested transactions are merged into the outermost one
+        if self._transaction_depth == 0:
+            self._connection.execute("BEGIN IMMEDIATE")
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._connection.execute("ROLLBACK")
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self._connection.execute("COMMIT")
+
+    @contextmanager
+    def _read_transaction(self):
+        """Run the reads within the context in one read transaction (within the current one, if any).
+
+        In autocommit mode each statement reads the latest commit, so reads of several statements could
+        see commits of other connections in between.
+        """
+        if self._connection.in_transaction:
+            yield
+            return
+        self._connection.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self._connection.execute("COMMIT")
+
+    def files(self):
+        return [self._path, self._path + "-wal"]
+
+    def data_version(self):
+        # PRAGMA data_version is changed by commits of other connections only
+        return self._connection.execute("PRAGMA data_version").fetchone()[0], self._writes
+
+    def close(self):
+        if not self.keep_open:
+            self._connection.close()
+
+    def _load_habit(self, row):
+        """Create habit from given habits row, loading its checkoffs."""
+        checkoff_timestamps = array("q", (timestamp for timestamp, in self._connection.execute(
+            "SELECT timestamp FROM checkoffs WHERE habit_id = ? ORDER BY timestamp", (row[0],))))
+        return Habit.from_record(*row[:5], checkoff_timestamps, StreakSummary(*row[5:]))
+
+    def _save_summary(self, habit):
+        """Save streak statistics of given habit."""
+        self._connection.execute("UPDATE habits SET checkoff_count = ?, last_ordinal = ?, current_streak = ?, "
+                                 "longest_streak = ? WHERE id = ?", (*habit.summary.to_tuple(), habit.id))
+
+    def _upgrade_schema(self):
+        """Upgrade tables created by former versions (schema version kept in PRAGMA user_version)."""
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(habits)")]
+        if "longest_streak" not in columns:
+            # Add streak statistics and calculate them from stored checkoffs
+            with self.transaction():
+                self._connection.execute("ALTER TABLE habits ADD COLUMN checkoff_count INTEGER NOT NULL DEFAULT 0")
+                self._connection.execute("ALTER TABLE habits ADD COLUMN last_ordinal INTEGER")
+                self._connection.execute("ALTER TABLE habits ADD COLUMN current_streak INTEGER NOT NULL DEFAULT 0")
+                self._connection.execute("ALTER TABLE habits ADD COLUMN longest_streak INTEGER NOT NULL DEFAULT 0")
+                self._recalculate_summaries(f"SELECT {self.HABIT_COLUMNS} FROM habits")
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] < 1:
+            # Streak statistics of weekly habits were based on days instead of weeks
+            with self.transaction():
+                self._recalculate_summaries(f"SELECT {self.HABIT_COLUMNS} FROM habits WHERE periodicity != 'DAILY'")
+                self._connection.execute("PRAGMA user_version = 1")
+
+    def _recalculate_summaries(self, query):
+        """Recalculate streak statistics of the habits selected by given query from their checkoffs."""
+        for row in self._connection.execute(query).fetchall():
+            habit = self._load_habit(row)
+            habit.summary = StreakSummary.from_ordinals(habit.checkoff_ordinals())
+            self._save_summary(habit)
+
+
+BACKENDS = {"sqlite": SQLiteStorage, "shelve": ShelveStorage}
+
+# Storages kept open across commands (server mode), by path
+_open_storages = {}
+
+
+def get_path():
+    """Return path of the configured habit database (without file extension)."""
+    return os.path.join(conf.data_dir, conf.db_name)
+
+
+def exists():
+    """Return whether the configured habit database exists."""
+    return get_path() in _open_storages or BACKENDS[conf.db_backend].exists(get_path())
+
+
+def open_storage():
+    """Open the configured habit database.
+
+    If *app_config.keep_storage_open* is set (server mode), the storage is opened once and returned again
+    by subsequent calls, closing it is ignored until close_storages is called.
+
+    Returns
+    -------
+    Storage
+        Storage of the backend configured in *app_config.db_backend*.
+    """
+    if not conf.keep_storage_open:
+        with timings.span("storage.open"):
+            return BACKENDS[conf.db_backend](get_path())
+    path = get_path()
+    if path not in _open_storages:
+        with timings.span("storage.open"):
+            habits_db = BACKENDS[conf.db_backend](path)
+        habits_db.keep_open = True
+        _open_storages[path] = habits_db
+    return _open_storages[path]
+
+
+@contextmanager
+def creating_storage():
+    """Create the configured habit database within the context, removing it again if the context fails.
+
+    A database left behind empty by a failed initialization would exist on later starts, so it would
+    never be initialized again (see habit_tracker.initialize_database).
+
+    Yields
+    ------
+    Storage
+        Created storage (see open_storage), closed at the end of the context.
+    """
+    habits_db = open_storage()
+    try:
+        yield habits_db
+    except BaseException:
+        # Closed even if kept open (server mode), its files are removed
+        _open_storages.pop(get_path(), None)
+        habits_db.keep_open = False
+        habits_db.close()
+        for file_path in habits_db.files():
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+    habits_db.close()
+
+
+def close_storages():
+    """Close all storages kept open by open_storage (server mode)."""
+    while _open_storages:
+        _, habits_db = _open_storages.popitem()
+        habits_db.keep_open = False
+        habits_db.close()
+
+
+def migrate(source, target):
+    """Copy all habits of the source storage into the target storage within one transaction.
+
+    Parameters
+    ----------
+    source : Storage
+        Storage to read habits from.
+    target : Storage
+        Storage to write habits to, existing habits with same id are replaced.
+
+    Returns
+    -------
+    int
+        Number of migrated habits.
+    """
+    count = 0
+    target._writes += 1
+    with target.transaction():
+        for habit_id, habit in source.items():
+            target[habit_id] = habit
+            count += 1
+    return count
@@ -0,0 +1,157 @@
+"""Codec of check off timestamps in the fixed format "%Y-%m-%d %H:%M:%S.%f" and microseconds since epoch.
+
+Timestamps of the canonical form (e.g. "2020-12-01 08:00:00.000000") are parsed with
+datetime.fromisoformat, which is much faster than datetime.strptime. Other input falls back to
+datetime.strptime, so the accepted input and error messages stay the same. Formatting derives the
+time of day arithmetically and memoizes the date part, as check offs of a habit share few dates.
+"""
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+MICROSECONDS_PER_DAY = 86400 * 1000000
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_microseconds(timestamp):
+    """Convert given naive datetime to microseconds since epoch (1970-01-01 00:00:00)."""
+    return (timestamp - EPOCH) // _MICROSECOND
+
+
+def from_microseconds(microseconds):
+    """Convert given microseconds since epoch (1970-01-01 00:00:00) to naive datetime."""
+    return EPOCH + timedelta(microseconds=microseconds)
+
+
+def parse(date):
+    """Parse timestamp of format "%Y-%m-%d %H:%M:%S.%f" to microseconds since epoch.
+
+    Parameters
+    ----------
+    date : str
+        Timestamp (format "%Y-%m-%d %H:%M:%S.%f").
+
+    Returns
+    -------
+    int
+        Timestamp as microseconds since epoch.
+
+    Raises
+    ------
+    ValueError
+        If date does not match format (message of datetime.strptime).
+    """
+    if (type(date) is str and len(date) == 26 and date[4] == "-" and date[7] == "-" and date[10] == " "
+            and date[13] == ":" and date[16] == ":" and date[19] == "." and date.isascii() and date[20:].isdigit()):
+        # All digits after the dot, fromisoformat would accept a shortened fraction with UTC offset
+        try:
+            return to_microseconds(datetime.fromisoformat(date))
+        except ValueError:
+            # Out of range values, error message of strptime below
+            pass
+    return to_microseconds(datetime.strptime(date, FORMAT))
+
+
+def parse_range(start=None, end=None):
+    """Parse bounds of an inclusive time range given as dates ("%Y-%m-%d") or timestamps.
+
+    Parameters
+    ----------
+    start : str, optional
+        First day ("%Y-%m-%d") or first timestamp ("%Y-%m-%d %H:%M:%S.%f") of range. Default is no lower bound.
+    end : str, optional
+        Last day ("%Y-%m-%d", i.e. until the end of that day) or last timestamp of range. Default is no
+        upper bound.
+
+    Returns
+    -------
+    tuple of (int, int)
+        Start (inclusive) and end (exclusive) of range as microseconds since epoch, None if unbounded.
+
+    Raises
+    ------
+    ValueError
+        If a bound does not match the formats or the range is empty.
+    """
+    bounds = []
+    for date, is_end in ((start, False), (end, True)):
+        if date is None:
+            bounds.append(None)
+            continue
+        try:
+            if len(date) == 10:
+                day = to_microseconds(datetime.strptime(date, "%Y-%m-%d"))
+                bounds.append(day + MICROSECONDS_PER_DAY if is_end else day)
+            else:
+                bounds.append(parse(date) + 1 if is_end else parse(date))
+        except ValueError:
+            raise ValueError(f"Invalid time {date}, expected YYYY-MM-DD or YYYY-MM-DD HH:MM:SS.f") from None
+    if bounds[0] is not None and bounds[1] is not None and bounds[0] >= bounds[1]:
+        raise ValueError(f"Empty time range from {start} to {end}")
+    return bounds[0], bounds[1]
+
+
+def parse_many(dates):
+    """Parse timestamps of format "%Y-%m-%d %H:%M:%S.%f" to microseconds since epoch.
+
+    Parameters
+    ----------
+    dates : iterable of str
+        Timestamps (format "%Y-%m-%d %H:%M:%S.%f").
+
+    Returns
+    -------
+    array of int
+        Timestamps as microseconds since epoch, in given order.
+
+    Raises
+    ------
+    ValueError
+        If a date does not match format.
+    """
+    return array("q", map(parse, dates))
+
+
+@lru_cache(maxsize=4096)
+def _format_date(day):
+    """Return date part ("%Y-%m-%d ") of given day (days since epoch)."""
+    return datetime.fromordinal(day + EPOCH_ORDINAL).strftime("%Y-%m-%d ")
+
+
+def format(microseconds):
+    """Format timestamp given as microseconds since epoch as "%Y-%m-%d %H:%M:%S.%f".
+
+    Parameters
+    ----------
+    microseconds : int
+        Timestamp as microseconds since epoch.
+
+    Returns
+    -------
+    str
+        Timestamp (format "%Y-%m-%d %H:%M:%S.%f").
+    """
+    day, microsecond = divmod(microseconds, MICROSECONDS_PER_DAY)
+    second, microsecond = divmod(microsecond, 1000000)
+    minute, second = divmod(second, 60)
+    hour, minute = divmod(minute, 60)
+    return f"{_format_date(day)}{hour:02d}:{minute:02d}:{second:02d}.{microsecond:06d}"
+
+
+def format_many(microseconds):
+    """Format timestamps given as microseconds since epoch as "%Y-%m-%d %H:%M:%S.%f".
+
+    Parameters
+    ----------
+    microseconds : iterable of int
+        Timestamps as microseconds since epoch.
+
+    Returns
+    -------
+    list of str
+        Timestamps (format "%Y-%m-%d %H:%M:%S.%f"), in given order.
+    """
+    return list(map(format, microseconds))
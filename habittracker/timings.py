@@ -0,0 +1,189 @@
+"""Instrumentation of the hot paths of commands: timed spans and counters (option --timings).
+
+Spans measure phases such as database opening, loading of habits, analytics and rendering. They may
+nest, e.g. habits loaded lazily while rendering: each span reports its total duration and its self
+duration (total minus the durations of nested spans), so the self durations add up to the measured
+time. Counters count e.g. the habits and check offs loaded.
+
+Instrumentation is disabled by default. While disabled, span returns a shared no-op context manager,
+decorated functions call the original function after a single flag check and counters are not
+updated, so the overhead is negligible.
+
+Example::
+
+    timings.enable()
+    with timings.span("analytics"):
+        ...
+    timings.count("habits.loaded")
+    print(timings.format_report())
+"""
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+enabled = False
+_start = 0.0
+# Calls, total and self duration (s) by span name, in order of first use
+_spans = {}
+_counters = {}
+# Open spans: [name, duration of nested spans]
+_stack = []
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    """Context manager measuring one execution of a span."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if self.name not in _spans:
+            # Reported in order of first start, so enclosing spans precede nested ones
+            _spans[self.name] = [0, 0.0, 0.0]
+        _stack.append([self.name, 0.0])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        name, nested = _stack.pop()
+        if _stack:
+            _stack[-1][1] += duration
+        # Spans nested in a span of the same name (e.g. recursive loading) count once in the total
+        outermost = all(open_name != name for open_name, _ in _stack)
+        add(name, duration if outermost else 0.0, duration - nested, calls=1)
+        return False
+
+
+def enable(start=None):
+    """Reset all spans and counters and enable instrumentation.
+
+    Parameters
+    ----------
+    start : float, optional
+        Start of the measured time (time.perf_counter). Default is now.
+    """
+    global enabled, _start
+    _spans.clear()
+    _counters.clear()
+    _stack.clear()
+    _start = time.perf_counter() if start is None else start
+    enabled = True
+
+
+def disable():
+    """Disable instrumentation (recorded spans and counters are kept until enabled again)."""
+    global enabled
+    enabled = False
+
+
+def span(name):
+    """Return context manager measuring a span of given name (no-op while disabled)."""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def add(name, total, self_duration=None, calls=1):
+    """Add duration measured elsewhere to span of given name.
+
+    Parameters
+    ----------
+    name : str
+        Name of span.
+    total : float
+        Total duration (s).
+    self_duration : float, optional
+        Duration without nested spans (s). Default is the total duration.
+    calls : int, optional
+        Number of calls. Default is 1.
+    """
+    if not enabled:
+        return
+    statistics = _spans.get(name)
+    if statistics is None:
+        statistics = _spans[name] = [0, 0.0, 0.0]
+    statistics[0] += calls
+    statistics[1] += total
+    statistics[2] += total if self_duration is None else self_duration
+
+
+def count(name, value=1):
+    """Increase counter of given name by value (ignored while disabled)."""
+    if enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def timed(name):
+    """Decorator measuring each call of the decorated function as span of given name."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iteration(name):
+    """Decorator measuring the decorated generator function as span of given name.
+
+    Each step of the generator is measured separately, the time the caller spends between the steps
+    (e.g. rendering the yielded habits) is not part of the span.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            return iterate(name, function(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def iterate(name, iterable):
+    """Yield items of given iterable, measuring each step as span of given name (one call per step)."""
+    iterator = iter(iterable)
+    while True:
+        with _Span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def report():
+    """Return recorded spans and counters.
+
+    Returns
+    -------
+    dict
+        Total duration since enabled (*total_ms*), spans by name (*calls*, *total_ms*, *self_ms*), time
+        not covered by any span (*unaccounted_ms*) and counters by name.
+    """
+    total = time.perf_counter() - _start
+    spans = {name: {"calls": calls, "total_ms": span_total * 1000, "self_ms": self_duration * 1000}
+             for name, (calls, span_total, self_duration) in _spans.items()}
+    unaccounted = total - sum(self_duration for _, _, self_duration in _spans.values())
+    return {"total_ms": total * 1000, "spans": spans, "unaccounted_ms": unaccounted * 1000,
+            "counters": dict(_counters)}
+
+
+def format_report(timings_report=None):
+    """Return given (default: current) report as human readable table."""
+    timings_report = report() if timings_report is None else timings_report
+    width = max([24, *map(len, timings_report["spans"]), *map(len, timings_report["counters"])])
+    lines = ["################# TIMINGS #################",
+             f"{'span':{width}} {'calls':>7} {'total ms':>10} {'self ms':>10}"]
+    for name, statistics in timings_report["spans"].items():
+        lines.append(f"{name:{width}} {statistics['calls']:7} {statistics['total_ms']:10.2f} "
+                     f"{statistics['self_ms']:10.2f}")
+    lines.append(f"{'(unaccounted)':{width}} {'':7} {'':10} {timings_report['unaccounted_ms']:10.2f}")
+    lines.append(f"{'Total':{width}} {'':7} {timings_report['total_ms']:10.2f}")
+    for name, value in timings_report["counters"].items():
+        lines.append(f"{name:{width}} {value:7}")
+    lines.append("###########################################")
+    return "\n".join(lines)
@@ -1,5 +1,6 @@
 import os
 import json
+from array import array
 
 import pytest
 
@@ -89,6 +90,14 @@ class TestGetLongestStreak:
         actual = analytics.get_longest_streak(sample_habits_objects)
         assert actual == expected_longest_streak
 
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streak_from_summaries_valid_option_all(self, sample_habits_objects):
+        expected_longest_streak = 11
+        actual = analytics.get_longest_streak_from_summaries([(habit[0], habit[1].summary)
+                                                              for habit in sample_habits_objects])
+        assert actual == expected_longest_streak
+
     @pytest.mark.unit
     @pytest.mark.positive
     def test_get_longest_streak_valid_option_all_empty_habits(self):
@@ -97,14 +106,71 @@ class TestGetLongestStreak:
         assert actual == expected_longest_streak
 
 
+class TestGetCurrentStreaks:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    @pytest.mark.parametrize("periods_later, alive", [(0, True), (1, True), (2, False), (100, False)])
+    def test_get_current_streaks_from_summaries_valid_option_all(self, sample_habits_objects, periods_later, alive):
+        for habit_id, habit in sample_habits_objects:
+            ordinal = habit.period_ordinal(habit.checkoff_timestamps[-1]) + periods_later
+            # Streak counted back from the current period (or the period before, if not yet checked off)
+            ordinals = set(habit.checkoff_ordinals())
+            expected = 0
+            period = ordinal if ordinal in ordinals else ordinal - 1
+            while period in ordinals:
+                expected += 1
+                period -= 1
+            actual = analytics.get_current_streaks_from_summaries([(habit_id, habit.summary)], ordinal)
+            assert actual == {habit_id: expected}
+            assert (expected > 0) == alive
+            assert habit.summary.is_broken(ordinal) != alive
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_current_streaks_from_summaries_valid_option_no_checkoffs(self):
+        habit = Habit("habitname", "habitdescription", "WEEKLY")
+        assert analytics.get_current_streaks_from_summaries([(habit.id, habit.summary)], 1000) == {habit.id: 0}
+        assert habit.summary.is_broken(1000)
+        assert analytics.get_current_streaks_from_summaries([], 1000) == {}
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_get_current_streaks_from_summaries_invalid_option_before_latest_checkoff(self, sample_habits_objects):
+        habit_id, habit = sample_habits_objects[0]
+        ordinal = habit.period_ordinal(habit.checkoff_timestamps[-1]) - 1
+        with pytest.raises(ValueError):
+            analytics.get_current_streaks_from_summaries([(habit_id, habit.summary)], ordinal)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    @pytest.mark.parametrize("checkoffs_before", [0, 1, 3])
+    def test_get_summaries_as_of(self, sample_habits_objects, checkoffs_before):
+        habits = dict(sample_habits_objects)
+        for habit_id, habit in sample_habits_objects:
+            if checkoffs_before >= len(habit.checkoff_timestamps):
+                continue
+            # Point in time just before the check off following the given number of check offs
+            microseconds = habit.checkoff_timestamps[checkoffs_before] - 1
+            ordinal = habit.period_ordinal(microseconds)
+            # Check offs later within the period of the point in time count
+            expected = (habit.summary if ordinal == habit.summary.last_ordinal
+                        else habit.between(None, microseconds + 1).summary)
+            assert analytics.get_summaries_as_of([(habit_id, habit.summary)], habits, ordinal,
+                                                 microseconds) == [(habit_id, expected)]
+        # Statistics answering for the period are kept, no habits are loaded
+        habit_id, habit = sample_habits_objects[0]
+        ordinal = habit.summary.last_ordinal
+        assert analytics.get_summaries_as_of([(habit_id, habit.summary)], {}, ordinal, 0) == [(habit_id, habit.summary)]
+
+
 class TestGetLongestStreakForHabit:
     @pytest.mark.unit
     @pytest.mark.positive
     @pytest.mark.parametrize("expected_longest_streaks", [["Meditating", 5],
                                                           ["Workout", 4],
                                                           ["Drink 2 liter of water", 11],
-                                                          ["Didn't watch TV", 1],
-                                                          ["No spend", 1]])
+                                                          ["Didn't watch TV", 5],
+                                                          ["No spend", 4]])
     def test_get_longest_streak_for_habit_valid_option_all(self, sample_habits_objects, expected_longest_streaks):
         habit_id = [habit[1].id for habit in sample_habits_objects if habit[1].name == expected_longest_streaks[0]]
         actual = analytics.get_longest_streak_for_habit(sample_habits_objects, habit_id[0])
@@ -132,3 +198,119 @@ class TestGetLongestStreakForHabit:
             analytics.get_longest_streak_for_habit(habits=sample_habits_objects)
         expected_error_message = "get_longest_streak_for_habit() missing 1 required positional argument: 'habit_id'"
         assert str(exc_info.value) == expected_error_message
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streak_for_habit_valid_option_same_day_checkoffs(self):
+        habit = Habit("habitname", "habitdescription", "DAILY")
+        for checkoff_date in ["2020-12-03 08:00:00.000000", "2020-12-01 08:00:00.000000",
+                              "2020-12-02 08:00:00.000000", "2020-12-02 20:00:00.000000",
+                              "2020-12-05 08:00:00.000000"]:
+            habit.check_off(checkoff_date)
+        actual = analytics.get_longest_streak_for_habit([(habit.id, habit)], habit.id)
+        assert actual == 3
+
+
+class TestGetLongestStreaks:
+    @pytest.fixture(params=["python", "numpy"])
+    def engine(self, request):
+        if request.param == "numpy":
+            pytest.importorskip("numpy")
+        return request.param
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_valid_option_all(self, sample_habits_objects, engine):
+        expected_longest_streaks = {"Meditating": 5, "Workout": 4, "Drink 2 liter of water": 11,
+                                    "Didn't watch TV": 5, "No spend": 4}
+        longest_streaks, longest_streak = analytics.get_longest_streaks(sample_habits_objects, engine)
+        actual = {habit.name: longest_streaks[habit_id] for habit_id, habit in sample_habits_objects}
+        assert actual == expected_longest_streaks
+        assert longest_streak == 11
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_valid_option_same_day_and_empty_habits(self, engine):
+        habit = Habit("habitname", "habitdescription", "DAILY")
+        for checkoff_date in ["2020-12-03 08:00:00.000000", "2020-12-01 08:00:00.000000",
+                              "2020-12-02 08:00:00.000000", "2020-12-02 20:00:00.000000",
+                              "2020-12-05 08:00:00.000000"]:
+            habit.check_off(checkoff_date)
+        empty_habit = Habit("emptyname", "emptydescription", "DAILY")
+        other_habit = Habit("othername", "otherdescription", "DAILY")
+        other_habit.check_off("2020-12-06 08:00:00.000000")
+        habits = [(empty_habit.id, empty_habit), (habit.id, habit), (other_habit.id, other_habit)]
+        actual = analytics.get_longest_streaks(habits, engine)
+        assert actual == ({empty_habit.id: 0, habit.id: 3, other_habit.id: 1}, 3)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_valid_option_all_empty_habits(self, engine):
+        assert analytics.get_longest_streaks([], engine) == ({}, 0)
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_get_longest_streaks_invalid_option_engine_invalid(self, sample_habits_objects):
+        with pytest.raises(ValueError):
+            analytics.get_longest_streaks(sample_habits_objects, "fortran")
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_valid_option_weekly_across_years(self, engine):
+        habit = Habit("habitname", "habitdescription", "WEEKLY")
+        # Sunday and Monday are different weeks, two checkoffs in week 2020-W53 count once
+        for checkoff_date in ["2020-12-20 08:00:00.000000", "2020-12-21 08:00:00.000000",
+                              "2020-12-28 08:00:00.000000", "2021-01-03 08:00:00.000000",
+                              "2021-01-04 08:00:00.000000", "2021-01-18 08:00:00.000000"]:
+            habit.check_off(checkoff_date)
+        actual = analytics.get_longest_streaks([(habit.id, habit)], engine)
+        assert actual == ({habit.id: 4}, 4)
+        assert habit.summary.longest_streak == 4
+        assert habit.summary.current_streak == 1
+
+
+class TestGetLongestStreaksFromColumns:
+    @pytest.fixture(params=["python", "numpy"])
+    def engine(self, request):
+        if request.param == "numpy":
+            pytest.importorskip("numpy")
+        return request.param
+
+    @staticmethod
+    def to_columns(habits):
+        habit_ids, period_days, timestamps, habit_indexes = [], array("q"), array("q"), array("i")
+        for habit_id, habit in habits:
+            habit_indexes.extend([len(habit_ids)] * len(habit.checkoff_timestamps))
+            timestamps.extend(habit.checkoff_timestamps)
+            habit_ids.append(habit_id)
+            period_days.append(habit.periodicity.days)
+        return habit_ids, period_days, timestamps, habit_indexes
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_from_columns_valid_option_all(self, sample_habits_objects, engine):
+        empty_habit = Habit("emptyname", "emptydescription", "WEEKLY")
+        habits = [(empty_habit.id, empty_habit)] + sample_habits_objects
+        actual = analytics.get_longest_streaks_from_columns(*self.to_columns(habits), engine=engine)
+        assert actual == analytics.get_longest_streaks(habits, "python")
+        assert actual[0][empty_habit.id] == 0
+        assert actual[1] == 11
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_from_columns_valid_option_memoryview(self, sample_habits_objects, engine):
+        habit_ids, period_days, timestamps, habit_indexes = self.to_columns(sample_habits_objects)
+        actual = analytics.get_longest_streaks_from_columns(habit_ids, memoryview(period_days), memoryview(timestamps),
+                                                            memoryview(habit_indexes), engine)
+        assert actual == analytics.get_longest_streaks(sample_habits_objects, "python")
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_longest_streaks_from_columns_valid_option_all_empty_habits(self, engine):
+        assert analytics.get_longest_streaks_from_columns([], array("q"), array("q"), array("i"), engine) == ({}, 0)
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_get_longest_streaks_from_columns_invalid_option_engine_invalid(self, sample_habits_objects):
+        with pytest.raises(ValueError):
+            analytics.get_longest_streaks_from_columns(*self.to_columns(sample_habits_objects), engine="fortran")
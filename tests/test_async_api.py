@@ -0,0 +1,179 @@
+import os
+import asyncio
+import threading
+import time
+
+import pytest
+
+import async_api
+
+
+@pytest.fixture(params=["sqlite", "shelve"])
+def tracker_path(request, tmp_path):
+    return os.path.join(str(tmp_path), "habitdb"), request.param
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncHabitTracker:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_commands(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path) as tracker:
+                daily = await tracker.create("dailyname", "dailydescription", "DAILY")
+                weekly = await tracker.create("weeklyname", "weeklydescription", "WEEKLY")
+                await asyncio.gather(*(tracker.checkoff(daily["id"], f"2020-12-{day:02d} 08:00:00.000000")
+                                       for day in [1, 2, 3, 5]))
+                habit = await tracker.checkoff(weekly["id"], "2020-12-07 08:00:00.000000")
+                assert habit["checkoffs"] == ["2020-12-07 08:00:00.000000"]
+                habits = await tracker.list_habits()
+                assert [item["id"] for item in habits] == [weekly["id"], daily["id"]]
+                assert len(habits[1]["checkoffs"]) == 4
+                assert await tracker.list_habits("DAILY", limit=1) == habits[1:]
+                assert [item["checkoffs"] for item in await tracker.list_habits(date_from="2020-12-03",
+                                                                                 date_to="2020-12-05")] == [
+                    ["2020-12-03 08:00:00.000000", "2020-12-05 08:00:00.000000"]]
+                assert await tracker.get_longest_streak() == 3
+                assert await tracker.get_longest_streak(date_from="2020-12-02") == 2
+                assert await tracker.get_longest_streak_for_habit(daily["id"], date_to="2020-12-01") == {
+                    "id": daily["id"], "name": "dailyname", "longest_streak": 1}
+                current_streaks = await tracker.get_current_streaks(timestamp="2020-12-08 12:00:00.000000")
+                assert {item["id"]: item["current_streak"] for item in current_streaks} == {daily["id"]: 0,
+                                                                                            weekly["id"]: 1}
+                # Habits checked off later are counted up to the point in time
+                current_streaks = await tracker.get_current_streaks(timestamp="2020-12-03 12:00:00.000000")
+                assert {item["id"]: item["current_streak"] for item in current_streaks} == {daily["id"]: 3,
+                                                                                            weekly["id"]: 0}
+                current_streaks = await tracker.get_current_streaks(timestamp="2020-12-03")
+                assert {item["id"]: item["current_streak"] for item in current_streaks} == {daily["id"]: 3,
+                                                                                            weekly["id"]: 0}
+                assert await tracker.delete(daily["id"]) == {"id": daily["id"]}
+                assert [item["id"] for item in await tracker.list_habits()] == [weekly["id"]]
+        run(scenario())
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_commands_invalid(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path) as tracker:
+                habit = await tracker.create("habitname", "habitdescription", "DAILY")
+                await tracker.checkoff(habit["id"], "2020-12-01 08:00:00.000000")
+                with pytest.raises(ValueError):
+                    await tracker.checkoff(habit["id"], "2020-12-01 08:00:00.000000")
+                with pytest.raises(KeyError):
+                    await tracker.get_longest_streak_for_habit("42")
+                with pytest.raises(KeyError):
+                    await tracker.delete("42")
+                with pytest.raises(ValueError):
+                    await tracker.list_habits(limit=-1)
+                with pytest.raises(ValueError):
+                    await tracker.get_longest_streak(date_from="2020-12-02", date_to="2020-12-01")
+            with pytest.raises(RuntimeError):
+                await tracker.list_habits()
+        run(scenario())
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    @pytest.mark.parametrize("options", [{"workers": 0}, {"max_concurrency": 0}, {"backend": "dbm"}])
+    def test_create_invalid_options(self, tmp_path, options):
+        with pytest.raises(ValueError):
+            async_api.AsyncHabitTracker(os.path.join(str(tmp_path), "habitdb"), **options)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_concurrent_checkoffs_not_lost(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path, workers=4) as tracker:
+                habits = await asyncio.gather(*(tracker.create(f"habit{index}", "habitdescription", "DAILY")
+                                                for index in range(4)))
+                await asyncio.gather(*(tracker.checkoff(habit["id"], f"2020-12-{day:02d} 08:00:00.000000")
+                                       for habit in habits for day in range(1, 11)))
+                assert [len(item["checkoffs"]) for item in await tracker.list_habits()] == [10] * 4
+        run(scenario())
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_coalesce_identical_reads(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path) as tracker:
+                await tracker.create("habitname", "habitdescription", "DAILY")
+                results = await asyncio.gather(*(tracker.list_habits() for _ in range(10)),
+                                               tracker.list_habits(limit=1))
+                assert tracker.coalesced == 9
+                assert all(result is results[0] for result in results[:10])
+                # Reads issued after a write do not join reads started before it
+                read = asyncio.ensure_future(tracker.list_habits())
+                await asyncio.sleep(0)
+                await tracker.create("othername", "otherdescription", "DAILY")
+                assert len(await tracker.list_habits()) == 2
+                await read
+        run(scenario())
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_coalesce_disabled(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path, coalesce=False) as tracker:
+                results = await asyncio.gather(*(tracker.list_habits() for _ in range(10)))
+                assert tracker.coalesced == 0
+                assert results == [[]] * 10
+        run(scenario())
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_coalesced_read_survives_cancelled_caller(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path) as tracker:
+                await tracker.create("habitname", "habitdescription", "DAILY")
+                first = asyncio.ensure_future(tracker.get_longest_streak())
+                second = asyncio.ensure_future(tracker.get_longest_streak())
+                await asyncio.sleep(0)
+                first.cancel()
+                assert await second == 0
+                assert first.cancelled()
+        run(scenario())
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_max_concurrency(self, tracker_path):
+        running = []
+        maximum = []
+        lock = threading.Lock()
+
+        def slow_read(habits_db):
+            with lock:
+                running.append(1)
+                maximum.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.pop()
+
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path, workers=4, max_concurrency=2) as tracker:
+                await asyncio.gather(*(tracker._run(slow_read) for _ in range(8)))
+                # Storages are opened on demand, at most one per running request
+                assert len(tracker._opened) <= 2
+        run(scenario())
+        assert max(maximum) <= 2
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_event_loop_not_blocked(self, tracker_path):
+        async def scenario():
+            async with async_api.AsyncHabitTracker(*tracker_path) as tracker:
+                ticks = []
+
+                async def ticker():
+                    while True:
+                        ticks.append(time.perf_counter())
+                        await asyncio.sleep(0)
+
+                ticking = asyncio.ensure_future(ticker())
+                await tracker._run(lambda habits_db: time.sleep(0.1))
+                ticking.cancel()
+                # The loop kept running while the storage call blocked its executor thread
+                assert len(ticks) > 10
+        run(scenario())
@@ -1,10 +1,12 @@
 import os
 import json
+import pickle
 from datetime import datetime, timezone
 
 import pytest
 
-from habit import Habit
+from habit import Habit, Checkoff, StreakSummary, to_microseconds
+import timestamp_codec
 
 
 DATA_DIR = os.path.join(os.path.realpath(os.path.pardir), "habittracker", "data")
@@ -149,6 +151,68 @@ def test_checkoff_invalid_option_timestamp_already_checked_off(habit_object):
     assert str(exc_info.value) == expected_error_message
 
 
+@pytest.mark.unit
+@pytest.mark.positive
+def test_checkoff_valid_option_timestamps_out_of_order(habit_object):
+    checkoff_timestamps = ["2020-12-03 08:00:00.000000", "2020-12-01 08:00:00.000000", "2020-12-02 08:00:00.000000"]
+    for checkoff_timestamp in checkoff_timestamps:
+        habit_object.check_off(checkoff_timestamp)
+    actual = habit_object.to_custom_dict()["checkoffs"]
+    assert actual == sorted(checkoff_timestamps)
+
+
+@pytest.mark.unit
+@pytest.mark.negative
+def test_checkoff_invalid_option_timestamp_already_checked_off_after_pickle(habit_object):
+    expected_habit_checkoff_timestamp = "2020-12-01 23:59:00.123456"
+    habit_object.check_off(expected_habit_checkoff_timestamp)
+    habit_object = pickle.loads(pickle.dumps(habit_object))
+    with pytest.raises(ValueError) as exc_info:
+        habit_object.check_off(expected_habit_checkoff_timestamp)
+    expected_error_message = f"Habit has been already checked off at given time {expected_habit_checkoff_timestamp}"
+    assert str(exc_info.value) == expected_error_message
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+def test_unpickle_former_habit_state(habit_object):
+    checkoff_timestamps = ["2020-12-02 08:00:00.000000", "2020-12-01 08:00:00.000000"]
+    former_state = {"id": habit_object.id, "name": habit_object.name, "description": habit_object.description,
+                    "periodicity": habit_object.periodicity, "created": habit_object.created,
+                    "checkoffs": [Checkoff(None, checkoff_timestamp) for checkoff_timestamp in checkoff_timestamps]}
+    actual = Habit.__new__(Habit)
+    actual.__setstate__(former_state)
+    assert actual.to_custom_dict()["checkoffs"] == sorted(checkoff_timestamps)
+    assert actual.checkoffs[0].habit is actual
+    assert pickle.loads(pickle.dumps(actual)).to_custom_dict() == actual.to_custom_dict()
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+@pytest.mark.parametrize("checkoff_days", [[1, 2, 3, 5, 6], [5, 1, 3, 2, 6], [6, 5, 3, 2, 1], [1, 1, 2, 3, 5, 5, 6]])
+def test_checkoff_valid_option_summary_maintained(habit_object, checkoff_days):
+    for hour, day in enumerate(checkoff_days):
+        habit_object.check_off(f"2020-12-{day:02d} {hour:02d}:00:00.000000")
+    expected = StreakSummary.from_ordinals(habit_object.checkoff_ordinals())
+    assert habit_object.summary == expected
+    assert habit_object.summary.count == len(checkoff_days)
+    assert habit_object.summary.current_streak == 2
+    assert habit_object.summary.longest_streak == 3
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+@pytest.mark.parametrize("periodicity", ["DAILY", "WEEKLY"])
+def test_periodicity_ordinal(periodicity):
+    habit = Habit("habitname", "habitdescription", periodicity)
+    for date in ["2020-12-27 23:59:59.999999", "2020-12-28 00:00:00.000000", "1969-12-31 12:00:00.000000"]:
+        microseconds = timestamp_codec.parse(date)
+        assert Habit.Periodicity[periodicity].ordinal(microseconds) == habit.period_ordinal(microseconds)
+    # Weeks run from Monday (2020-12-28) to Sunday
+    assert habit.period_ordinal(timestamp_codec.parse("2020-12-28 00:00:00.000000")) - habit.period_ordinal(
+        timestamp_codec.parse("2020-12-27 23:59:59.999999")) == 1
+
+
 @pytest.mark.unit
 @pytest.mark.positive
 def test_to_custom_dict(habit_object):
@@ -161,3 +225,109 @@ def test_to_custom_dict(habit_object):
     assert actual["periodicity"] == habit_object.periodicity.name
     assert actual["created"] == habit_object.created
     assert actual["checkoffs"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+@pytest.mark.parametrize("existing_days, added_days, expected_added", [
+    ([], [3, 1, 2, 1], 3),
+    ([1, 2], [4, 3, 2], 2),
+    ([3, 4], [1, 2, 5], 3)])
+def test_check_off_many(habit_object, existing_days, added_days, expected_added):
+    for day in existing_days:
+        habit_object.check_off(f"2020-12-{day:02d} 08:00:00.000000")
+    added = habit_object.check_off_many(to_microseconds(datetime(2020, 12, day, 8)) for day in added_days)
+    assert len(added) == expected_added
+    expected_checkoffs = [f"2020-12-{day:02d} 08:00:00.000000" for day in sorted(set(existing_days + added_days))]
+    assert habit_object.to_custom_dict()["checkoffs"] == expected_checkoffs
+    assert habit_object.summary == StreakSummary.from_ordinals(habit_object.checkoff_ordinals())
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+def test_unpickle_former_weekly_habit_state():
+    habit = Habit("habitname", "habitdescription", "WEEKLY")
+    for day in [7, 14, 21]:
+        habit.check_off(f"2020-12-{day:02d} 08:00:00.000000")
+    # Streak statistics of former versions were based on days
+    former_state = (*habit.__getstate__()[:6], (3, habit.checkoff_timestamps[-1], 1, 1))
+    actual = Habit.__new__(Habit)
+    actual.__setstate__(former_state)
+    assert actual.summary.longest_streak == 3
+    assert actual.summary == habit.summary
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+@pytest.mark.parametrize("date", [
+    "2020-12-01 08:00:00.000000",
+    "1969-12-31 23:59:59.999999",
+    "0001-01-01 00:00:00.000000",
+    "9999-12-31 23:59:59.999999",
+    "2020-2-1 8:00:00.5",
+    "２020-12-01 08:00:00.000000"])
+def test_timestamp_codec_parse(date):
+    expected = to_microseconds(datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f"))
+    assert timestamp_codec.parse(date) == expected
+    assert timestamp_codec.parse_many([date, date]).tolist() == [expected, expected]
+    assert timestamp_codec.format(expected) == datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f").strftime(
+        "%Y-%m-%d %H:%M:%S.%f")
+
+
+@pytest.mark.unit
+@pytest.mark.negative
+@pytest.mark.parametrize("date", [
+    "2020-12-01 08:00:00",
+    "2020-13-01 08:00:00.000000",
+    "2020-12-01T08:00:00.000000",
+    "2020-12-01 08:00:00.00000+",
+    "2021-01-01 08:00:00.0+0100",
+    "2020-12-01 08:00:00.00000Z",
+    "no timestamp"])
+def test_timestamp_codec_parse_invalid(date):
+    with pytest.raises(ValueError) as expected:
+        datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f")
+    with pytest.raises(ValueError) as actual:
+        timestamp_codec.parse(date)
+    assert str(actual.value) == str(expected.value)
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+def test_between():
+    habit_object = Habit("habitname", "habitdescription", "DAILY")
+    for day in ["2020-12-01", "2020-12-02", "2020-12-03", "2020-12-05", "2020-12-06"]:
+        habit_object.check_off(f"{day} 08:00:00.000000")
+    start, end = timestamp_codec.parse_range("2020-12-02", "2020-12-05")
+    assert timestamp_codec.format_many(habit_object.checkoff_timestamps_between(start, end)) == [
+        f"2020-12-0{day} 08:00:00.000000" for day in (2, 3, 5)]
+    habit = habit_object.between(start, end)
+    assert habit.id == habit_object.id
+    assert habit.created == habit_object.created
+    assert habit.summary.longest_streak == 2
+    assert len(habit_object.checkoff_timestamps_between()) == 5
+
+
+@pytest.mark.unit
+@pytest.mark.positive
+@pytest.mark.parametrize("start, end, expected", [
+    (None, None, (None, None)),
+    ("2020-12-01", None, ("2020-12-01 00:00:00.000000", None)),
+    (None, "2020-12-01", (None, "2020-12-02 00:00:00.000000")),
+    ("2020-12-01 08:00:00.000000", "2020-12-01 08:00:00.000000",
+     ("2020-12-01 08:00:00.000000", "2020-12-01 08:00:00.000001"))])
+def test_timestamp_codec_parse_range(start, end, expected):
+    assert timestamp_codec.parse_range(start, end) == tuple(
+        None if date is None else timestamp_codec.parse(date) for date in expected)
+
+
+@pytest.mark.unit
+@pytest.mark.negative
+@pytest.mark.parametrize("start, end", [
+    ("2020-12-02", "2020-12-01"),
+    ("2020-12-01 08:00:00.000000", "2020-12-01 07:59:59.999999"),
+    ("2020-13-01", None),
+    (None, "no timestamp")])
+def test_timestamp_codec_parse_range_invalid(start, end):
+    with pytest.raises(ValueError):
+        timestamp_codec.parse_range(start, end)
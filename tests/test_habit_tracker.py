@@ -2,17 +2,21 @@ import os
 import json
 from pathlib import Path
 
+import click
 import pytest
 from click.testing import CliRunner
 
 from habit_tracker import cli
+from habit import Habit
+import storage
 
 
 DATA_DIR = os.path.join(os.path.realpath(os.path.pardir), "habittracker", "data")
 
 
 def remove_test_db_files():
-    db_files = ["test_habitdb.bak", "test_habitdb.dat", "test_habitdb.dir"]
+    db_files = ["test_habitdb.bak", "test_habitdb.dat", "test_habitdb.dir", "test_habitdb.log", "test_habitdb.lock",
+                "test_habitdb.columns", "test_habitdb.sqlite", "test_habitdb.sqlite-wal", "test_habitdb.sqlite-shm"]
     for item in db_files:
         if os.path.exists(os.path.join(DATA_DIR, item)):
             os.remove(os.path.join(DATA_DIR, item))
@@ -58,6 +62,24 @@ def make_invalid_sample_data_json():
         assert False, f"File {original_name} doest not exist."
 
 
+@pytest.fixture()
+def make_invalid_sample_data_content():
+    original_name = os.path.join(DATA_DIR, "sample_data.json")
+    manipulated_name = os.path.join(DATA_DIR, "sample_data_.json")
+    if os.path.exists(original_name):
+        os.rename(original_name, manipulated_name)
+        with open(original_name, "w", encoding="utf-8") as json_file:
+            json.dump({"sample_data": [{"name": "habitname", "description": "habitdescription", "periodicity": "DAILY",
+                                        "checkoffs": ["2020-12-01 08:00:00.000000"]},
+                                       {"name": "habitname", "description": "habitdescription", "periodicity": "MONTHLY",
+                                        "checkoffs": []}]}, json_file)
+        yield
+        os.remove(original_name)
+        os.rename(manipulated_name, original_name)
+    else:
+        assert False, f"File {original_name} doest not exist."
+
+
 @pytest.fixture()
 def get_sample_data_habit_names():
     sample_data_file_name = os.path.join(DATA_DIR, "sample_data.json")
@@ -109,6 +131,15 @@ def get_sample_data_habit_names_periodicity_weekly():
 
 
 class TestBasic:
+
+    # noinspection PyMethodMayBeStatic
+    def setup_method(self):
+        remove_test_db_files()
+
+    # noinspection PyMethodMayBeStatic
+    def teardown_method(self):
+        remove_test_db_files()
+
     @pytest.mark.functionality
     @pytest.mark.negative
     def test_cli_unknown_command(self):
@@ -118,6 +149,48 @@ class TestBasic:
         assert "Invalid command" in result.output
         assert result.exit_code == 1
 
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_cli_profile_startup(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "--profile-startup", "list-habits"])
+        assert result.exit_code == 0
+        assert "STARTUP PROFILE" in result.output
+        assert "Command loading (list-habits)" in result.output
+        assert "Database initialization" in result.output
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_cli_timings(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "--timings", "list-habits", "-o", "HUMAN"])
+        assert result.exit_code == 0
+        assert "TIMINGS" in result.output
+        assert "initialize_database" in result.output
+        assert "storage.load" in result.output
+        assert "render" in result.output
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_cli_timings_json(self, tmp_path):
+        timings_json = os.path.join(str(tmp_path), "timings.json")
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "--timings-json", timings_json, "get-longest-streak"])
+        assert result.exit_code == 0
+        assert "TIMINGS" not in result.output
+        with open(timings_json, encoding="utf-8") as json_file:
+            report = json.load(json_file)
+        assert report["spans"]["storage.load_summaries"]["calls"] > 0
+        assert report["spans"]["analytics.get_longest_streak_from_summaries"]["calls"] == 1
+        assert report["total_ms"] >= report["spans"]["render"]["total_ms"]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_cli_command_registry_cached(self):
+        ctx = click.Context(cli)
+        assert "list-habits" in cli.list_commands(ctx)
+        assert cli.get_command(ctx, "list-habits") is cli.get_command(ctx, "list-habits")
+
     @pytest.mark.functionality
     @pytest.mark.negative
     def test_initialize_database_no_database_and_no_sample_data_json(self, rename_sample_data_json):
@@ -136,6 +209,58 @@ class TestBasic:
         assert "Failed to initialize database" in result.output
         assert result.exit_code == 1
 
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_initialize_database_no_database_and_invalid_sample_data_content(self, make_invalid_sample_data_content):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "create", "--help"])
+        assert "Failed to initialize database" in result.output
+        assert "Invalid sample data: Habit 1: invalid periodicity MONTHLY" in result.output
+        assert result.exit_code == 1
+        # Validated before the database is created
+        assert not storage.exists()
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_initialize_database_seed_failed(self, monkeypatch):
+        import sample_data
+
+        def seed(habits_db, sample_habits):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(sample_data, "seed", seed)
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "create", "--help"])
+        assert "OSError: disk full" in result.output
+        assert result.exit_code == 1
+        # Removed again, so the next run initializes the database
+        assert not storage.exists()
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_initialize_database_migration_failed(self, monkeypatch):
+        legacy_habit = Habit("legacyname", "legacydescription", "DAILY")
+        legacy_db = storage.ShelveStorage(os.path.join(DATA_DIR, "test_habitdb"))
+        legacy_db[legacy_habit.id] = legacy_habit
+        legacy_db.close()
+        migrate = storage.migrate
+
+        def failing_migrate(source, target):
+            migrate(source, target)
+            raise OSError("disk full")
+
+        monkeypatch.setattr(storage, "migrate", failing_migrate)
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        assert "OSError: disk full" in result.output
+        assert result.exit_code == 1
+        assert not storage.SQLiteStorage.exists(os.path.join(DATA_DIR, "test_habitdb"))
+        # Migrated by the next run
+        monkeypatch.setattr(storage, "migrate", migrate)
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        assert [habit["id"] for habit in json.loads(result.output)] == [legacy_habit.id]
+        assert result.exit_code == 0
+
 
 class TestCommandCreate:
 
@@ -304,13 +429,14 @@ class TestCommandCheckoff:
 
     @pytest.mark.functionality
     @pytest.mark.negative
-    def test_checkoff_in_cli_invalid_option_timestamp_invalid(self, habit):
+    @pytest.mark.parametrize("habit_timestamp, expected", [("2020-12-01", "2020-12-01"),
+                                                           ("2021-01-01 08:00:00.0+0100", "unconverted data")])
+    def test_checkoff_in_cli_invalid_option_timestamp_invalid(self, habit, habit_timestamp, expected):
         habit_id = habit["id"]
-        habit_timestamp = "2020-12-01"
         runner = CliRunner()
         result = runner.invoke(cli, ["--test", "checkoff", "-h", habit_id, "-t", habit_timestamp])
         assert "ValueError" in result.output
-        assert f"{habit_timestamp}" in result.output
+        assert expected in result.output
         assert result.exit_code == 1
 
     @pytest.mark.functionality
@@ -325,6 +451,62 @@ class TestCommandCheckoff:
         assert result.exit_code == 1
 
 
+class TestCommandBulkCheckoff:
+
+    # noinspection PyMethodMayBeStatic
+    def setup_method(self):
+        remove_test_db_files()
+
+    # noinspection PyMethodMayBeStatic
+    def teardown_method(self):
+        remove_test_db_files()
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_bulk_checkoff_in_cli_valid_option_csv(self, habit):
+        habit_id = habit["id"]
+        csv_input = (f"habit_id,timestamp\n{habit_id},2020-12-02 08:00:00.000000\n"
+                     f"{habit_id},2020-12-01 08:00:00.000000\n{habit_id},2020-12-02 08:00:00.000000\n")
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "bulk-checkoff"], input=csv_input)
+        data = json.loads(result.output)
+        assert data == {"habits": 1, "read_checkoffs": 3, "imported_checkoffs": 2}
+        result = runner.invoke(cli, ["--test", "get-longest-streak-for-habit", "-h", habit_id])
+        assert json.loads(result.output)["longest_streak"] == 2
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_bulk_checkoff_in_cli_valid_option_ndjson(self, habit_checked_off):
+        ndjson_input = "\n".join(json.dumps({"habit_id": habit_checked_off, "timestamp": timestamp})
+                                 for timestamp in ["2020-12-01 23:59:00.123456", "2020-12-02 08:00:00.000000"])
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "bulk-checkoff", "-f", "NDJSON"], input=ndjson_input)
+        data = json.loads(result.output)
+        assert data == {"habits": 1, "read_checkoffs": 2, "imported_checkoffs": 1}
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_bulk_checkoff_in_cli_invalid_option_habit_id_invalid(self, habit):
+        csv_input = f"{habit['id']},2020-12-01 08:00:00.000000\n42,2020-12-01 08:00:00.000000\n"
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "bulk-checkoff"], input=csv_input)
+        assert "KeyError" in result.output
+        assert "42" in result.output
+        assert result.exit_code == 1
+        result = runner.invoke(cli, ["--test", "get-longest-streak-for-habit", "-h", habit["id"]])
+        assert json.loads(result.output)["longest_streak"] == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_bulk_checkoff_in_cli_invalid_option_timestamp_invalid(self, habit):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "bulk-checkoff"], input=f"{habit['id']},2020-12-01\n")
+        assert "ValueError: Line 1" in result.output
+        assert result.exit_code == 1
+
+
 class TestCommandDelete:
 
     # noinspection PyMethodMayBeStatic
@@ -433,6 +615,89 @@ class TestCommandListHabits:
         assert "Invalid value" in result.output
         assert result.exit_code == 2
 
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_list_habits_in_cli_valid_option_with_limit_and_offset(self, get_sample_data_habit_names):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        expected = json.loads(result.output)[1:3]
+        result = runner.invoke(cli, ["--test", "list-habits", "-l", 2, "--offset", 1])
+        data = json.loads(result.output)
+        assert data == expected
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_list_habits_in_cli_valid_option_output_json_streamed(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        data = json.loads(result.output)
+        assert result.output == json.dumps(data, indent=4) + "\n"
+        result = runner.invoke(cli, ["--test", "list-habits", "--offset", len(data)])
+        assert result.output == "[]\n"
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_list_habits_in_cli_valid_option_output_ndjson(self):
+        runner = CliRunner()
+        expected = json.loads(runner.invoke(cli, ["--test", "list-habits"]).output)
+        result = runner.invoke(cli, ["--test", "list-habits", "-o", "NDJSON"])
+        data = [json.loads(line) for line in result.output.splitlines()]
+        assert data == expected
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_list_habits_in_cli_invalid_option_offset_negative(self):
+        offset = -1
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits", "--offset", offset])
+        assert "ValueError" in result.output
+        assert f"{offset}" in result.output
+        assert result.exit_code == 1
+
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    @pytest.mark.parametrize("options", [[], ["-o", "NDJSON"], ["-o", "HUMAN"], ["-l", "2", "-s", "1"], ["-s", "9"]])
+    def test_list_habits_in_cli_valid_option_workers(self, options):
+        runner = CliRunner()
+        expected = runner.invoke(cli, ["--test", "list-habits", *options])
+        result = runner.invoke(cli, ["--test", "list-habits", *options, "-w", "2"])
+        assert result.output == expected.output
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_list_habits_in_cli_invalid_option_workers_zero(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits", "-w", "0"])
+        assert "ValueError" in result.output
+        assert result.exit_code == 1
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_list_habits_in_cli_valid_option_from_to(self):
+        runner = CliRunner()
+        habits = json.loads(runner.invoke(cli, ["--test", "list-habits"]).output)
+        result = runner.invoke(cli, ["--test", "list-habits", "--from", "2020-12-02", "--to", "2020-12-03"])
+        data = json.loads(result.output)
+        expected = [{**habit, "checkoffs": [checkoff for checkoff in habit["checkoffs"]
+                                            if "2020-12-02" <= checkoff[:10] <= "2020-12-03"]} for habit in habits]
+        assert data == [habit for habit in expected if habit["checkoffs"]]
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    @pytest.mark.parametrize("options", [["--from", "2020-12-03", "--to", "2020-12-02"], ["--from", "yesterday"],
+                                         ["--to", "2020-12-03", "-w", "2"]])
+    def test_list_habits_in_cli_invalid_option_from_to(self, options):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits", *options])
+        assert "ValueError" in result.output
+        assert result.exit_code == 1
+
 
 class TestCommandListHabitByPeriodicity:
 
@@ -539,6 +804,30 @@ class TestCommandListHabitByPeriodicity:
         assert "Invalid value" in result.output
         assert result.exit_code == 2
 
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    @pytest.mark.parametrize("periodicity", ["DAILY", "WEEKLY"])
+    def test_list_habits_by_periodicity_in_cli_valid_option_workers(self, periodicity):
+        runner = CliRunner()
+        expected = runner.invoke(cli, ["--test", "list-habits-by-periodicity", "-p", periodicity])
+        result = runner.invoke(cli, ["--test", "list-habits-by-periodicity", "-p", periodicity, "-w", "3"])
+        assert result.output == expected.output
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    @pytest.mark.parametrize("periodicity", ["DAILY", "WEEKLY"])
+    def test_list_habits_by_periodicity_in_cli_valid_option_from(self, periodicity):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits-by-periodicity", "-p", periodicity,
+                                     "--from", "2020-12-20 00:00:00.000000"])
+        data = json.loads(result.output)
+        assert data
+        for habit in data:
+            assert habit["periodicity"] == periodicity
+            assert habit["checkoffs"] and min(habit["checkoffs"]) >= "2020-12-20"
+        assert result.exit_code == 0
+
 
 class TestCommandGetLongestStreak:
 
@@ -559,6 +848,58 @@ class TestCommandGetLongestStreak:
         assert data["longest_streak"] >= 0
         assert result.exit_code == 0
 
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_longest_streak_in_cli_valid_option_workers(self):
+        runner = CliRunner()
+        expected = runner.invoke(cli, ["--test", "get-longest-streak"])
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "-w", "2"])
+        assert result.output == expected.output
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_longest_streak_in_cli_valid_option_from_checkoffs(self, habit):
+        runner = CliRunner()
+        expected = runner.invoke(cli, ["--test", "get-longest-streak"])
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "-c"])
+        assert result.output == expected.output
+        assert result.exit_code == 0
+        # Columnar store is rebuilt after check offs
+        for day in range(1, 21):
+            runner.invoke(cli, ["--test", "checkoff", "-h", habit["id"], "-t", f"2021-01-{day:02d} 08:00:00.000000"])
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "--from-checkoffs"])
+        assert json.loads(result.output)["longest_streak"] == 20
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_get_longest_streak_in_cli_invalid_option_from_checkoffs_with_workers(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "-c", "-w", "2"])
+        assert "cannot be combined" in result.output
+        assert result.exit_code == 1
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_longest_streak_in_cli_valid_option_from_to(self, habit):
+        runner = CliRunner()
+        for day in [*range(1, 11), *range(12, 15)]:
+            runner.invoke(cli, ["--test", "checkoff", "-h", habit["id"], "-t", f"2021-01-{day:02d} 08:00:00.000000"])
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "--from", "2021-01-01"])
+        assert json.loads(result.output)["longest_streak"] == 10
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "--from", "2021-01-06", "--to", "2021-01-14"])
+        assert json.loads(result.output)["longest_streak"] == 5
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_get_longest_streak_in_cli_invalid_option_from_with_workers(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "get-longest-streak", "--from", "2020-12-01", "-w", "2"])
+        assert "cannot be combined" in result.output
+        assert result.exit_code == 1
+
 
 class TestCommandGetLongestStreakForHabit:
 
@@ -580,6 +921,20 @@ class TestCommandGetLongestStreakForHabit:
         assert data["longest_streak"] == 0
         assert result.exit_code == 0
 
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_longest_streak_for_habit_in_cli_valid_option_from_to(self, habit):
+        runner = CliRunner()
+        for day in [1, 2, 3, 5, 6]:
+            runner.invoke(cli, ["--test", "checkoff", "-h", habit["id"], "-t", f"2021-01-{day:02d} 08:00:00.000000"])
+        result = runner.invoke(cli, ["--test", "get-longest-streak-for-habit", "-h", habit["id"],
+                                     "--from", "2021-01-02", "--to", "2021-01-05"])
+        assert json.loads(result.output)["longest_streak"] == 2
+        result = runner.invoke(cli, ["--test", "get-longest-streak-for-habit", "-h", habit["id"],
+                                     "--from", "2021-01-05"])
+        assert json.loads(result.output)["longest_streak"] == 2
+        assert result.exit_code == 0
+
     @pytest.mark.functionality
     @pytest.mark.negative
     def test_get_longest_streak_for_habit_in_cli_invalid_option_habit_id_empty(self):
@@ -598,3 +953,200 @@ class TestCommandGetLongestStreakForHabit:
         assert "KeyError" in result.output
         assert f"{habit_id}" in result.output
         assert result.exit_code == 1
+
+
+class TestCommandGetCurrentStreak:
+
+    # noinspection PyMethodMayBeStatic
+    def setup_method(self):
+        remove_test_db_files()
+
+    # noinspection PyMethodMayBeStatic
+    def teardown_method(self):
+        remove_test_db_files()
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_current_streak_in_cli_valid(self, habit):
+        runner = CliRunner()
+        for day in [1, 3, 4, 5]:
+            runner.invoke(cli, ["--test", "checkoff", "-h", habit["id"], "-t", f"2021-01-{day:02d} 08:00:00.000000"])
+        for timestamp, expected in [("2021-01-05 20:00:00.000000", 3), ("2021-01-06 20:00:00.000000", 3),
+                                    ("2021-01-07 00:00:00.000000", 0)]:
+            result = runner.invoke(cli, ["--test", "get-current-streak", "-t", timestamp])
+            data = {item["id"]: item for item in json.loads(result.output)}
+            assert data[habit["id"]] == {"id": habit["id"], "periodicity": "DAILY", "current_streak": expected,
+                                         "broken": expected == 0}
+            assert result.exit_code == 0
+        result = runner.invoke(cli, ["--test", "get-current-streak", "-h", habit["id"],
+                                     "-t", "2021-01-06 20:00:00.000000"])
+        assert json.loads(result.output) == [{"id": habit["id"], "periodicity": "DAILY", "current_streak": 3,
+                                              "broken": False}]
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_current_streak_in_cli_valid_option_timestamp_before_latest_checkoff(self, habit):
+        runner = CliRunner()
+        # Check offs of the sample habits are in December 2020
+        result = runner.invoke(cli, ["--test", "get-current-streak", "-t", "2020-11-15 00:00:00.000000"])
+        assert {(item["current_streak"], item["broken"]) for item in json.loads(result.output)} == {(0, True)}
+        assert result.exit_code == 0
+        for day in [1, 3, 4, 5]:
+            runner.invoke(cli, ["--test", "checkoff", "-h", habit["id"], "-t", f"2021-01-{day:02d} 08:00:00.000000"])
+        for timestamp, expected in [("2020-12-31 20:00:00.000000", 0), ("2021-01-03 20:00:00.000000", 1),
+                                    ("2021-01-04 12:00:00.000000", 2)]:
+            for options in [[], ["-h", habit["id"]]]:
+                result = runner.invoke(cli, ["--test", "get-current-streak", "-t", timestamp, *options])
+                data = {item["id"]: item for item in json.loads(result.output)}
+                assert data[habit["id"]] == {"id": habit["id"], "periodicity": "DAILY", "current_streak": expected,
+                                             "broken": expected == 0}
+                assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_current_streak_in_cli_valid_option_timestamp_date(self, habit):
+        runner = CliRunner()
+        for day in [1, 3, 4, 5]:
+            runner.invoke(cli, ["--test", "checkoff", "-h", habit["id"], "-t", f"2021-01-{day:02d} 08:00:00.000000"])
+        # A day counts up to its end, like the last day of --to
+        for date, expected in [("2021-01-04", 2), ("2021-01-06", 3), ("2021-01-07", 0)]:
+            for options in [[], ["-h", habit["id"]]]:
+                result = runner.invoke(cli, ["--test", "get-current-streak", "-t", date, *options])
+                data = {item["id"]: item for item in json.loads(result.output)}
+                assert data[habit["id"]] == {"id": habit["id"], "periodicity": "DAILY", "current_streak": expected,
+                                             "broken": expected == 0}
+                assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    @pytest.mark.parametrize("periodicity", ["DAILY", "WEEKLY"])
+    def test_get_current_streak_in_cli_valid_option_periodicity(self, periodicity):
+        runner = CliRunner()
+        expected = [item for item in json.loads(runner.invoke(cli, ["--test", "get-current-streak"]).output)
+                    if item["periodicity"] == periodicity]
+        result = runner.invoke(cli, ["--test", "get-current-streak", "-p", periodicity, "-o", "JSON"])
+        assert json.loads(result.output) == expected
+        assert expected
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_get_current_streak_in_cli_valid_option_output_human(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "get-current-streak", "-o", "HUMAN"])
+        assert "current streak" in result.output
+        assert result.exit_code == 0
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    @pytest.mark.parametrize("options, expected", [(["-h", "42"], "KeyError"), (["-t", "2021-01-01 08:00"], "ValueError"),
+                                                   (["-h", "42", "-p", "DAILY"], "cannot be combined")])
+    def test_get_current_streak_in_cli_invalid_options(self, options, expected):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "get-current-streak", *options])
+        assert expected in result.output
+        assert result.exit_code == 1
+
+
+class TestCommandMigrateShelve:
+
+    # noinspection PyMethodMayBeStatic
+    def setup_method(self):
+        remove_test_db_files()
+
+    # noinspection PyMethodMayBeStatic
+    def teardown_method(self):
+        remove_test_db_files()
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_migrate_shelve_in_cli_valid_option_all(self, tmp_path):
+        legacy_habit = Habit("legacyname", "legacydescription", "WEEKLY")
+        legacy_habit.check_off("2020-12-01 23:59:00.123456")
+        source = os.path.join(str(tmp_path), "legacydb")
+        legacy_db = storage.ShelveStorage(source)
+        legacy_db[legacy_habit.id] = legacy_habit
+        legacy_db.close()
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "migrate-shelve", "-s", source])
+        data = json.loads(result.output)
+        assert data["migrated_habits"] == 1
+        assert result.exit_code == 0
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        data = json.loads(result.output)
+        assert legacy_habit.to_custom_dict() in data
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_migrate_shelve_in_cli_invalid_option_source_invalid(self, tmp_path):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "migrate-shelve", "-s", os.path.join(str(tmp_path), "legacydb")])
+        assert "ValueError" in result.output
+        assert result.exit_code == 1
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_migrate_shelve_in_cli_invalid_option_source_habit_database(self, monkeypatch):
+        import app_config as conf
+
+        monkeypatch.setattr(conf, "db_backend", "shelve")
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "migrate-shelve", "-s", os.path.join(DATA_DIR, "test_habitdb")])
+        assert "Source is the habit database itself" in result.output
+        assert result.exit_code == 2
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_initialize_database_with_former_shelve_database(self):
+        legacy_habit = Habit("legacyname", "legacydescription", "DAILY")
+        legacy_db = storage.ShelveStorage(os.path.join(DATA_DIR, "test_habitdb"))
+        legacy_db[legacy_habit.id] = legacy_habit
+        legacy_db.close()
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        data = json.loads(result.output)
+        assert data == [legacy_habit.to_custom_dict()]
+        assert result.exit_code == 0
+
+
+class TestCommandGenerateSampleData:
+
+    # noinspection PyMethodMayBeStatic
+    def setup_method(self):
+        remove_test_db_files()
+
+    # noinspection PyMethodMayBeStatic
+    def teardown_method(self):
+        remove_test_db_files()
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_generate_sample_data_json_in_cli(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "generate-sample-data", "-n", "3", "-c", "5"])
+        assert result.exit_code == 0
+        data = json.loads(result.output)
+        assert len(data["sample_data"]) == 3
+        assert all(len(item["checkoffs"]) == 5 for item in data["sample_data"])
+        # Reproducible from the seed
+        assert runner.invoke(cli, ["--test", "generate-sample-data", "-n", "3", "-c", "5"]).output == result.output
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_generate_sample_data_store_in_cli(self, get_sample_data_habit_names):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "generate-sample-data", "-n", "20", "-c", "10", "-o", "STORE",
+                                     "--duplicate-share", "0.2"])
+        assert result.exit_code == 0
+        assert json.loads(result.output) == {"habits": 20, "checkoffs": 200}
+        result = runner.invoke(cli, ["--test", "list-habits"])
+        assert len(json.loads(result.output)) == 20 + len(get_sample_data_habit_names)
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_generate_sample_data_in_cli_invalid_option_streak_length(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--test", "generate-sample-data", "-n", "3", "--streak-length", "0", "5"])
+        assert "ValueError" in result.output
+        assert result.exit_code == 1
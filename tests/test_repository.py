@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+import app_config as conf
+from habit import Habit
+import repository
+import storage
+
+
+@pytest.fixture(params=["sqlite", "shelve"])
+def habits_db(request, tmp_path):
+    habits_db = storage.BACKENDS[request.param](os.path.join(str(tmp_path), "habitdb"))
+    yield habits_db
+    habits_db.close()
+
+
+@pytest.fixture()
+def habit_object():
+    habit = Habit("habitname", "habitdescription", "DAILY")
+    habit.check_off("2020-12-01 08:00:00.000000")
+    return habit
+
+
+class TestHabitRepository:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_get_cached(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        habit_repository = repository.HabitRepository(habits_db)
+        first = habit_repository[habit_object.id]
+        second = habit_repository[habit_object.id]
+        assert second is first
+        assert first.to_custom_dict() == habit_object.to_custom_dict()
+        assert habit_repository.cache_info() == repository.CacheInfo(1, 1, conf.habit_cache_size, 1)
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_get_invalid_option_habit_id_invalid(self, habits_db):
+        habit_repository = repository.HabitRepository(habits_db)
+        with pytest.raises(KeyError):
+            habit_repository["42"]
+        assert "42" not in habit_repository
+        assert habit_repository.cache_info().currsize == 0
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_least_recently_used_evicted(self, habits_db):
+        habit_repository = repository.HabitRepository(habits_db, maxsize=2)
+        habits = [Habit(f"habit {index}", "habitdescription", "DAILY") for index in range(3)]
+        for habit in habits:
+            habit_repository[habit.id] = habit
+        habit_repository[habits[1].id]
+        habit_repository[habits[0].id]
+        assert habit_repository.cache_info() == repository.CacheInfo(1, 1, 2, 2)
+        # Habit 2 has been used least recently
+        habit_repository[habits[1].id]
+        assert habit_repository.misses == 1
+        habit_repository[habits[2].id]
+        assert habit_repository.misses == 2
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_writes_update_cache(self, habits_db, habit_object):
+        habit_repository = repository.HabitRepository(habits_db)
+        habit_repository[habit_object.id] = habit_object
+        habit_repository.check_off(habit_object.id, "2020-12-02 08:00:00.000000")
+        assert len(habit_repository[habit_object.id].checkoff_timestamps) == 2
+        first = habit_object.checkoff_timestamps[0]
+        assert habit_repository.check_off_many({habit_object.id: [first + 2 * 86400 * 1000000]}) == 1
+        assert len(habit_repository[habit_object.id].checkoff_timestamps) == 3
+        del habit_repository[habit_object.id]
+        assert habit_object.id not in habit_repository
+        with pytest.raises(KeyError):
+            habit_repository[habit_object.id]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_changes_of_other_storage_invalidate_cache(self, tmp_path, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        habit_repository = repository.HabitRepository(habits_db)
+        habit_repository[habit_object.id]
+        other_db = type(habits_db)(os.path.join(str(tmp_path), "habitdb"))
+        other_db.check_off(habit_object.id, "2020-12-02 08:00:00.000000")
+        other_db.close()
+        assert len(habit_repository[habit_object.id].checkoff_timestamps) == 2
+        assert habit_repository.misses == 2
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_writes_through_storage_invalidate_cache(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        habit_repository = repository.HabitRepository(habits_db)
+        habit_repository[habit_object.id]
+        # Written through the same storage object (shared by the commands in server mode)
+        first = habit_object.checkoff_timestamps[0]
+        habits_db.check_off_many({habit_object.id: [first + 86400 * 1000000]})
+        assert len(habit_repository[habit_object.id].checkoff_timestamps) == 2
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        assert len(habit_repository[habit_object.id].checkoff_timestamps) == 3
+        assert habit_repository.misses == 3
+        # Writes through the repository keep the cache
+        habit_repository.check_off(habit_object.id, "2020-12-04 08:00:00.000000")
+        assert len(habit_repository[habit_object.id].checkoff_timestamps) == 4
+        assert habit_repository.misses == 3
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_open_repository_kept_open(self, tmp_path, monkeypatch, habit_object):
+        monkeypatch.setattr(conf, "data_dir", str(tmp_path))
+        monkeypatch.setattr(conf, "db_name", "habitdb")
+        monkeypatch.setattr(conf, "keep_storage_open", True)
+        habit_repository = repository.open_repository()
+        habit_repository[habit_object.id] = habit_object
+        habit_repository.close()
+        assert repository.open_repository() is habit_repository
+        assert repository.open_repository()[habit_object.id] is habit_object
+        storage.close_storages()
+        monkeypatch.setattr(conf, "keep_storage_open", False)
+        other_repository = repository.open_repository()
+        assert other_repository is not habit_repository
+        other_repository.close()
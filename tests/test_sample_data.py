@@ -0,0 +1,138 @@
+import json
+import os
+
+import pytest
+
+from habit import Habit
+import sample_data
+import storage
+
+
+@pytest.fixture(params=["sqlite", "shelve"])
+def habits_db(request, tmp_path):
+    habits_db = storage.BACKENDS[request.param](os.path.join(str(tmp_path), "habitdb"))
+    yield habits_db
+    habits_db.close()
+
+
+@pytest.fixture()
+def data():
+    return {"sample_data": [{"name": "habitname", "description": "habitdescription", "periodicity": "daily",
+                             "checkoffs": ["2020-12-02 08:00:00.000000", "2020-12-01 08:00:00.000000",
+                                           "2020-12-03 08:00:00.000000"]},
+                            {"name": "weekly", "description": "weekly habit", "periodicity": "WEEKLY",
+                             "checkoffs": []}]}
+
+
+class TestSampleData:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_validate(self, data):
+        sample_habits = sample_data.validate(data)
+        assert [sample_habit.periodicity for sample_habit in sample_habits] == ["DAILY", "WEEKLY"]
+        assert list(sample_habits[0].checkoff_timestamps) == sorted(sample_habits[0].checkoff_timestamps)
+        assert len(sample_habits[1].checkoff_timestamps) == 0
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    @pytest.mark.parametrize("content, message", [
+        ([], "Object with list 'sample_data' expected"),
+        ({"sample_data": [1]}, "Habit 0: object expected"),
+        ({"sample_data": [{"name": "n", "description": "d"}]}, "Habit 0: string 'periodicity' expected"),
+        ({"sample_data": [{"name": "n", "description": "d", "periodicity": "YEARLY"}]},
+         "Habit 0: invalid periodicity YEARLY"),
+        ({"sample_data": [{"name": "n", "description": "d", "periodicity": "DAILY", "checkoffs": "x"}]},
+         "Habit 0: list 'checkoffs' expected"),
+        ({"sample_data": [{"name": "n", "description": "d", "periodicity": "DAILY", "checkoffs": ["2020-12-01"]}]},
+         "Habit 0: invalid check off"),
+        ({"sample_data": [{"name": "n", "description": "d", "periodicity": "DAILY",
+                           "checkoffs": ["2020-12-01 08:00:00.000000", "2020-12-01 08:00:00.000000"]}]},
+         "Habit 0: checked off twice at 2020-12-01 08:00:00.000000"),
+    ])
+    def test_validate_invalid(self, content, message):
+        with pytest.raises(ValueError) as e:
+            sample_data.validate(content)
+        assert str(e.value).startswith(message)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_seed(self, habits_db, data):
+        assert sample_data.seed(habits_db, sample_data.validate(data)) == 2
+        habits = sorted((habit for _, habit in habits_db.items()), key=lambda habit: habit.name)
+        assert [habit.name for habit in habits] == ["habitname", "weekly"]
+        assert habits[0].to_custom_dict()["checkoffs"] == ["2020-12-01 08:00:00.000000", "2020-12-02 08:00:00.000000",
+                                                          "2020-12-03 08:00:00.000000"]
+        # Streak statistics equal those of check offs added one by one
+        expected = Habit("habitname", "habitdescription", "DAILY")
+        for date in data["sample_data"][0]["checkoffs"]:
+            expected.check_off(date)
+        assert habits[0].summary == expected.summary
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_load_sample_data_file(self):
+        path = os.path.join(os.path.realpath(os.path.pardir), "habittracker", "data", sample_data.FILE_NAME)
+        sample_habits = sample_data.load(path)
+        assert len(sample_habits) == 5
+
+
+class TestGenerate:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_generate_reproducible(self):
+        first = [sample_habit.to_dict() for sample_habit in sample_data.generate(10, 20, seed=7)]
+        second = [sample_habit.to_dict() for sample_habit in sample_data.generate(10, 20, seed=7)]
+        other = [sample_habit.to_dict() for sample_habit in sample_data.generate(10, 20, seed=8)]
+        assert first == second
+        assert first != other
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    @pytest.mark.parametrize("streak_distribution", sample_data.STREAK_DISTRIBUTIONS)
+    def test_generate_valid_sample_data(self, streak_distribution):
+        generated = list(sample_data.generate(50, 40, weekly_share=0.5, streak_distribution=streak_distribution,
+                                              duplicate_share=0.3))
+        sample_habits = sample_data.validate(json.loads("".join(sample_data.dump_json(generated))))
+        assert [list(sample_habit.checkoff_timestamps) for sample_habit in sample_habits] == \
+               [list(sample_habit.checkoff_timestamps) for sample_habit in generated]
+        assert all(len(sample_habit.checkoff_timestamps) == 40 for sample_habit in sample_habits)
+        assert {sample_habit.periodicity for sample_habit in sample_habits} == {"DAILY", "WEEKLY"}
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_generate_streaks(self):
+        sample_habit, = sample_data.generate(1, 100, weekly_share=0, streak_length=(5, 5), gap=(2, 2))
+        habit = sample_habit.to_habit()
+        assert habit.summary.longest_streak == 5
+        # Streaks of 5 days, gaps of 2 days
+        days = [timestamp // (86400 * 1000000) for timestamp in sample_habit.checkoff_timestamps]
+        assert days[5] - days[4] == 3
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_generate_duplicates_same_period(self):
+        sample_habit, = sample_data.generate(1, 1000, weekly_share=0, duplicate_share=0.5)
+        habit = sample_habit.to_habit()
+        assert len(set(habit.checkoff_ordinals())) < 1000
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_dump_ndjson(self):
+        lines = list(sample_data.dump_ndjson(sample_data.generate(3, 2)))
+        assert len(lines) == 3
+        assert json.loads(lines[0])["checkoffs"] == next(sample_data.generate(3, 2)).to_dict()["checkoffs"]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_dump_json_empty(self):
+        assert json.loads("".join(sample_data.dump_json(sample_data.generate(0, 2)))) == {"sample_data": []}
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    @pytest.mark.parametrize("parameters", [{"habit_count": -1}, {"weekly_share": 1.5}, {"duplicate_share": 1},
+                                            {"streak_length": (3, 2)}, {"gap": (-1, 2)},
+                                            {"streak_distribution": "NORMAL"}])
+    def test_generate_invalid_parameters(self, parameters):
+        arguments = {"habit_count": 1, "checkoff_count": 1, **parameters}
+        with pytest.raises(ValueError):
+            sample_data.generate(**arguments)
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+
+import pytest
+
+import app_config as conf
+from client import Client
+from habit import Habit
+from habit_tracker import cli
+import server
+import storage
+
+
+@pytest.fixture()
+def habit_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(conf, "data_dir", str(tmp_path))
+    # Create empty test database, so no sample data is required
+    storage.SQLiteStorage(os.path.join(str(tmp_path), "test_habitdb")).close()
+    socket_path = os.path.join(str(tmp_path), "habittracker.sock")
+    habit_server = server.HabitServer(socket_path, cli)
+
+    def serve():
+        # Storages are opened and closed by the serving thread (SQLite connections are bound to a thread)
+        habit_server.serve_forever()
+        habit_server.server_close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    yield habit_server
+    habit_server.shutdown()
+    thread.join()
+
+
+class TestServer:
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_run_commands(self, habit_server):
+        with Client(habit_server.socket_path) as client:
+            response = client.run(["--test", "create", "-n", "habitname", "-d", "habitdescription", "-p", "DAILY"])
+            habit_id = json.loads(response["stdout"])["id"]
+            for day in range(1, 4):
+                response = client.run(["--test", "checkoff", "-h", habit_id, "-t", f"2020-12-0{day} 08:00:00.000000"])
+                assert response["exit_code"] == 0
+            response = client.run(["--test", "get-longest-streak"])
+        assert json.loads(response["stdout"]) == {"longest_streak": 3}
+        # Database is kept open by the server
+        assert len(storage._open_storages) == 1
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_run_command_bulk_checkoff_updates_cached_habits(self, habit_server, tmp_path):
+        input_path = os.path.join(str(tmp_path), "checkoffs.csv")
+        with Client(habit_server.socket_path) as client:
+            response = client.run(["--test", "create", "-n", "habitname", "-d", "habitdescription", "-p", "DAILY"])
+            habit_id = json.loads(response["stdout"])["id"]
+            client.run(["--test", "checkoff", "-h", habit_id, "-t", "2020-12-01 08:00:00.000000"])
+            # Habit cached by the repository of the server
+            response = client.run(["--test", "get-longest-streak-for-habit", "-h", habit_id])
+            assert json.loads(response["stdout"])["longest_streak"] == 1
+            with open(input_path, "w", encoding="utf-8") as input_file:
+                input_file.write(f"{habit_id},2020-12-02 08:00:00.000000\n{habit_id},2020-12-03 08:00:00.000000\n")
+            response = client.run(["--test", "bulk-checkoff", "-i", input_path])
+            assert response["exit_code"] == 0
+            response = client.run(["--test", "get-longest-streak-for-habit", "-h", habit_id])
+        assert json.loads(response["stdout"])["longest_streak"] == 3
+
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    def test_run_command_writes_through_storage_update_cached_habits(self, habit_server, tmp_path):
+        source = os.path.join(str(tmp_path), "legacydb")
+        habit = Habit("habitname", "habitdescription", "DAILY")
+        habit.check_off("2020-12-01 08:00:00.000000")
+        legacy_db = storage.ShelveStorage(source)
+        legacy_db[habit.id] = habit
+        with Client(habit_server.socket_path) as client:
+            assert client.run(["--test", "migrate-shelve", "-s", source])["exit_code"] == 0
+            # Habit cached by the repository of the server
+            response = client.run(["--test", "get-longest-streak-for-habit", "-h", habit.id])
+            assert json.loads(response["stdout"])["longest_streak"] == 1
+            habit.check_off_many([habit.checkoff_timestamps[0] + day * 86400 * 1000000 for day in (1, 2)])
+            legacy_db[habit.id] = habit
+            # Written through the storage shared with the repository, not through the repository
+            assert client.run(["--test", "migrate-shelve", "-s", source])["exit_code"] == 0
+            longest_streak = client.run(["--test", "get-longest-streak-for-habit", "-h", habit.id])
+            current_streak = client.run(["--test", "get-current-streak", "-h", habit.id,
+                                         "-t", "2020-12-03 09:00:00.000000"])
+        legacy_db.close()
+        assert json.loads(longest_streak["stdout"])["longest_streak"] == 3
+        assert [(item["current_streak"], item["broken"]) for item in json.loads(current_streak["stdout"])] == [
+            (3, False)]
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_run_command_invalid_option_habit_id_invalid(self, habit_server):
+        with Client(habit_server.socket_path) as client:
+            response = client.run(["--test", "checkoff", "-h", "42", "-t", "2020-12-01 08:00:00.000000"])
+        assert response["exit_code"] == 1
+        assert "ERROR" in response["stdout"]
+
+    @pytest.mark.functionality
+    @pytest.mark.negative
+    def test_run_command_invalid_option_command_serve(self, habit_server):
+        with Client(habit_server.socket_path) as client:
+            response = client.run(["--test", "serve"])
+        assert response["exit_code"] == 1
+        assert "not available in server mode" in response["stdout"]
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_server_already_running(self, habit_server):
+        with pytest.raises(ValueError):
+            server.HabitServer(habit_server.socket_path, cli)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_server_close(self, tmp_path):
+        socket_path = os.path.join(str(tmp_path), "habittracker.sock")
+        habit_server = server.HabitServer(socket_path, cli)
+        habit_server.server_close()
+        assert not os.path.exists(socket_path)
+        assert not conf.keep_storage_open
+        assert storage._open_storages == {}
@@ -0,0 +1,534 @@
+import os
+import multiprocessing
+from array import array
+
+import pytest
+
+from habit import Habit, MICROSECONDS_PER_DAY
+import columnar
+import storage
+import timestamp_codec
+
+
+@pytest.fixture(params=["sqlite", "shelve"])
+def habits_db(request, tmp_path):
+    habits_db = storage.BACKENDS[request.param](os.path.join(str(tmp_path), "habitdb"))
+    yield habits_db
+    habits_db.close()
+
+
+def check_off_concurrently(backend, path, habit_id, writer, count):
+    """Check off given habit count times (on distinct days per writer), run by concurrent writer processes."""
+    habits_db = storage.BACKENDS[backend](path)
+    first_day = 946717200000000 + writer * count * MICROSECONDS_PER_DAY
+    for day in range(count):
+        habits_db.check_off(habit_id, timestamp_codec.format(first_day + day * MICROSECONDS_PER_DAY))
+    habits_db.close()
+
+
+@pytest.fixture()
+def habit_object():
+    habit = Habit("habitname", "habitdescription", "DAILY")
+    habit.check_off("2020-12-02 08:00:00.000000")
+    habit.check_off("2020-12-01 08:00:00.000000")
+    return habit
+
+
+class TestStorage:
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_create_invalid_option_backend_incomplete(self, tmp_path):
+        class IncompleteStorage(storage.Storage):
+            def __init__(self, path):
+                self._habits = {}
+
+            def __getitem__(self, habit_id):
+                return self._habits[habit_id]
+
+        with pytest.raises(TypeError) as exc_info:
+            IncompleteStorage(os.path.join(str(tmp_path), "habitdb"))
+        assert "abstract" in str(exc_info.value)
+        assert "items" in str(exc_info.value)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_save_and_load(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        actual = habits_db[habit_object.id]
+        assert actual.to_custom_dict() == habit_object.to_custom_dict()
+        assert habit_object.id in habits_db
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_load_invalid_option_habit_id_invalid(self, habits_db):
+        with pytest.raises(KeyError):
+            habits_db["42"]
+        assert "42" not in habits_db
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_delete(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        del habits_db[habit_object.id]
+        assert habit_object.id not in habits_db
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_delete_invalid_option_habit_id_invalid(self, habits_db):
+        with pytest.raises(KeyError):
+            del habits_db["42"]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_items(self, habits_db, habit_object):
+        other_habit = Habit("othername", "otherdescription", "WEEKLY")
+        other_habit.check_off("2020-12-07 08:00:00.000000")
+        habits_db[habit_object.id] = habit_object
+        habits_db[other_habit.id] = other_habit
+        actual = {habit_id: habit.to_custom_dict() for habit_id, habit in habits_db.items()}
+        assert actual == {habit_object.id: habit_object.to_custom_dict(), other_habit.id: other_habit.to_custom_dict()}
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_check_off(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        actual = habits_db[habit_object.id].to_custom_dict()["checkoffs"]
+        assert actual == ["2020-12-01 08:00:00.000000", "2020-12-02 08:00:00.000000", "2020-12-03 08:00:00.000000"]
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_check_off_invalid_option_timestamp_already_checked_off(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        with pytest.raises(ValueError):
+            habits_db.check_off(habit_object.id, "2020-12-01 08:00:00.000000")
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 2
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    @pytest.mark.parametrize("periodicity, limit, offset, expected_names", [
+        (None, 0, 0, ["habit3", "habit2", "habit1", "habit0"]),
+        (None, 2, 1, ["habit2", "habit1"]),
+        ("WEEKLY", 0, 0, ["habit3", "habit1"]),
+        ("DAILY", 1, 1, ["habit0"]),
+        ("DAILY", 0, 5, [])])
+    def test_list_habits(self, habits_db, periodicity, limit, offset, expected_names):
+        for index in range(4):
+            habit = Habit(f"habit{index}", "habitdescription", ["DAILY", "WEEKLY"][index % 2])
+            habit.created = f"2020-12-0{index + 1} 08:00:00.000000"
+            habits_db[habit.id] = habit
+        actual = habits_db.list_habits(periodicity=periodicity, limit=limit, offset=offset)
+        assert [habit.name for habit in actual] == expected_names
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_count(self, habits_db):
+        for index in range(3):
+            habit = Habit(f"habit{index}", "habitdescription", ["DAILY", "WEEKLY"][index % 2])
+            habits_db[habit.id] = habit
+        assert habits_db.count() == 3
+        assert habits_db.count("DAILY") == 2
+        assert habits_db.count("WEEKLY") == 1
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_summaries_pages(self, habits_db):
+        for index in range(5):
+            habit = Habit(f"habit{index}", "habitdescription", "DAILY")
+            habits_db[habit.id] = habit
+        expected = [habit_id for habit_id, _ in habits_db.summaries()]
+        actual = [habit_id for offset in range(0, 5, 2) for habit_id, _ in habits_db.summaries(2, offset)]
+        assert actual == expected
+        assert sorted(actual) == sorted(habit_id for habit_id, _ in habits_db.items())
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_summaries(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        actual = dict(habits_db.summaries())
+        assert actual[habit_object.id].to_tuple() == (3, habit_object.summary.last_ordinal + 1, 3, 3)
+        assert habits_db[habit_object.id].summary == actual[habit_object.id]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    @pytest.mark.parametrize("periodicity", ["DAILY", "WEEKLY"])
+    def test_summaries_periodicity(self, habits_db, periodicity):
+        habits = [Habit(f"habit{index}", "habitdescription", ["DAILY", "WEEKLY"][index % 2]) for index in range(5)]
+        for habit in habits:
+            habits_db[habit.id] = habit
+        expected = [habit_id for habit_id, _ in habits_db.summaries()
+                    if habits_db[habit_id].periodicity.name == periodicity]
+        assert [habit_id for habit_id, _ in habits_db.summaries(periodicity=periodicity)] == expected
+        assert [habit_id for habit_id, _ in habits_db.summaries(1, 1, periodicity)] == expected[1:2]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_save_keeps_order(self, habits_db):
+        habits = [Habit(f"habit{index}", "habitdescription", "DAILY") for index in range(4)]
+        for habit in habits:
+            # Same creation date, list_habits breaks the tie by insertion order
+            habit.created = "2020-12-01 08:00:00.000000"
+            habits_db[habit.id] = habit
+        expected_habits = [habit.id for habit in habits_db.list_habits()]
+        expected_summaries = [habit_id for habit_id, _ in habits_db.summaries()]
+        habits[0].check_off("2020-12-02 08:00:00.000000")
+        habits_db[habits[0].id] = habits[0]
+        assert [habit.id for habit in habits_db.list_habits()] == expected_habits
+        assert [habit_id for habit_id, _ in habits_db.summaries()] == expected_summaries
+        assert habits_db[habits[0].id].summary.count == 1
+
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_check_off_many(self, habits_db, habit_object):
+        other_habit = Habit("othername", "otherdescription", "DAILY")
+        habits_db[habit_object.id] = habit_object
+        habits_db[other_habit.id] = other_habit
+        day = 86400 * 1000000
+        first = habit_object.checkoff_timestamps[0]
+        actual = habits_db.check_off_many({habit_object.id: [first + 2 * day, first, first + 2 * day],
+                                           other_habit.id: [first + day, first]})
+        assert actual == 3
+        assert list(habits_db[habit_object.id].checkoff_timestamps) == [first, first + day, first + 2 * day]
+        assert list(habits_db[other_habit.id].checkoff_timestamps) == [first, first + day]
+        assert habits_db[habit_object.id].summary.longest_streak == 3
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_check_off_many_invalid_option_habit_id_invalid(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        first = habit_object.checkoff_timestamps[0]
+        with pytest.raises(KeyError):
+            habits_db.check_off_many({habit_object.id: [first - 1], "42": [first]})
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 2
+
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_upgrade_weekly_summaries(self, tmp_path):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.SQLiteStorage(path)
+        habit = Habit("habitname", "habitdescription", "WEEKLY")
+        for day in [7, 14, 21]:
+            habit.check_off(f"2020-12-{day:02d} 08:00:00.000000")
+        habits_db[habit.id] = habit
+        # Simulate streak statistics of a former version (based on days)
+        habits_db._connection.execute("UPDATE habits SET last_ordinal = 737780, current_streak = 1, longest_streak = 1")
+        habits_db._connection.execute("PRAGMA user_version = 0")
+        habits_db.close()
+        habits_db = storage.SQLiteStorage(path)
+        assert dict(habits_db.summaries())[habit.id] == habit.summary
+        assert habit.summary.longest_streak == 3
+        habits_db.close()
+
+
+class TestColumnarStore:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_checkoff_columns(self, habits_db, habit_object):
+        other_habit = Habit("othername", "otherdescription", "WEEKLY")
+        other_habit.check_off("2020-12-07 08:00:00.000000")
+        empty_habit = Habit("emptyname", "emptydescription", "DAILY")
+        for habit in [habit_object, other_habit, empty_habit]:
+            habits_db[habit.id] = habit
+        habit_ids, period_days, timestamps, habit_indexes = habits_db.checkoff_columns()
+        assert habit_ids == sorted([habit_object.id, other_habit.id, empty_habit.id])
+        expected = sorted((habit_id, timestamp) for habit_id, habit in habits_db.items()
+                          for timestamp in habit.checkoff_timestamps)
+        assert [(habit_ids[index], timestamp) for index, timestamp in zip(habit_indexes, timestamps)] == expected
+        assert period_days[habit_ids.index(other_habit.id)] == 7
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_write_and_open(self, tmp_path, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        path = os.path.join(str(tmp_path), "habitdb.columns")
+        columnar.write(path, *habits_db.checkoff_columns())
+        with columnar.ColumnarStore(path) as store:
+            assert store.habit_ids == [habit_object.id]
+            assert list(store.period_days) == [1]
+            assert list(store.timestamps) == list(habit_object.checkoff_timestamps)
+            assert list(store.habit_indexes) == [0, 0]
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_open_invalid_option_file_invalid(self, tmp_path):
+        path = os.path.join(str(tmp_path), "habitdb.columns")
+        with open(path, "wb") as store_file:
+            store_file.write(b"\x00" * 64)
+        with pytest.raises(ValueError):
+            columnar.ColumnarStore(path)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_open_store_rebuilds_outdated_store(self, tmp_path, monkeypatch, habit_object):
+        monkeypatch.setattr(storage.conf, "data_dir", str(tmp_path))
+        monkeypatch.setattr(storage.conf, "db_name", "habitdb")
+        habits_db = storage.open_storage()
+        habits_db[habit_object.id] = habit_object
+        with columnar.open_store(habits_db) as store:
+            assert len(store.timestamps) == 2
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        assert not columnar.is_current(columnar.get_path(), habits_db)
+        with columnar.open_store(habits_db) as store:
+            assert len(store.timestamps) == 3
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_open_store_rebuilds_former_layout(self, tmp_path, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        path = os.path.join(str(tmp_path), "habitdb.columns")
+        with open(path, "wb") as store_file:
+            store_file.write(columnar.HEADER.pack(b"HTCOLS01", 0, 0, 0))
+        with columnar.open_store(habits_db, path) as store:
+            assert store.habit_ids == [habit_object.id]
+            assert list(store.time_timestamps) == list(habit_object.checkoff_timestamps)
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_checkoffs_between(self, tmp_path, habits_db, habit_object):
+        other_habit = Habit("othername", "otherdescription", "WEEKLY")
+        other_habit.check_off("2020-12-07 08:00:00.000000")
+        other_habit.check_off("2020-12-01 09:00:00.000000")
+        for habit in [habit_object, other_habit]:
+            habits_db[habit.id] = habit
+        path = os.path.join(str(tmp_path), "habitdb.columns")
+        columnar.write(path, *habits_db.checkoff_columns())
+        start, end = timestamp_codec.parse_range("2020-12-01 09:00:00.000000", "2020-12-07")
+        with columnar.ColumnarStore(path) as store:
+            assert list(store.time_timestamps) == sorted(store.timestamps)
+            habit_ids, period_days, timestamps, habit_indexes = store.checkoffs_between(start, end)
+            # Without numpy
+            assert store._group_by_habit(1, 4) == (habit_ids, period_days, timestamps, habit_indexes)
+            assert store.checkoffs_between(end, None) == ([], array("q"), array("q"), array("i"))
+        expected = sorted((habit.id, timestamp) for habit in [habit_object, other_habit]
+                          for timestamp in habit.checkoff_timestamps_between(start, end))
+        assert [(habit_ids[index], timestamp) for index, timestamp in zip(habit_indexes, timestamps)] == expected
+        assert habit_ids == sorted([habit_object.id, other_habit.id])
+        assert period_days[habit_ids.index(other_habit.id)] == 7
+
+
+class TestTimeRange:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    @pytest.mark.parametrize("start, end, expected_days", [
+        (None, None, [1, 2, 3, 8, 14]),
+        ("2020-12-02", "2020-12-08", [2, 3, 8]),
+        ("2020-12-02 08:00:00.000001", None, [3, 8, 14]),
+        ("2020-12-20", None, [])])
+    def test_checkoffs_between(self, habits_db, start, end, expected_days):
+        daily_habit = Habit("dailyname", "dailydescription", "DAILY")
+        weekly_habit = Habit("weeklyname", "weeklydescription", "WEEKLY")
+        for habit, days in [(daily_habit, [1, 2, 3]), (weekly_habit, [8, 14])]:
+            for day in days:
+                habit.check_off(f"2020-12-{day:02} 08:00:00.000000")
+            habits_db[habit.id] = habit
+        habit_ids, period_days, timestamps, habit_indexes = habits_db.checkoffs_between(
+            *timestamp_codec.parse_range(start, end))
+        days = sorted(int(timestamp_codec.format(timestamp)[8:10]) for timestamp in timestamps)
+        assert days == expected_days
+        assert list(habit_indexes) == sorted(habit_indexes)
+        for index, timestamp in zip(habit_indexes, timestamps):
+            habit = daily_habit if habit_ids[index] == daily_habit.id else weekly_habit
+            assert timestamp in habit.checkoff_timestamps
+            assert period_days[index] == habit.periodicity.days
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_checkoffs_between_after_check_off(self, habits_db, habit_object):
+        habits_db[habit_object.id] = habit_object
+        start, end = timestamp_codec.parse_range("2020-12-03", None)
+        assert len(habits_db.checkoffs_between(start, end)[2]) == 0
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        assert list(habits_db.checkoffs_between(start, end)[2]) == [
+            timestamp_codec.parse("2020-12-03 08:00:00.000000")]
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_list_habits_between(self, habits_db, habit_object):
+        weekly_habit = Habit("weeklyname", "weeklydescription", "WEEKLY")
+        weekly_habit.check_off("2020-12-07 08:00:00.000000")
+        unchecked_habit = Habit("uncheckedname", "uncheckeddescription", "DAILY")
+        for habit in [habit_object, weekly_habit, unchecked_habit]:
+            habits_db[habit.id] = habit
+        start, end = timestamp_codec.parse_range("2020-12-02", None)
+        habits = habits_db.list_habits_between(start, end)
+        assert [habit.id for habit in habits] == [weekly_habit.id, habit_object.id]
+        assert timestamp_codec.format_many(habits[1].checkoff_timestamps) == ["2020-12-02 08:00:00.000000"]
+        assert [habit.id for habit in habits_db.list_habits_between(start, end, "DAILY")] == [habit_object.id]
+        assert [habit.id for habit in habits_db.list_habits_between(start, end, limit=1, offset=1)] == [
+            habit_object.id]
+
+
+class TestShelveCheckoffLog:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_check_off_appends_to_log(self, tmp_path, habit_object):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.ShelveStorage(path)
+        habits_db[habit_object.id] = habit_object
+        dat_size = os.path.getsize(path + ".dat")
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        habits_db.close()
+        assert os.path.getsize(path + ".dat") == dat_size
+        assert os.path.getsize(path + ".log") > 0
+        habits_db = storage.ShelveStorage(path)
+        actual = habits_db[habit_object.id]
+        assert actual.to_custom_dict()["checkoffs"][-1] == "2020-12-03 08:00:00.000000"
+        assert actual.summary.longest_streak == 3
+        assert [habit.summary for _, habit in habits_db.items()] == [actual.summary]
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_save_and_delete_discard_logged_checkoffs(self, tmp_path, habit_object):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.ShelveStorage(path)
+        habits_db[habit_object.id] = habit_object
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        # Replace habit by one without the logged check off
+        habits_db[habit_object.id] = habit_object
+        habits_db.close()
+        habits_db = storage.ShelveStorage(path)
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 2
+        habits_db.check_off(habit_object.id, "2020-12-04 08:00:00.000000")
+        del habits_db[habit_object.id]
+        habits_db[habit_object.id] = Habit.from_record(habit_object.id, "habitname", "habitdescription", "DAILY",
+                                                        habit_object.created, array("q"))
+        habits_db.close()
+        habits_db = storage.ShelveStorage(path)
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 0
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_compact(self, tmp_path, habit_object, monkeypatch):
+        monkeypatch.setattr(storage.ShelveStorage, "COMPACT_THRESHOLD", 3)
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.ShelveStorage(path)
+        habits_db[habit_object.id] = habit_object
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        habits_db.check_off(habit_object.id, "2020-12-04 08:00:00.000000")
+        assert os.path.getsize(path + ".log") > 0
+        habits_db.check_off(habit_object.id, "2020-12-05 08:00:00.000000")
+        assert os.path.getsize(path + ".log") == 0
+        habits_db.close()
+        habits_db = storage.ShelveStorage(path)
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 5
+        assert habits_db[habit_object.id].summary.longest_streak == 5
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.negative
+    def test_read_log_invalid_option_last_record_incomplete(self, tmp_path, habit_object):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.ShelveStorage(path)
+        habits_db[habit_object.id] = habit_object
+        habits_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        habits_db.close()
+        log_size = os.path.getsize(path + ".log")
+        # Simulate a check off interrupted while writing
+        with open(path + ".log", "ab") as log_file:
+            log_file.write(b"\x00" * 5)
+        habits_db = storage.ShelveStorage(path)
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 3
+        assert os.path.getsize(path + ".log") == log_size
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_reload_keeps_habits_saved_by_other_storage(self, tmp_path):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_dbs = [storage.ShelveStorage(path), storage.ShelveStorage(path)]
+        habit_ids = []
+        for index in range(6):
+            # The storage reloads the shelf saved by the other storage, its own index is outdated
+            habit = Habit(f"habit{index}", "habitdescription", "DAILY")
+            habits_dbs[index % 2][habit.id] = habit
+            habit_ids.append(habit.id)
+        for habits_db in habits_dbs:
+            assert sorted(habit_id for habit_id, _ in habits_db.items()) == sorted(habit_ids)
+            habits_db.close()
+        habits_db = storage.ShelveStorage(path)
+        assert sorted(habit_id for habit_id, _ in habits_db.items()) == sorted(habit_ids)
+        habits_db.close()
+
+
+class TestConcurrentWriters:
+    @pytest.mark.functionality
+    @pytest.mark.positive
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    @pytest.mark.parametrize("backend", ["sqlite", "shelve"])
+    def test_concurrent_check_offs_not_lost(self, tmp_path, backend):
+        writers, count = 4, 25
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.BACKENDS[backend](path)
+        habit = Habit("habitname", "habitdescription", "DAILY")
+        habits_db[habit.id] = habit
+        habits_db.close()
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=check_off_concurrently, args=(backend, path, habit.id, writer, count))
+                     for writer in range(writers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert [process.exitcode for process in processes] == [0] * writers
+        habits_db = storage.BACKENDS[backend](path)
+        actual = habits_db[habit.id]
+        assert len(actual.checkoff_timestamps) == writers * count
+        assert actual.summary.longest_streak == writers * count
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_shelve_loads_changes_of_other_storage(self, tmp_path, habit_object):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.ShelveStorage(path)
+        other_db = storage.ShelveStorage(path)
+        habits_db[habit_object.id] = habit_object
+        other_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 3
+        habits_db.check_off(habit_object.id, "2020-12-04 08:00:00.000000")
+        assert len(other_db[habit_object.id].checkoff_timestamps) == 4
+        other_db.close()
+        habits_db.close()
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_sqlite_load_reads_one_snapshot(self, tmp_path, habit_object, monkeypatch):
+        path = os.path.join(str(tmp_path), "habitdb")
+        habits_db = storage.SQLiteStorage(path)
+        other_db = storage.SQLiteStorage(path)
+        habits_db[habit_object.id] = habit_object
+        load_habit = habits_db._load_habit
+
+        def check_off_and_load(row):
+            # Committed between reading the habit row and its checkoffs
+            other_db.check_off(habit_object.id, "2020-12-03 08:00:00.000000")
+            return load_habit(row)
+
+        monkeypatch.setattr(habits_db, "_load_habit", check_off_and_load)
+        actual = habits_db[habit_object.id]
+        assert len(actual.checkoff_timestamps) == 2
+        assert actual.summary.longest_streak == 2
+        monkeypatch.undo()
+        assert len(habits_db[habit_object.id].checkoff_timestamps) == 3
+        other_db.close()
+        habits_db.close()
+
+
+class TestMigrate:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_migrate_shelve_to_sqlite(self, tmp_path, habit_object):
+        source = storage.ShelveStorage(os.path.join(str(tmp_path), "legacydb"))
+        source[habit_object.id] = habit_object
+        target = storage.SQLiteStorage(os.path.join(str(tmp_path), "habitdb"))
+        actual = storage.migrate(source, target)
+        assert actual == 1
+        assert target[habit_object.id].to_custom_dict() == habit_object.to_custom_dict()
+        target.close()
+        source.close()
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from habit import Habit
+import storage
+import timings
+
+
+@pytest.fixture()
+def enabled_timings():
+    timings.enable()
+    yield
+    timings.disable()
+
+
+@pytest.fixture()
+def habits_db(tmp_path):
+    habits_db = storage.SQLiteStorage(os.path.join(str(tmp_path), "habitdb"))
+    habit = Habit("habitname", "habitdescription", "DAILY")
+    habit.check_off("2020-12-01 08:00:00.000000")
+    habit.check_off("2020-12-02 08:00:00.000000")
+    habits_db[habit.id] = habit
+    yield habits_db
+    habits_db.close()
+
+
+class TestTimings:
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_span_nested_self_duration(self, enabled_timings):
+        with timings.span("outer"):
+            with timings.span("inner"):
+                pass
+            with timings.span("inner"):
+                pass
+        spans = timings.report()["spans"]
+        assert list(spans) == ["outer", "inner"]
+        assert spans["outer"]["calls"] == 1
+        assert spans["inner"]["calls"] == 2
+        assert spans["outer"]["self_ms"] == pytest.approx(spans["outer"]["total_ms"] - spans["inner"]["total_ms"])
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_span_nested_same_name_counted_once(self, enabled_timings):
+        with timings.span("load"):
+            with timings.span("load"):
+                pass
+        report = timings.report()
+        assert report["spans"]["load"]["calls"] == 2
+        assert report["spans"]["load"]["self_ms"] == pytest.approx(report["spans"]["load"]["total_ms"])
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_disabled(self):
+        timings.enable()
+        timings.disable()
+        assert timings.span("span") is timings.span("other")
+        with timings.span("span"):
+            timings.count("counter")
+        assert timings.report()["spans"] == {}
+        assert timings.report()["counters"] == {}
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_enable_resets(self, enabled_timings):
+        timings.count("counter", 3)
+        timings.add("span", 0.5)
+        timings.enable()
+        assert timings.report()["spans"] == {}
+        assert timings.report()["counters"] == {}
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_iterate_excludes_consumer(self, enabled_timings):
+        with timings.span("consumer"):
+            assert list(timings.iterate("producer", range(3))) == [0, 1, 2]
+        assert timings.report()["spans"]["producer"]["calls"] == 4
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_storage_instrumented(self, habits_db, enabled_timings):
+        habit_list = list(habits_db.list_habits())
+        habit_list[0].to_custom_dict()
+        report = timings.report()
+        assert report["spans"]["storage.load"]["calls"] == 2
+        assert report["spans"]["habit.to_custom_dict"]["calls"] == 1
+        assert report["counters"] == {"habits.loaded": 1, "checkoffs.loaded": 2}
+
+    @pytest.mark.unit
+    @pytest.mark.positive
+    def test_format_report(self, enabled_timings):
+        with timings.span("render"):
+            timings.count("habits.loaded", 5)
+        text = timings.format_report()
+        assert "TIMINGS" in text
+        assert "render" in text
+        assert "habits.loaded" in text